@@ -1,19 +1,53 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Path, Form
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, UploadFile, File, HTTPException, Path, Form, Request
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.background import BackgroundTask
+import asyncio
+import hashlib
+import json
 import uuid
 import os
-import tempfile
-from typing import List, Optional
-from io import BytesIO
-import threading
+import time
+from concurrent.futures import Future
+from contextlib import closing
+from typing import Any, AsyncIterator, BinaryIO, Dict, List, Optional, Tuple
 from datetime import datetime, timezone
-from app.pdf_processor import PDFProcessor
+from app import metrics
+from app.pdf_processor import PDFProcessor, extraction_cache
+from app.arxiv_fetcher import arxiv_blob_cache
+from app.graphs.llm_utils import summary_cache
+from app.live import finish_live_stream, get_live_stream, start_live_stream
 from app.llm_client import LLMClient
-from app.tts_client import TTSClient
+from app.tts_client import TTSClient, tts_cache
 from app.audio_stitcher import AudioStitcher
+from app.audio_encoder import (
+    AUDIO_EXTENSIONS,
+    MAX_BITRATE_KBPS,
+    MIN_BITRATE_KBPS,
+    OUTPUT_FORMATS,
+    encode_podcast,
+    is_valid_bitrate,
+    media_type_for,
+)
 from app.config.settings import settings
+from app.events import job_events
 from app.logger import setup_logger
-from app.progress import jobs, increment_progress
+from app.job_store import FINISHED_STATUSES
+from app.progress import create_job, delete_job, get_job, list_jobs, update_job, increment_progress
+from app.recovery import (
+    claim_job,
+    cleanup_work_dirs,
+    delete_checkpoint,
+    is_job_claimed,
+    job_input_path,
+    job_segments_dir,
+    load_job_inputs,
+    load_job_topics,
+    remove_job_work_dir,
+    resume_enabled,
+    save_job_inputs,
+    save_job_topics,
+)
+from app.scheduler import QueueFullError, scheduler
 
 router = APIRouter()
 
@@ -23,7 +57,10 @@ logger = setup_logger('podcast_creator_api')
 @router.post("/podcasts")
 async def create_podcast(
     files: Optional[List[UploadFile]] = File(None),
-    arxiv_urls: Optional[List[str]] = Form(None)
+    arxiv_urls: Optional[List[str]] = Form(None),
+    output_format: Optional[str] = Form(None),
+    output_bitrate: Optional[str] = Form(None),
+    regenerate_summaries: bool = Form(False)
 ):
     """
     Upload PDF files and Arxiv URLs to initiate podcast generation.
@@ -31,6 +68,9 @@ async def create_podcast(
     Args:
         files: List of PDF files to process
         arxiv_urls: List of Arxiv URLs to process
+        output_format: Audio format of the podcast (wav, mp3, opus, aac), defaults to AUDIO_OUTPUT_FORMAT
+        output_bitrate: Bitrate for compressed formats (e.g. "128k"), defaults to AUDIO_OUTPUT_BITRATE
+        regenerate_summaries: Ignore cached topic summaries and summarize every source again
 
     Returns:
         Job information with status
@@ -40,25 +80,32 @@ async def create_podcast(
         logger.warning("No files or URLs provided")
         raise HTTPException(status_code=400, detail="At least one PDF file or Arxiv URL is required")
 
-    # Read and validate all files
-    file_contents = []
-    if files:
-        for file in files:
-            # Validate file size
-            if file.size > settings.MAX_FILE_SIZE:
-                logger.warning(f"File too large: {file.size} bytes > {settings.MAX_FILE_SIZE} bytes")
-                raise HTTPException(status_code=413, detail="File too large")
-
-            # Validate file type
-            if file.content_type != "application/pdf":
-                logger.warning(f"Invalid file type: {file.content_type}")
-                raise HTTPException(status_code=400, detail="Only PDF files are supported")
-
-            # Read file content
-            content = await file.read()
-            logger.debug(f"Successfully read file content. Size: {len(content)} bytes")
-
-            file_contents.append(content)
+    # Validate output format
+    output_format = (output_format or settings.AUDIO_OUTPUT_FORMAT).strip().lower()
+    if output_format not in OUTPUT_FORMATS:
+        logger.warning(f"Invalid output format: {output_format}")
+        raise HTTPException(status_code=400, detail=f"Output format must be one of: {', '.join(OUTPUT_FORMATS)}")
+
+    # Validate output bitrate, it ends up on the ffmpeg command line
+    output_bitrate = (output_bitrate or "").strip().lower() or None
+    if output_bitrate is not None and not is_valid_bitrate(output_bitrate):
+        logger.warning(f"Invalid output bitrate: {output_bitrate}")
+        raise HTTPException(
+            status_code=400,
+            detail=f"Output bitrate must be between {MIN_BITRATE_KBPS}k and {MAX_BITRATE_KBPS}k, e.g. 128k",
+        )
+
+    # Validate all files
+    for file in files or []:
+        # Validate file size, the size is checked again while the file is saved
+        if file.size is not None and file.size > settings.MAX_FILE_SIZE:
+            logger.warning(f"File too large: {file.size} bytes > {settings.MAX_FILE_SIZE} bytes")
+            raise HTTPException(status_code=413, detail="File too large")
+
+        # Validate file type
+        if file.content_type != "application/pdf":
+            logger.warning(f"Invalid file type: {file.content_type}")
+            raise HTTPException(status_code=400, detail="Only PDF files are supported")
 
     # Validate Arxiv URLs
     valid_arxiv_urls = []
@@ -75,30 +122,86 @@ async def create_podcast(
     job_id = str(uuid.uuid4())
     logger.info(f"Created new job: {job_id}")
 
+    # Save the uploads to the job's work dir, queued jobs hold only their paths
+    saved_files = []
+    try:
+        for index, file in enumerate(files or []):
+            path = job_input_path(job_id, index)
+            saved_files.append((path, await _save_upload(file, path)))
+    except BaseException:
+        remove_job_work_dir(job_id)
+        raise
+
     # Store job info
-    jobs[job_id] = {
-        "status": "processing",
-        "progress": 0,
-        "created_at": datetime.now(timezone.utc).isoformat(),
-        "updated_at": datetime.now(timezone.utc).isoformat(),
-        "result_file": None
-    }
+    job = create_job(job_id, status="queued")
 
-    # Start processing in a new thread
-    threading.Thread(
-        target=process_podcast_job,
-        args=(job_id, file_contents, valid_arxiv_urls),
-        daemon=True
-    ).start()
+    options = {
+        "output_format": output_format,
+        "output_bitrate": output_bitrate,
+        "regenerate_summaries": regenerate_summaries,
+    }
+    if resume_enabled:
+        # Inputs survive a crash or restart, the job is resumed from them on the next start
+        save_job_inputs(job_id, saved_files, valid_arxiv_urls, options)
 
-    logger.info(f"Job {job_id} started in background thread")
+    # Hand the job to the scheduler, reject it if the queue is full
+    try:
+        position = scheduler.submit(
+            job_id,
+            process_podcast_job,
+            job_id, saved_files, valid_arxiv_urls,
+            **options,
+        )
+    except QueueFullError as e:
+        delete_job(job_id)
+        remove_job_work_dir(job_id)
+        logger.warning(f"Rejected job {job_id}: {str(e)}")
+        raise HTTPException(
+            status_code=429,
+            detail="Too many podcasts in the queue, please retry later",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+    logger.info(f"Job {job_id} queued at position {position}")
 
     return {
         "job_id": job_id,
-        "status": "processing",
-        "created_at": jobs[job_id]["created_at"]
+        "status": "queued",
+        "created_at": job["created_at"],
+        "queue_position": position
     }
 
+async def _save_upload(file: UploadFile, path: str) -> str:
+    """
+    Write an upload to `path` chunk by chunk (UPLOAD_CHUNK_SIZE), enforcing MAX_FILE_SIZE.
+
+    Returns:
+        Hex SHA-256 of the file content
+
+    Raises:
+        HTTPException: If the file is larger than MAX_FILE_SIZE
+    """
+    digest = hashlib.sha256()
+    size = 0
+    # File I/O and hashing run on worker threads, they'd otherwise block the event loop
+    f = await asyncio.to_thread(open, f"{path}.part", "wb")
+    try:
+        while chunk := await file.read(settings.UPLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            if size > settings.MAX_FILE_SIZE:
+                logger.warning(f"File too large: more than {settings.MAX_FILE_SIZE} bytes")
+                raise HTTPException(status_code=413, detail="File too large")
+            await asyncio.to_thread(_write_chunk, f, digest, chunk)
+    finally:
+        await asyncio.to_thread(f.close)
+    await asyncio.to_thread(os.replace, f"{path}.part", path)
+    logger.debug(f"Saved upload to {path}. Size: {size} bytes")
+    return digest.hexdigest()
+
+def _write_chunk(f: BinaryIO, digest: Any, chunk: bytes) -> None:
+    digest.update(chunk)
+    f.write(chunk)
+
 @router.get("/podcasts/status/{job_id}")
 async def get_podcast_status(job_id: str):
     """
@@ -110,19 +213,82 @@ async def get_podcast_status(job_id: str):
     Returns:
         Job status information
     """
-    if job_id not in jobs:
+    job_info = get_job(job_id)
+    if job_info is None:
         logger.warning(f"Job not found: {job_id}")
         raise HTTPException(status_code=404, detail="Job not found")
 
-    job_info = jobs[job_id]
+    return _job_status(job_id, job_info)
 
-    return {
+@router.get("/podcasts/status/{job_id}/events")
+async def stream_podcast_status(request: Request, job_id: str):
+    """
+    Push status updates of a podcast generation job as Server-Sent Events.
+
+    Every `status` event carries the same payload as GET /podcasts/status/{job_id}. Updates
+    are pushed on progress and stage changes, coalesced and sent at most once every
+    JOB_EVENTS_MIN_INTERVAL seconds. The stream ends after the job completed or failed.
+
+    Args:
+        job_id: Unique identifier for the job
+
+    Returns:
+        text/event-stream response
+    """
+    if get_job(job_id) is None:
+        logger.warning(f"Job not found: {job_id}")
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events() -> AsyncIterator[str]:
+        last_payload = None
+        with job_events.watch(job_id) as changed:
+            while not await request.is_disconnected():
+                changed.clear()
+                job_info = get_job(job_id)
+                if job_info is None:
+                    return
+                payload = json.dumps(_job_status(job_id, job_info))
+                if payload != last_payload:
+                    last_payload = payload
+                    yield f"event: status\ndata: {payload}\n\n"
+                if job_info["status"] in ("completed", "failed"):
+                    return
+
+                # Rate limit, changes in the meantime are coalesced into the next update
+                await asyncio.sleep(settings.JOB_EVENTS_MIN_INTERVAL)
+                try:
+                    await asyncio.wait_for(changed.wait(), timeout=settings.JOB_EVENTS_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    # Also catches changes made by other worker processes
+                    yield ": keepalive\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+def _job_status(job_id: str, job_info: Dict[str, Any]) -> Dict[str, Any]:
+    status = {
         "job_id": job_id,
         "status": job_info["status"],
         "progress": job_info["progress"],
         "result_file": job_info["result_file"] if job_info["result_file"] else None
     }
 
+    if job_info.get("current_step"):
+        status["current_step"] = job_info["current_step"]
+
+    if job_info["status"] == "queued":
+        estimated_start = scheduler.estimated_start(job_id)
+        status["queue_position"] = scheduler.position(job_id)
+        status["estimated_start_at"] = estimated_start.isoformat() if estimated_start else None
+
+    if job_info["status"] == "failed":
+        status["error"] = job_info.get("error")
+
+    return status
+
 @router.get("/podcasts/download/{filename}")
 async def download_podcast(filename: str = Path(..., title="Filename of the podcast to download")):
     """
@@ -144,10 +310,58 @@ async def download_podcast(filename: str = Path(..., title="Filename of the podc
     logger.info(f"Initiating download for file: {filename}")
     return FileResponse(
         file_path,
-        media_type="audio/wav",
+        media_type=media_type_for(filename),
         filename=filename
     )
 
+@router.get("/podcasts/{job_id}/live")
+async def listen_live(request: Request, job_id: str):
+    """
+    Listen to a podcast while it is being generated.
+
+    Streams a WAV of the audio produced so far, followed by new segments as they are
+    synthesized, until the job has produced all of its audio. Once the job is completed
+    the final podcast is served instead.
+
+    Args:
+        job_id: Unique identifier for the job
+
+    Returns:
+        Streaming (or file) audio response
+    """
+    job_info = get_job(job_id)
+    if job_info is None:
+        logger.warning(f"Job not found: {job_id}")
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    if job_info["status"] == "completed" and job_info.get("result_file"):
+        filename = job_info["result_file"]
+        file_path = os.path.join(settings.AUDIO_STORAGE_PATH, filename)
+        if not os.path.exists(file_path):
+            raise HTTPException(status_code=404, detail="File not found")
+        return FileResponse(file_path, media_type=media_type_for(filename), filename=filename)
+
+    if job_info["status"] == "failed":
+        raise HTTPException(status_code=409, detail="Job failed")
+
+    live_stream = get_live_stream(job_id)
+    if live_stream is None:
+        raise HTTPException(
+            status_code=409,
+            detail="Live audio is not available for this job right now, retry later or download it once completed",
+        )
+
+    logger.info(f"Live listener connected to job: {job_id}")
+    # Registered now, the job may finish before the stream is iterated. The stream releases it
+    # when it ends, the background task when the client went away before it was started.
+    release = live_stream.add_listener()
+    return StreamingResponse(
+        live_stream.iter_wav(request.is_disconnected, release),
+        media_type="audio/wav",
+        headers={"Cache-Control": "no-store"},
+        background=BackgroundTask(release),
+    )
+
 @router.delete("/podcasts/delete/{filename}")
 async def delete_podcast(filename: str = Path(..., title="Filename of the podcast to delete")):
     """
@@ -195,7 +409,7 @@ async def list_podcasts():
             file_path = os.path.join(settings.AUDIO_STORAGE_PATH, filename)
 
             # Skip non-files and non-audio files
-            if not os.path.isfile(file_path) or not filename.lower().endswith(('.mp3', '.wav')):
+            if not os.path.isfile(file_path) or not filename.lower().endswith(AUDIO_EXTENSIONS):
                 continue
 
             # Get file stats
@@ -217,25 +431,66 @@ async def list_podcasts():
         logger.error(f"Error listing podcasts: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Error listing podcasts")
 
-def process_podcast_job(job_id: str, file_contents: List[bytes], arxiv_urls: List[str]):
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """
+    Get hit/miss counters of the on-disk caches for this process.
+
+    Returns:
+        Cache statistics keyed by cache name (null for disabled caches)
+    """
+    return {
+        "tts": tts_cache.stats() if tts_cache else None,
+        "extraction": extraction_cache.stats() if extraction_cache else None,
+        "arxiv": arxiv_blob_cache.stats() if arxiv_blob_cache else None,
+        "summary": summary_cache.stats() if summary_cache else None,
+    }
+
+def process_podcast_job(
+    job_id: str,
+    files: List[Tuple[str, str]],
+    arxiv_urls: List[str],
+    output_format: str = "wav",
+    output_bitrate: Optional[str] = None,
+    regenerate_summaries: bool = False,
+):
     """
     Background task to process podcast generation for PDFs and Arxiv URLs.
 
     Args:
         job_id: Unique identifier for the job
-        file_contents: List of PDF file contents
+        files: Uploaded PDFs in the job's work dir, as (path, hex SHA-256 of the content)
         arxiv_urls: List of Arxiv URLs
+        output_format: Audio format of the final podcast (see OUTPUT_FORMATS)
+        output_bitrate: Bitrate for compressed formats
+        regenerate_summaries: Ignore cached topic summaries
     """
-    with tempfile.TemporaryDirectory() as tmpdirname:
+    started = time.perf_counter()
+    with claim_job(job_id) as claimed:
+        if not claimed:
+            logger.info(f"Job {job_id} is already being processed by another worker")
+            return
+        job_info = get_job(job_id)
+        if job_info is None or job_info["status"] in FINISHED_STATUSES:
+            # Resumed by two workers and already finished by the other one
+            remove_job_work_dir(job_id)
+            return
+
+        # Audio segments are kept in the job's work dir until the job finished, so a
+        # resumed job only synthesizes the lines that don't have audio yet
+        segments_dir = job_segments_dir(job_id)
         try:
             # Update job status
             logger.info(f"Starting processing for job: {job_id}")
-            jobs[job_id]["status"] = "processing"
-            jobs[job_id]["progress"] = 0  # Initial progress
+            update_job(job_id, status="processing", progress=0, current_step="Extracting text")  # Initial progress
+
+            # Segments are published for live listeners as soon as they are synthesized
+            live_stream = start_live_stream(job_id) if settings.LIVE_STREAM_ENABLED else None
+            on_segment = live_stream.publish if live_stream is not None else None
 
-            total_sources = len(file_contents) + len(arxiv_urls)
+            total_sources = len(files) + len(arxiv_urls)
             if total_sources == 0:
-                jobs[job_id]["status"] = "failed"
+                update_job(job_id, status="failed")
                 raise ValueError("No valid sources provided for processing")
 
             all_audio_files = []  # Will store all audio segments from all sources
@@ -243,69 +498,166 @@ def process_podcast_job(job_id: str, file_contents: List[bytes], arxiv_urls: Lis
             # Initialize PDF processor
             pdf_processor = PDFProcessor()
 
-            # Step 1: Extract text from all PDFs and Arxiv URLs
-            logger.info(f"Extracting text from all {total_sources} sources for job: {job_id}")
-            text_contents = []
-            progress_increment = 15 / total_sources
-
-            # Process PDF files
-            for index, file_content in enumerate(file_contents):
-                file_stream = BytesIO(file_content)
-                logger.debug(f"Extracting text from PDF {index + 1}/{total_sources} for job: {job_id}")
-                text_content = pdf_processor.extract_text_from_pdf(
-                    file_stream, job_id=job_id, progress_increment=progress_increment
-                )
-                logger.debug(f"Successfully extracted text from PDF {index + 1}/{total_sources} for job: {job_id}")
-                text_contents.append(text_content)
-
-            # Process Arxiv URLs
-            for index, url in enumerate(arxiv_urls):
-                logger.debug(f"Extracting text from Arxiv URL {index + 1}/{total_sources} for job: {job_id}")
-                text_content = pdf_processor.extract_text_from_arxiv(
-                    url, job_id=job_id, progress_increment=progress_increment
-                )
-                logger.debug(f"Successfully extracted text from Arxiv URL {index + 1}/{total_sources} for job: {job_id}")
-                text_contents.append(text_content)
+            llm_client = LLMClient()
+            tts_client = TTSClient(job_id)
+
+            # Step 1: Extract text from all PDFs and Arxiv URLs, summarizing each source
+            # as soon as its text is ready while the others are still being extracted
+            text_contents: List[Optional[str]] = [None] * total_sources
+            topic_summaries: List[Optional[Future]] = [None] * total_sources
+            resumed_state = llm_client.checkpointed_state(job_id, total_sources)
+            resumed_topics = load_job_topics(job_id) if resumed_state is not None else None
+            if resumed_topics is not None:
+                # The extracted texts were saved next to the checkpoint, only topics not discussed yet need summaries
+                logger.info(f"Resuming job {job_id} from its checkpoint, skipping text extraction")
+                text_contents = resumed_topics
+                topic_summaries = [
+                    llm_client.summarize_topic_async(text_content, regenerate_summaries)
+                    if index >= resumed_state["topic_index"] else None
+                    for index, text_content in enumerate(text_contents)
+                ]
+                increment_progress(job_id, 15)
+            else:
+                logger.info(f"Extracting text from all {total_sources} sources for job: {job_id}")
+                progress_increment = 15 / total_sources
+                try:
+                    for index, text_content in pdf_processor.iter_extracted_texts(
+                        files, arxiv_urls, job_id=job_id, progress_increment=progress_increment
+                    ):
+                        text_contents[index] = text_content
+                        topic_summaries[index] = llm_client.summarize_topic_async(
+                            text_content, regenerate_summaries
+                        )
+                except BaseException:
+                    for future in topic_summaries:
+                        if future is not None:
+                            future.cancel()
+                    raise
+                if resume_enabled:
+                    save_job_topics(job_id, text_contents)
 
             # Progress 15% Point
 
-            # Step 2: Generate podcast scripts with LLM for all sources
-            logger.info(f"Generating podcast scripts for all {total_sources} sources for job: {job_id}")
-            llm_client = LLMClient()
-            all_dialogues = llm_client.generate_podcast_script(text_contents, job_id)
-
-            # Step 3: Generate audio segments with TTS for all sources
-            logger.info(f"Generating audio segments for all {total_sources} sources for job: {job_id}")
-            tts_client = TTSClient()
-            audio_files = tts_client.generate_audio_segments(
-                all_dialogues,
-                job_id,
-                tmpdirname,
-            )
-            logger.debug(f"Successfully generated audio for source {index + 1}/{total_sources} for job: {job_id}")
+            if settings.TTS_PIPELINE_ENABLED:
+                # Step 2+3: Synthesize each dialogue line while the next one is being generated,
+                # optionally sentence by sentence while the line itself is being generated
+                logger.info(f"Generating podcast scripts and audio segments in a pipeline for all {total_sources} sources for job: {job_id}")
+                update_job(job_id, current_step="Generating dialogue and audio")
+                sentence_sink = None
+                if settings.LLM_SENTENCE_STREAMING_ENABLED:
+                    sentence_sink = tts_client.start_sentence_stream(job_id)
+                try:
+                    expected_lines, dialogue_stream = llm_client.stream_podcast_script(
+                        text_contents, job_id, regenerate_summaries, topic_summaries, sentence_sink
+                    )
+                    # Closed right away when TTS fails, so the dialogue generation has stopped
+                    # (and checkpoints no more) before the job's work dir and checkpoints are removed
+                    with closing(dialogue_stream):
+                        audio_files = tts_client.generate_audio_segments(
+                            dialogue_stream,
+                            job_id,
+                            segments_dir,
+                            total=expected_lines,
+                            on_segment=on_segment,
+                        )
+                finally:
+                    tts_client.close()
+            else:
+                if settings.LLM_SENTENCE_STREAMING_ENABLED:
+                    logger.warning("LLM_SENTENCE_STREAMING_ENABLED requires TTS_PIPELINE_ENABLED, ignoring it")
+                # Step 2: Generate podcast scripts with LLM for all sources
+                logger.info(f"Generating podcast scripts for all {total_sources} sources for job: {job_id}")
+                update_job(job_id, current_step="Generating dialogue")
+                all_dialogues = llm_client.generate_podcast_script(
+                    text_contents, job_id, regenerate_summaries, topic_summaries
+                )
+
+                # Step 3: Generate audio segments with TTS for all sources
+                logger.info(f"Generating audio segments for all {total_sources} sources for job: {job_id}")
+                update_job(job_id, current_step="Generating audio")
+                audio_files = tts_client.generate_audio_segments(
+                    all_dialogues,
+                    job_id,
+                    segments_dir,
+                    on_segment=on_segment,
+                )
+            logger.debug(f"Successfully generated {len(audio_files)} audio segments for job: {job_id}")
+            finish_live_stream(job_id)
             all_audio_files.extend(audio_files)
 
             # Step 4: Stitch all audio segments into final output
             logger.info(f"Stitching all audio segments for job: {job_id}")
+            update_job(job_id, current_step="Stitching audio")
             stitcher = AudioStitcher()
             output_filename = f"podcast_{datetime.now(timezone.utc).strftime('%Y%m%d%H%M')}.wav"
-            output_file = stitcher.stitch_audio_segments(
-                all_audio_files, output_filename
-            )
+            with metrics.timed(metrics.STITCH_SECONDS):
+                output_file = stitcher.stitch_audio_segments(
+                    all_audio_files, output_filename
+                )
             logger.info(f"Successfully stitched all audio segments for job: {job_id}")
 
+            # Step 5: Encode into the requested output format
+            if output_format != "wav":
+                logger.info(f"Encoding podcast to {output_format} for job: {job_id}")
+                update_job(job_id, current_step=f"Encoding {output_format}")
+                with metrics.timed(metrics.ENCODE_SECONDS, format=output_format):
+                    output_file = encode_podcast(output_file, output_format, output_bitrate)
+                output_filename = os.path.basename(output_file)
+
             # Update job status
-            jobs[job_id]["result_file"] = output_filename
-            jobs[job_id]["status"] = "completed"
-            remaining = 100 - jobs[job_id].get("progress", 0)
+            update_job(job_id, result_file=output_filename, status="completed")
+            metrics.JOB_SECONDS.labels(status="completed").observe(time.perf_counter() - started)
+            remaining = 100 - get_job(job_id).get("progress", 0)
             if remaining > 0:
                 increment_progress(job_id, remaining)
             logger.info(f"Job completed successfully: {job_id}")
 
         except Exception as e:
-            jobs[job_id]["status"] = "failed"
-            jobs[job_id]["error"] = str(e)
-            jobs[job_id]["detail"] = str(e)
+            update_job(job_id, status="failed", error=str(e), detail=str(e))
+            metrics.JOB_SECONDS.labels(status="failed").observe(time.perf_counter() - started)
             logger.error(f"Error processing job {job_id}: {str(e)}", exc_info=True)
+        finally:
+            finish_live_stream(job_id)
+
+        # Finished one way or the other, there is nothing left to resume
+        remove_job_work_dir(job_id)
+        delete_checkpoint(job_id)
+
+def resume_interrupted_jobs():
+    """
+    Resubmit jobs interrupted by a crash or restart and clean up stale job work dirs.
+
+    Queued or processing jobs that no process works on are queued again from their saved
+    inputs and continue from their last checkpoint, jobs without saved inputs are marked
+    as failed. Other workers may be resuming the same jobs, claim_job in
+    process_podcast_job makes sure each job runs only once.
+    """
+    def is_stale(job_id: str) -> bool:
+        job_info = get_job(job_id)
+        return job_info is None or job_info["status"] in FINISHED_STATUSES
+
+    if not resume_enabled:
+        # Work dirs of jobs queued in other workers hold their uploads, the rest are leftovers
+        cleanup_work_dirs(is_stale)
+        return
+
+    for job_info in list_jobs("processing") + list_jobs("queued"):
+        job_id = job_info["job_id"]
+        if is_job_claimed(job_id) or scheduler.position(job_id) is not None:
+            continue
+
+        inputs = load_job_inputs(job_id)
+        if inputs is None:
+            update_job(job_id, status="failed", error="Interrupted by a restart")
+            continue
+
+        saved_files, arxiv_urls, options = inputs
+        update_job(job_id, status="queued", current_step="Resuming")
+        try:
+            scheduler.submit(job_id, process_podcast_job, job_id, saved_files, arxiv_urls, **options)
+        except QueueFullError:
+            update_job(job_id, status="failed", error="Interrupted by a restart, the queue was full when resuming")
+            continue
+        logger.info(f"Resuming interrupted job {job_id}")
 
- 
\ No newline at end of file
+    cleanup_work_dirs(is_stale)
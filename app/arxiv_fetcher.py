@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import json
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.config.settings import settings
+from app.disk_cache import DiskCache
+from app.logger import setup_logger
+
+
+logger = setup_logger('arxiv_fetcher')
+
+# Versioned Arxiv PDFs (e.g. 2408.09869v2) never change, no need to revalidate them
+VERSIONED_URL_PATTERN = re.compile(r"/pdf/.+v\d+(?:\.pdf)?/?$", re.IGNORECASE)
+
+
+class DownloadTooLargeError(Exception):
+    pass
+
+
+class ArxivFetcher:
+    """
+    Download layer for Arxiv PDFs, shared by all jobs.
+
+    - Downloads run concurrently on a small thread pool over one pooled keep-alive session
+    - Identical URLs requested while a download is in flight share that download
+    - PDFs are kept in a local blob cache, unversioned URLs are revalidated with
+      If-None-Match / If-Modified-Since, and a stale copy is used if revalidation fails
+    - The size limit is enforced while streaming, oversized downloads are aborted early
+    """
+
+    def __init__(
+        self,
+        *,
+        workers: int,
+        timeout: float,
+        max_bytes: int,
+        blob_cache: Optional[DiskCache] = None,
+    ):
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.blob_cache = blob_cache
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, workers))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="arxiv-fetch")
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def fetch_async(self, url: str) -> Future:
+        """Start downloading `url` (or join the download already in flight), returns a Future of the PDF bytes."""
+        url = url.strip()
+        with self._lock:
+            future = self._inflight.get(url)
+            if future is not None:
+                logger.debug(f"Joining in-flight download of {url}")
+                return future
+            future = self._executor.submit(self._fetch, url)
+            self._inflight[url] = future
+        future.add_done_callback(lambda _: self._forget(url, future))
+        return future
+
+    def fetch(self, url: str) -> bytes:
+        return self.fetch_async(url).result()
+
+    def _forget(self, url: str, future: Future) -> None:
+        with self._lock:
+            if self._inflight.get(url) is future:
+                del self._inflight[url]
+
+    def _fetch(self, url: str) -> bytes:
+        key = DiskCache.make_key("arxiv-pdf", url)
+        cached: Optional[bytes] = None
+        metadata: Dict[str, str] = {}
+        if self.blob_cache is not None:
+            cached = self.blob_cache.get_bytes(key, ".pdf")
+            if cached is not None:
+                if VERSIONED_URL_PATTERN.search(url):
+                    logger.info(f"Using cached PDF for {url}")
+                    return cached
+                metadata = self._read_metadata(key)
+
+        headers = {}
+        if cached is not None:
+            if metadata.get("etag"):
+                headers["If-None-Match"] = metadata["etag"]
+            if metadata.get("last_modified"):
+                headers["If-Modified-Since"] = metadata["last_modified"]
+
+        try:
+            with self.session.get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+                if response.status_code == 304 and cached is not None:
+                    logger.info(f"Cached PDF for {url} is still valid")
+                    return cached
+                response.raise_for_status()
+                content = self._read_limited(url, response)
+                metadata = {
+                    "etag": response.headers.get("ETag", ""),
+                    "last_modified": response.headers.get("Last-Modified", ""),
+                }
+        except DownloadTooLargeError:
+            raise
+        except requests.exceptions.RequestException as e:
+            if cached is not None:
+                logger.warning(f"Revalidation of {url} failed, using cached PDF: {str(e)}")
+                return cached
+            raise Exception(f"Failed to download Arxiv PDF {url}: {str(e)}")
+
+        logger.info(f"Downloaded {url} ({len(content)} bytes)")
+        if self.blob_cache is not None:
+            try:
+                self.blob_cache.put_bytes(key, content, ".pdf")
+                self.blob_cache.put_text(key, json.dumps(metadata), ".json")
+            except OSError as e:
+                logger.warning(f"Failed to cache PDF for {url}: {str(e)}")
+        return content
+
+    def _read_limited(self, url: str, response: requests.Response) -> bytes:
+        content_length = response.headers.get("Content-Length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_bytes:
+            raise DownloadTooLargeError(
+                f"Arxiv PDF {url} is too large: {content_length} bytes > {self.max_bytes} bytes"
+            )
+        chunks = []
+        received = 0
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            received += len(chunk)
+            if received > self.max_bytes:
+                raise DownloadTooLargeError(
+                    f"Arxiv PDF {url} is too large: more than {self.max_bytes} bytes"
+                )
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    def _read_metadata(self, key: str) -> Dict[str, str]:
+        try:
+            with open(self.blob_cache.path_for(key, ".json"), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+
+arxiv_blob_cache = DiskCache(
+    "arxiv",
+    settings.ARXIV_CACHE_DIR,
+    settings.ARXIV_CACHE_MAX_BYTES,
+) if settings.ARXIV_CACHE_ENABLED else None
+
+arxiv_fetcher = ArxivFetcher(
+    workers=settings.ARXIV_FETCH_WORKERS,
+    timeout=settings.ARXIV_FETCH_TIMEOUT,
+    max_bytes=settings.ARXIV_MAX_PDF_SIZE,
+    blob_cache=arxiv_blob_cache,
+)
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import re
+import subprocess
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+from pydub import AudioSegment
+
+from app.config.settings import settings
+from app.logger import setup_logger
+
+
+logger = setup_logger('audio_encoder')
+
+
+# Supported output formats: file extension, content type and ffmpeg muxer/codec
+OUTPUT_FORMATS: Dict[str, Dict[str, Optional[str]]] = {
+    "wav": {"extension": "wav", "media_type": "audio/wav", "muxer": None, "codec": None},
+    "mp3": {"extension": "mp3", "media_type": "audio/mpeg", "muxer": "mp3", "codec": "libmp3lame"},
+    "opus": {"extension": "opus", "media_type": "audio/ogg", "muxer": "ogg", "codec": "libopus"},
+    "aac": {"extension": "m4a", "media_type": "audio/mp4", "muxer": "ipod", "codec": "aac"},
+}
+
+# Bitrates accepted for compressed formats, in kbit/s (every encoder above supports this range)
+MIN_BITRATE_KBPS = 8
+MAX_BITRATE_KBPS = 320
+_BITRATE_PATTERN = re.compile(r"([0-9]+)k")
+
+_MEDIA_TYPES = {spec["extension"]: spec["media_type"] for spec in OUTPUT_FORMATS.values()}
+AUDIO_EXTENSIONS = tuple(f".{extension}" for extension in _MEDIA_TYPES)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def media_type_for(filename: str) -> str:
+    """Content type of a podcast file, based on its extension."""
+    extension = os.path.splitext(filename)[1].lstrip(".").lower()
+    return _MEDIA_TYPES.get(extension, "application/octet-stream")
+
+
+def is_valid_bitrate(bitrate: str) -> bool:
+    """Whether a bitrate is given in kbit/s (e.g. "128k") and within MIN_BITRATE_KBPS..MAX_BITRATE_KBPS."""
+    match = _BITRATE_PATTERN.fullmatch(bitrate)
+    return match is not None and MIN_BITRATE_KBPS <= int(match.group(1)) <= MAX_BITRATE_KBPS
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Spawn instead of fork, the API process has many threads running
+            _pool = ProcessPoolExecutor(
+                max_workers=max(1, settings.AUDIO_ENCODER_WORKERS),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def _run_ffmpeg(converter: str, wav_path: str, output_path: str, muxer: str, codec: str, bitrate: str) -> None:
+    """Worker-side encode, ffmpeg streams from the WAV so the podcast is never fully in memory."""
+    partial_path = f"{output_path}.part"
+    command = [
+        converter, "-y", "-hide_banner", "-loglevel", "error",
+        "-i", wav_path,
+        "-vn", "-c:a", codec, "-b:a", bitrate,
+        "-f", muxer, partial_path,
+    ]
+    try:
+        result = subprocess.run(command, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip() or f"ffmpeg exited with code {result.returncode}")
+        os.replace(partial_path, output_path)
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+
+def encode_podcast(wav_path: str, output_format: str, bitrate: Optional[str] = None, keep_wav: Optional[bool] = None) -> str:
+    """
+    Encode a stitched WAV podcast into the requested output format.
+
+    Encoding runs in a separate process pool (AUDIO_ENCODER_WORKERS), the calling
+    thread only waits for the result.
+
+    Args:
+        wav_path: Path to the stitched WAV file
+        output_format: One of OUTPUT_FORMATS
+        bitrate: Target bitrate (e.g. "128k"), defaults to AUDIO_OUTPUT_BITRATE
+        keep_wav: Keep the WAV master next to the encoded file, defaults to AUDIO_KEEP_WAV_MASTER
+
+    Returns:
+        Path to the encoded file (the WAV path itself for "wav")
+
+    Raises:
+        Exception: If the format is unknown or encoding fails (the WAV is removed then)
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported output format: {output_format}")
+    spec = OUTPUT_FORMATS[output_format]
+    if spec["codec"] is None:
+        return wav_path
+
+    bitrate = bitrate or settings.AUDIO_OUTPUT_BITRATE
+    keep_wav = settings.AUDIO_KEEP_WAV_MASTER if keep_wav is None else keep_wav
+    output_path = f"{os.path.splitext(wav_path)[0]}.{spec['extension']}"
+
+    logger.info(f"Encoding {wav_path} to {output_format} at {bitrate}")
+    try:
+        _get_pool().submit(
+            _run_ffmpeg, AudioSegment.converter, wav_path, output_path, spec["muxer"], spec["codec"], bitrate
+        ).result()
+    except Exception as e:
+        logger.error(f"Failed to encode {wav_path} to {output_format}: {str(e)}")
+        # The job fails, nothing refers to its WAV
+        if os.path.exists(wav_path):
+            os.remove(wav_path)
+        raise Exception(f"Failed to encode podcast to {output_format}: {str(e)}")
+
+    if not keep_wav:
+        os.remove(wav_path)
+    logger.info(f"Successfully encoded podcast into {output_path}")
+    return output_path
@@ -1,6 +1,9 @@
+import math
 import os
+import wave
 from pydub import AudioSegment
-from typing import List
+from typing import List, Optional, Tuple
+from app import loudness
 from app.config.settings import settings
 from app.logger import setup_logger
 
@@ -9,6 +12,10 @@ logger = setup_logger('audio_stitcher')
 class AudioStitcher:
     def __init__(self):
         self.storage_path = settings.AUDIO_STORAGE_PATH
+        self.gated = settings.AUDIO_NORMALIZATION_MODE == "lufs"
+        self.target_loudness = settings.AUDIO_TARGET_LOUDNESS
+        # (reference segment, its loudness) so the reference is only measured once
+        self._reference: Optional[Tuple[AudioSegment, Optional[float]]] = None
     
     def normalize_audio(self, audio_segment: AudioSegment, reference_audio: AudioSegment = None) -> AudioSegment:
         """
@@ -21,56 +28,94 @@ class AudioStitcher:
         Returns:
             Normalized audio segment
         """
+        return self.normalize_batch([audio_segment], reference_audio)[0]
+
+    def normalize_batch(self, audio_segments: List[AudioSegment], reference_audio: AudioSegment = None) -> List[AudioSegment]:
+        """
+        Normalize a batch of audio segments to the reference format and loudness in one pass.
+
+        Loudness is measured on the raw sample arrays with NumPy, gated (LUFS-style) or
+        plain dBFS depending on AUDIO_NORMALIZATION_MODE. The target is AUDIO_TARGET_LOUDNESS
+        when set, otherwise the loudness of the reference audio (computed once per reference).
+
+        Args:
+            audio_segments: The audio segments to normalize
+            reference_audio: The reference audio segment to match against (if None, use first segment)
+
+        Returns:
+            Normalized audio segments, in the same order
+
+        Raises:
+            Exception: If a segment can't be converted to the reference format
+        """
+        if not audio_segments:
+            return []
+        # If no reference provided, use the first audio segment as reference
+        if reference_audio is None:
+            reference_audio = audio_segments[0]
+
+        # Ensure sample rate, number of channels and sample width consistency. The podcast is
+        # written with the reference's format, so failing here raises instead of corrupting it
+        segments = [self._match_format(segment, reference_audio) for segment in audio_segments]
+
         try:
-            # If no reference provided, use the audio segment itself as reference
-            if reference_audio is None:
-                reference_audio = audio_segment
-            
-            # Normalize loudness to match reference
-            # Get the loudness of the reference audio
-            reference_loudness = reference_audio.dBFS
-            
-            # Get the loudness of the current audio
-            current_loudness = audio_segment.dBFS
-            
-            # Calculate the difference
-            loudness_diff = reference_loudness - current_loudness
-            
-            # Apply gain to match reference loudness
-            normalized_audio = audio_segment.apply_gain(loudness_diff)
-            
-            # Additional normalization: ensure sample rate consistency
-            if normalized_audio.frame_rate != reference_audio.frame_rate:
-                normalized_audio = normalized_audio.set_frame_rate(reference_audio.frame_rate)
-            
-            # Ensure number of channels consistency
-            if normalized_audio.channels != reference_audio.channels:
-                if reference_audio.channels == 1:  # Reference is mono
-                    normalized_audio = normalized_audio.set_channels(1)
-                elif reference_audio.channels == 2:  # Reference is stereo
-                    normalized_audio = normalized_audio.set_channels(2)
-            
-            logger.debug(f"Normalized audio: loudness adjusted by {loudness_diff:.2f}dB, "
-                        f"sample rate: {normalized_audio.frame_rate}Hz, "
-                        f"channels: {normalized_audio.channels}")
-            
-            return normalized_audio
-            
+            target_loudness = self._target_loudness(reference_audio)
+            if target_loudness is None or not loudness.supports(reference_audio):
+                logger.debug("Loudness target unavailable, skipping loudness normalization")
+                return segments
+
+            arrays = [loudness.to_array(segment) for segment in segments]
+            normalized = loudness.normalize_arrays(
+                arrays, reference_audio.frame_rate, target_loudness, gated=self.gated
+            )
+
+            logger.debug(f"Normalized {len(segments)} audio segments to {target_loudness:.2f}dB, "
+                        f"sample rate: {reference_audio.frame_rate}Hz, "
+                        f"channels: {reference_audio.channels}")
+
+            return [loudness.from_array(samples, segment) for samples, segment in zip(normalized, segments)]
+
         except Exception as e:
-            logger.warning(f"Failed to normalize audio: {str(e)}. Using original audio.")
-            return audio_segment
-    
+            logger.warning(f"Failed to normalize audio loudness: {str(e)}. Using it at its original loudness.")
+            return segments
+
+    def _target_loudness(self, reference_audio: AudioSegment) -> Optional[float]:
+        if self.target_loudness is not None:
+            return self.target_loudness
+        # Measure the reference once, not once per segment
+        if self._reference is None or self._reference[0] is not reference_audio:
+            reference_loudness = loudness.segment_loudness(reference_audio, gated=self.gated)
+            if reference_loudness is not None and not math.isfinite(reference_loudness):
+                reference_loudness = None
+            self._reference = (reference_audio, reference_loudness)
+        return self._reference[1]
+
+    @staticmethod
+    def _match_format(audio_segment: AudioSegment, reference_audio: AudioSegment) -> AudioSegment:
+        if audio_segment.frame_rate != reference_audio.frame_rate:
+            audio_segment = audio_segment.set_frame_rate(reference_audio.frame_rate)
+        if audio_segment.channels != reference_audio.channels:
+            audio_segment = audio_segment.set_channels(reference_audio.channels)
+        if audio_segment.sample_width != reference_audio.sample_width:
+            audio_segment = audio_segment.set_sample_width(reference_audio.sample_width)
+        return audio_segment
+
     def stitch_audio_segments(self, audio_files: List[str], output_filename: str) -> str:
         """
         Stitch together audio segments into a single podcast file with normalization.
-        
+
+        The output WAV is opened once and each normalized segment's PCM frames are
+        appended as soon as it is processed, the header is patched when the file is
+        closed. Only the reference segment and the current normalization batch
+        (AUDIO_NORMALIZE_BATCH_SIZE segments) are held in memory.
+
         Args:
             audio_files: List of file paths to audio segments
             output_filename: Name for the output file
-            
+
         Returns:
             Path to the stitched audio file
-            
+
         Raises:
             Exception: If audio stitching fails
         """
@@ -78,44 +123,53 @@ class AudioStitcher:
         try:
             # Ensure storage directory exists
             os.makedirs(self.storage_path, exist_ok=True)
-            
+
             # Create output file path
             output_path = os.path.join(self.storage_path, output_filename)
-            
-            # Initialize empty audio segment
-            combined = AudioSegment.empty()
-            
+
+            if not audio_files:
+                AudioSegment.empty().export(output_path, format="wav")
+                return output_path
+
             # Load first audio file to use as reference
-            reference_audio = None
-            if audio_files:
-                first_file = audio_files[0]
-                if os.path.exists(first_file):
-                    reference_audio = AudioSegment.from_file(file=first_file, format="wav")
-                    combined += reference_audio
-                    logger.debug(f"Using {first_file} as reference for normalization")
-                else:
-                    raise FileNotFoundError(f"Audio file not found: {first_file}")
-            
-            # Process remaining audio files with normalization
-            for audio_file in audio_files[1:]:
-                if os.path.exists(audio_file):
-                    # Load the audio file
-                    audio_segment = AudioSegment.from_file(file=audio_file, format="wav")
-                    
-                    # Normalize the audio segment to match reference
-                    normalized_segment = self.normalize_audio(audio_segment, reference_audio)
-                    
-                    # Add to combined audio
-                    combined += normalized_segment
-                else:
-                    raise FileNotFoundError(f"Audio file not found: {audio_file}")
-            
-            # Export the combined audio
-            combined.export(output_path, format="wav")
+            first_file = audio_files[0]
+            reference_audio = self._load_segment(first_file)
+            logger.debug(f"Using {first_file} as reference for normalization")
+
+            # Write under a temporary name so a partial podcast is never listed or served
+            partial_path = f"{output_path}.part"
+            try:
+                with wave.open(partial_path, "wb") as output:
+                    output.setnchannels(reference_audio.channels)
+                    output.setsampwidth(reference_audio.sample_width)
+                    output.setframerate(reference_audio.frame_rate)
+
+                    # Normalize segments in batches, appending each batch's frames as it's done
+                    batch_size = max(1, settings.AUDIO_NORMALIZE_BATCH_SIZE)
+                    for start in range(0, len(audio_files), batch_size):
+                        batch = [
+                            reference_audio if index == 0 else self._load_segment(audio_files[index])
+                            for index in range(start, min(start + batch_size, len(audio_files)))
+                        ]
+                        for normalized_segment in self.normalize_batch(batch, reference_audio):
+                            # Append the frames, the header is patched on close
+                            output.writeframesraw(normalized_segment.raw_data)
+                os.replace(partial_path, output_path)
+            except BaseException:
+                if os.path.exists(partial_path):
+                    os.remove(partial_path)
+                raise
+
             logger.info(f"Successfully stitched audio into {output_path}")
-            
+
             return output_path
-            
+
         except Exception as e:
             logger.error(f"Failed to stitch audio segments: {str(e)}")
             raise Exception(f"Failed to stitch audio segments: {str(e)}")
+
+    @staticmethod
+    def _load_segment(audio_file: str) -> AudioSegment:
+        if not os.path.exists(audio_file):
+            raise FileNotFoundError(f"Audio file not found: {audio_file}")
+        return AudioSegment.from_file(file=audio_file, format="wav")
@@ -1,5 +1,5 @@
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 class Settings:
     # API Settings
@@ -7,6 +7,31 @@ class Settings:
     DEBUG: bool = os.getenv("DEBUG", "False").lower() in ['true']
     DEBUG_DIR: str = str(os.getenv("DEBUG_DIR", "/app/tmp"))
 
+    # Job store: "memory" (single process) or "sqlite" (durable, shared by all workers on the host)
+    JOB_STORE_BACKEND: str = os.getenv("JOB_STORE_BACKEND", "memory").lower()
+    JOB_STORE_PATH: str = os.getenv("JOB_STORE_PATH", "./data/jobs.db")
+    # Finished jobs older than this are removed from the store
+    JOB_RETENTION_HOURS: float = float(os.getenv("JOB_RETENTION_HOURS", "168"))
+    # Server-Sent Events of job status: minimum seconds between two updates of a watcher, and
+    # seconds between keepalives (the job is also re-read then, for jobs run by other workers)
+    JOB_EVENTS_MIN_INTERVAL: float = float(os.getenv("JOB_EVENTS_MIN_INTERVAL", "0.5"))
+    JOB_EVENTS_KEEPALIVE: float = float(os.getenv("JOB_EVENTS_KEEPALIVE", "15"))
+
+    # Every job keeps its uploaded PDFs and finished audio segments in JOB_WORK_DIR/<job_id> until it finished.
+    # Crash recovery: the job's options are saved there too and its dialogue graph is checkpointed after
+    # every node (JOB_CHECKPOINT_PATH), so jobs interrupted by a crash or restart resume where they
+    # stopped on the next start. Resuming requires JOB_STORE_BACKEND=sqlite
+    JOB_WORK_DIR: str = os.getenv("JOB_WORK_DIR", "./data/work")
+    JOB_RESUME_ENABLED: bool = os.getenv("JOB_RESUME_ENABLED", "True").lower() in ['true']
+    JOB_CHECKPOINT_PATH: str = os.getenv("JOB_CHECKPOINT_PATH", "./data/checkpoints.db")
+
+    # Job scheduling: number of jobs processed at once and how many may wait for a free worker
+    # (0: no waiting, jobs are only accepted while a worker is free)
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "2"))
+    JOB_QUEUE_SIZE: int = int(os.getenv("JOB_QUEUE_SIZE", "20"))
+    # Assumed job duration in seconds for queue estimates, until real durations are observed
+    JOB_ESTIMATED_DURATION: float = float(os.getenv("JOB_ESTIMATED_DURATION", "900"))
+
     # Podcast Settings
     PODCAST_NAME: str = os.getenv("PODCAST_NAME", "Tech Show")
     HOST_A_VOICE: str = os.getenv("HOST_A_VOICE", "expresso/ex03-ex01_happy_001_channel1_334s.wav")
@@ -16,6 +41,12 @@ class Settings:
 
     # LLM Settings
     LLM_API_HOST: str = os.getenv("LLM_API_HOST", "http://192.168.1.16:8000")
+    # Replicas of the LLM server (comma-separated), requests are balanced between them
+    LLM_API_HOSTS: List[str] = [host.strip() for host in os.getenv("LLM_API_HOSTS", "").split(",") if host.strip()] or [LLM_API_HOST]
+    # Path probed on every LLM replica by the health checks (empty = no active health checks)
+    LLM_HEALTH_PATH: str = os.getenv("LLM_HEALTH_PATH", "/v1/models")
+    # "job" keeps all turns of a job on one replica (warm prefix cache), "none" balances every request
+    LLM_STICKY_ROUTING: str = os.getenv("LLM_STICKY_ROUTING", "job").lower()
     LLM_MODEL: str = os.getenv("LLM_MODEL", "Qwen3-30B-A3B-Instruct-2507-UD-Q8_K_XL")
     
     LLM_SUMMARY_TEMPERATURE: float = float(os.getenv("LLM_SUMMARY_TEMPERATURE", "1.0"))
@@ -28,8 +59,21 @@ class Settings:
     # Topic exchange settings for alternating host dialogues
     TOPIC_EXCHANGE_MIN: int = int(os.getenv("TOPIC_EXCHANGE_MIN", "35"))
     TOPIC_EXCHANGE_MAX: int = int(os.getenv("TOPIC_EXCHANGE_MAX", "35"))
+    # Generate the conversations of all topics concurrently, the transitions between topics are
+    # written afterwards (sentence streaming is not used in this mode)
+    LLM_PARALLEL_TOPICS: bool = os.getenv("LLM_PARALLEL_TOPICS", "False").lower() in ['true']
+    # Number of topics generated at once with LLM_PARALLEL_TOPICS
+    LLM_PARALLEL_TOPIC_WORKERS: int = int(os.getenv("LLM_PARALLEL_TOPIC_WORKERS", "4"))
 
     LLM_SUMMARY_ENABLED: bool = os.getenv("LLM_SUMMARY_ENABLED", "True").lower() in ['true']
+    # Number of topic summaries generated in the background while sources are still being extracted
+    LLM_SUMMARY_WORKERS: int = int(os.getenv("LLM_SUMMARY_WORKERS", "2"))
+    # Cache of topic summaries, keyed by topic text, summary prompt, model and temperature
+    LLM_SUMMARY_CACHE_ENABLED: bool = os.getenv("LLM_SUMMARY_CACHE_ENABLED", "True").lower() in ['true']
+    LLM_SUMMARY_CACHE_DIR: str = os.getenv("LLM_SUMMARY_CACHE_DIR", "./cache/summary")
+    LLM_SUMMARY_CACHE_MAX_BYTES: int = int(os.getenv("LLM_SUMMARY_CACHE_MAX_BYTES", "268435456"))  # 256MB default
+    # Always regenerate summaries (the cache is still refreshed)
+    LLM_SUMMARY_FORCE_REGENERATE: bool = os.getenv("LLM_SUMMARY_FORCE_REGENERATE", "False").lower() in ['true']
     LLM_SUMMARY_SYSTEM_PROMPT: str = os.getenv(
         "LLM_SUMMARY_SYSTEM_PROMPT",
         """
@@ -73,6 +117,31 @@ Your summaries should:
 """.strip()
     )
 
+    # Keep system prompt, topic and prior turns byte-identical between requests (instructions go at
+    # the tail of the request and are not stored in history), so the LLM server can reuse its prefix cache
+    LLM_PREFIX_STABLE_PROMPTS: bool = os.getenv("LLM_PREFIX_STABLE_PROMPTS", "False").lower() in ['true']
+    # Stream host replies and send every finished sentence to TTS right away (requires TTS_PIPELINE_ENABLED)
+    LLM_SENTENCE_STREAMING_ENABLED: bool = os.getenv("LLM_SENTENCE_STREAMING_ENABLED", "False").lower() in ['true']
+    # Shorter sentences are merged with the next one
+    LLM_SENTENCE_MIN_CHARS: int = int(os.getenv("LLM_SENTENCE_MIN_CHARS", "40"))
+    # Bounded host chat histories: recent turns are sent verbatim within a token budget,
+    # older turns are compacted into a rolling summary
+    LLM_CONTEXT_MANAGEMENT_ENABLED: bool = os.getenv("LLM_CONTEXT_MANAGEMENT_ENABLED", "False").lower() in ['true']
+    LLM_CONTEXT_TOKEN_BUDGET: int = int(os.getenv("LLM_CONTEXT_TOKEN_BUDGET", "8000"))
+    LLM_CONTEXT_WINDOW_TURNS: int = int(os.getenv("LLM_CONTEXT_WINDOW_TURNS", "6"))
+    LLM_CONTEXT_SUMMARY_STEP_TURNS: int = int(os.getenv("LLM_CONTEXT_SUMMARY_STEP_TURNS", "4"))
+    LLM_CONTEXT_SUMMARY_SYSTEM_PROMPT: str = os.getenv(
+        "LLM_CONTEXT_SUMMARY_SYSTEM_PROMPT",
+        """
+You keep the running notes of a podcast host.
+You receive the notes so far (if any) inside <conversation_so_far> and new turns of the conversation inside <new_turns>,
+where "You" is the host and "Co-host" is the other host.
+Write updated notes covering the whole conversation: the topics discussed, key facts and explanations given,
+opinions each host expressed, open questions and running jokes.
+Write in compact prose from the host's point of view, less than 300 words, no headings.
+""".strip()
+    )
+
     HOST_A_PERSONALITY: str = """
 - Tone: Calm, realistic and educated
 - Vibe: Curious generalist who connects dots across domains
@@ -166,9 +235,67 @@ But does it actually solve real-world problems yet?
     TTS_MODEL: str = os.getenv("TTS_MODEL", "Kyutai-TTS-Server")
     TTS_TIMEOUT: int = int(os.getenv("TTS_TIMEOUT", "120"))
     TTS_WAKEUP_ENDPOINT: str = os.getenv("TTS_WAKEUP_ENDPOINT")
+    # Replicas of the TTS server (comma-separated), requests are balanced between them
+    TTS_API_HOSTS: List[str] = [host.strip() for host in os.getenv("TTS_API_HOSTS", "").split(",") if host.strip()] or [TTS_API_HOST]
+    # Path probed on every TTS replica by the health checks, which also wake them up (empty = no active health checks)
+    TTS_HEALTH_PATH: str = os.getenv("TTS_HEALTH_PATH", "")
+    # "voice" or "job" keeps requests of one voice / job on one replica, "none" balances every request
+    TTS_STICKY_ROUTING: str = os.getenv("TTS_STICKY_ROUTING", "none").lower()
+    # Number of TTS requests kept in flight at once (1 = sequential)
+    TTS_CONCURRENCY: int = int(os.getenv("TTS_CONCURRENCY", "1"))
+
+    # Content-addressed cache of synthesized lines, shared between jobs
+    TTS_CACHE_ENABLED: bool = os.getenv("TTS_CACHE_ENABLED", "True").lower() in ['true']
+    TTS_CACHE_DIR: str = os.getenv("TTS_CACHE_DIR", "./cache/tts")
+    TTS_CACHE_MAX_BYTES: int = int(os.getenv("TTS_CACHE_MAX_BYTES", "1073741824"))  # 1GB default
+
+    # Serve the audio of running jobs at /podcasts/{job_id}/live while they are being generated.
+    # Off by default, every segment is then decoded, normalized and written once more
+    LIVE_STREAM_ENABLED: bool = os.getenv("LIVE_STREAM_ENABLED", "False").lower() in ['true']
+
+    # Pipeline TTS synthesis with dialogue generation instead of running them back to back
+    TTS_PIPELINE_ENABLED: bool = os.getenv("TTS_PIPELINE_ENABLED", "False").lower() in ['true']
+    # Max dialogue lines buffered between the LLM producer and the TTS consumer
+    TTS_PIPELINE_QUEUE_SIZE: int = int(os.getenv("TTS_PIPELINE_QUEUE_SIZE", "8"))
+
+    # Client-side load balancing of LLM and TTS replicas: least outstanding requests, replicas
+    # failing BACKEND_EJECT_FAILURES requests in a row (or a health check) are skipped for
+    # BACKEND_EJECT_SECONDS. Sticky requests leave their replica once it has BACKEND_STICKY_SLACK
+    # more requests in flight than the least loaded one
+    BACKEND_HEALTH_INTERVAL: float = float(os.getenv("BACKEND_HEALTH_INTERVAL", "15"))
+    BACKEND_EJECT_FAILURES: int = int(os.getenv("BACKEND_EJECT_FAILURES", "3"))
+    BACKEND_EJECT_SECONDS: float = float(os.getenv("BACKEND_EJECT_SECONDS", "30"))
+    BACKEND_STICKY_SLACK: int = int(os.getenv("BACKEND_STICKY_SLACK", "2"))
+
+    # Processes converting PDFs with docling, shared by all jobs (0 = convert in the job thread)
+    PDF_EXTRACTION_WORKERS: int = int(os.getenv("PDF_EXTRACTION_WORKERS", "2"))
+    # Cache of extracted markdown, keyed by PDF content hash or Arxiv ID
+    EXTRACTION_CACHE_ENABLED: bool = os.getenv("EXTRACTION_CACHE_ENABLED", "True").lower() in ['true']
+    EXTRACTION_CACHE_DIR: str = os.getenv("EXTRACTION_CACHE_DIR", "./cache/extraction")
+    EXTRACTION_CACHE_MAX_BYTES: int = int(os.getenv("EXTRACTION_CACHE_MAX_BYTES", "536870912"))  # 512MB default
+    EXTRACTION_CACHE_MAX_AGE_DAYS: float = float(os.getenv("EXTRACTION_CACHE_MAX_AGE_DAYS", "30"))
+    # Arxiv PDF downloads: parallel fetches, size limit and local blob cache
+    ARXIV_FETCH_WORKERS: int = int(os.getenv("ARXIV_FETCH_WORKERS", "4"))
+    ARXIV_FETCH_TIMEOUT: int = int(os.getenv("ARXIV_FETCH_TIMEOUT", "60"))
+    ARXIV_MAX_PDF_SIZE: int = int(os.getenv("ARXIV_MAX_PDF_SIZE", "52428800"))  # 50MB default
+    ARXIV_CACHE_ENABLED: bool = os.getenv("ARXIV_CACHE_ENABLED", "True").lower() in ['true']
+    ARXIV_CACHE_DIR: str = os.getenv("ARXIV_CACHE_DIR", "./cache/arxiv")
+    ARXIV_CACHE_MAX_BYTES: int = int(os.getenv("ARXIV_CACHE_MAX_BYTES", "1073741824"))  # 1GB default
 
     AUDIO_STORAGE_PATH: str = os.getenv("AUDIO_STORAGE_PATH", "./audio_storage")
+    # "dbfs" for plain RMS level, "lufs" for gated (BS.1770-style) loudness (opt-in, ignores pauses)
+    AUDIO_NORMALIZATION_MODE: str = os.getenv("AUDIO_NORMALIZATION_MODE", "dbfs").lower()
+    # Absolute loudness target in dB, when unset every segment is matched to the first one
+    AUDIO_TARGET_LOUDNESS: Optional[float] = float(os.getenv("AUDIO_TARGET_LOUDNESS")) if os.getenv("AUDIO_TARGET_LOUDNESS") else None
+    # Output format of the podcast (wav, mp3, opus, aac), can be overridden per job
+    AUDIO_OUTPUT_FORMAT: str = os.getenv("AUDIO_OUTPUT_FORMAT", "wav").lower()
+    AUDIO_OUTPUT_BITRATE: str = os.getenv("AUDIO_OUTPUT_BITRATE", "128k")
+    AUDIO_KEEP_WAV_MASTER: bool = os.getenv("AUDIO_KEEP_WAV_MASTER", "False").lower() in ['true']
+    AUDIO_ENCODER_WORKERS: int = int(os.getenv("AUDIO_ENCODER_WORKERS", "1"))
+    AUDIO_NORMALIZE_BATCH_SIZE: int = int(os.getenv("AUDIO_NORMALIZE_BATCH_SIZE", "8"))
     MAX_FILE_SIZE: int = int(os.getenv("MAX_FILE_SIZE", "10485760"))  # 10MB default
+    # Uploads are written to the job's work dir in chunks of this size
+    UPLOAD_CHUNK_SIZE: int = int(os.getenv("UPLOAD_CHUNK_SIZE", "1048576"))  # 1MB default
     MAX_CHARACTER_SIZE: int = int(os.getenv("MAX_CHARACTER_SIZE", "92000")) # Max characters for LLM processing
 
 settings = Settings()
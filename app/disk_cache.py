@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from app.logger import setup_logger
+
+
+logger = setup_logger('disk_cache')
+
+
+class DiskCache:
+    """
+    Content-addressed, size-capped cache of files on local disk.
+
+    - Entries are stored as `<directory>/<key[:2]>/<key><suffix>`
+    - Writes are atomic (temp file + os.replace), so concurrent jobs and processes
+      can share a cache directory without ever reading a partial entry
+    - Hits refresh the entry's mtime, eviction removes the least recently used
+      entries until the cache is back under `max_bytes`, plus anything older than `max_age`
+    - Hit/miss counters are kept per process and exposed through `stats()`
+    """
+
+    def __init__(self, name: str, directory: str, max_bytes: int, max_age: Optional[float] = None):
+        self.name = name
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        # Running estimate of the cache size, None until the first scan
+        self._approx_bytes: Optional[int] = None
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Hash any JSON-serializable parts into a cache key."""
+        encoded = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def path_for(self, key: str, suffix: str = "") -> str:
+        return os.path.join(self.directory, key[:2], f"{key}{suffix}")
+
+    def get_path(self, key: str, suffix: str = "") -> Optional[str]:
+        """
+        Look up an entry.
+
+        Returns:
+            Path of the cached file, or None on a miss
+        """
+        path = self.path_for(key, suffix)
+        try:
+            stat = os.stat(path)
+            if self.max_age is not None and time.time() - stat.st_mtime > self.max_age:
+                raise FileNotFoundError(path)
+            # Mark as recently used for LRU eviction
+            os.utime(path)
+        except OSError:
+            self._record(hit=False)
+            return None
+        self._record(hit=True)
+        return path
+
+    def get_bytes(self, key: str, suffix: str = "") -> Optional[bytes]:
+        path = self.get_path(key, suffix)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            # Evicted between lookup and read
+            return None
+
+    def get_text(self, key: str, suffix: str = "") -> Optional[str]:
+        data = self.get_bytes(key, suffix)
+        return data.decode("utf-8") if data is not None else None
+
+    def put_bytes(self, key: str, data: bytes, suffix: str = "") -> str:
+        """Atomically store `data` under `key` and return the entry path."""
+        path = self.path_for(key, suffix)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        self._added(len(data))
+        return path
+
+    def put_text(self, key: str, text: str, suffix: str = "") -> str:
+        return self.put_bytes(key, text.encode("utf-8"), suffix)
+
+    def put_file(self, key: str, source_path: str, suffix: str = "") -> str:
+        """Atomically copy `source_path` into the cache under `key` and return the entry path."""
+        path = self.path_for(key, suffix)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        os.close(fd)
+        try:
+            shutil.copyfile(source_path, tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        self._added(os.path.getsize(path))
+        return path
+
+    def materialize(self, key: str, destination: str, suffix: str = "") -> bool:
+        """
+        Place a cached entry at `destination`, hard-linking when possible and copying otherwise.
+
+        Returns:
+            True on a cache hit, False on a miss
+        """
+        path = self.get_path(key, suffix)
+        if path is None:
+            return False
+        try:
+            if os.path.exists(destination):
+                os.remove(destination)
+            try:
+                os.link(path, destination)
+            except OSError:
+                # Different filesystem or no hard-link support
+                shutil.copyfile(path, destination)
+        except OSError as e:
+            logger.warning(f"[{self.name}] Failed to materialize cache entry {key}: {str(e)}")
+            return False
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits, misses = self._hits, self._misses
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+            "approx_bytes": self._approx_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+    def evict(self) -> None:
+        """Remove expired entries, then least recently used ones until the cache fits in `max_bytes`."""
+        entries = []
+        total = 0
+        now = time.time()
+        for root, _, files in os.walk(self.directory):
+            for filename in files:
+                path = os.path.join(root, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if filename.startswith(".tmp-"):
+                    # Leftover from a crashed writer, only remove it once it's clearly stale
+                    if now - stat.st_mtime > 3600:
+                        self._remove(path)
+                    continue
+                if self.max_age is not None and now - stat.st_mtime > self.max_age:
+                    self._remove(path)
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        if total > self.max_bytes:
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                if self._remove(path):
+                    total -= size
+
+        with self._lock:
+            self._approx_bytes = total
+        logger.debug(f"[{self.name}] Cache size after eviction: {total} bytes")
+
+    def _added(self, size: int) -> None:
+        with self._lock:
+            if self._approx_bytes is not None:
+                self._approx_bytes += size
+            needs_eviction = self._approx_bytes is None or self._approx_bytes > self.max_bytes
+        if needs_eviction:
+            self.evict()
+
+    def _record(self, *, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self._hits += 1
+            else:
+                self._misses += 1
+
+    def _remove(self, path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Set, Tuple
+
+from app.logger import setup_logger
+
+
+logger = setup_logger('events')
+
+
+class JobEventHub:
+    """
+    Wakes up async watchers of a job whenever its state changes.
+
+    notify() may be called from any thread (job workers), it only sets an asyncio.Event
+    on the watcher's loop. Watchers read the job state themselves, so any number of
+    notifications between two reads collapse into one update.
+    """
+
+    def __init__(self):
+        self._watchers: Dict[str, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = {}
+        self._lock = threading.Lock()
+
+    def notify(self, job_id: str) -> None:
+        with self._lock:
+            watchers = self._watchers.get(job_id)
+            if not watchers:
+                return
+            watchers = list(watchers)
+        for loop, event in watchers:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # Loop already closed, the watcher is going away
+                pass
+
+    @contextmanager
+    def watch(self, job_id: str) -> Iterator[asyncio.Event]:
+        """Event set on every change of the job, must be entered on the watcher's event loop."""
+        entry = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._watchers.setdefault(job_id, set()).add(entry)
+        try:
+            yield entry[1]
+        finally:
+            with self._lock:
+                watchers = self._watchers.get(job_id)
+                if watchers is not None:
+                    watchers.discard(entry)
+                    if not watchers:
+                        del self._watchers[job_id]
+
+
+job_events = JobEventHub()
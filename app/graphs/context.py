@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import re
+from typing import List, Optional, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+from app.graphs.xml_utils import render_topic_block, render_xml_block
+
+
+TOPIC_BLOCK_PATTERN = re.compile(r"<topic>\n(.*?)\n</topic>\s*", re.DOTALL)
+XML_BLOCK_PATTERN = re.compile(r"<(\w+)>.*?</\1>\s*", re.DOTALL)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token), good enough to enforce a budget."""
+    return len(text) // 4 + 1
+
+
+def message_tokens(messages: List[BaseMessage]) -> int:
+    return sum(estimate_tokens(str(message.content)) for message in messages)
+
+
+def strip_finished_topics(history: List[BaseMessage], new_topic: bool = False) -> List[BaseMessage]:
+    """
+    Drop the <topic> block from every message but the one that introduced the current topic.
+
+    The topic summary is only sent with the first exchange of a topic, so the last message
+    carrying a <topic> block belongs to the topic being discussed, unless the next turn
+    starts a new topic (`new_topic`).
+    """
+    carriers = [
+        index for index, message in enumerate(history)
+        if isinstance(message, HumanMessage) and "<topic>" in str(message.content)
+    ]
+    finished = set(carriers if new_topic else carriers[:-1])
+    if not finished:
+        return list(history)
+    return [
+        HumanMessage(content=TOPIC_BLOCK_PATTERN.sub("", str(message.content)))
+        if index in finished else message
+        for index, message in enumerate(history)
+    ]
+
+
+def current_topic(history: List[BaseMessage]) -> Optional[str]:
+    """Summary of the topic being discussed, taken from the last <topic> block in the history."""
+    for message in reversed(history):
+        if isinstance(message, HumanMessage):
+            match = TOPIC_BLOCK_PATTERN.search(str(message.content))
+            if match:
+                return match.group(1)
+    return None
+
+
+def render_transcript(messages: List[BaseMessage], cohost_name: str = "Co-host") -> str:
+    """Plain transcript of history messages (from the host's point of view), without XML control blocks."""
+    lines = []
+    for message in messages:
+        text = XML_BLOCK_PATTERN.sub("", str(message.content)).strip()
+        if not text:
+            continue
+        speaker = "You" if isinstance(message, AIMessage) else cohost_name
+        lines.append(f"{speaker}: {text}")
+    return "\n\n".join(lines)
+
+
+def build_host_context(
+    system_prompt: str,
+    history: List[BaseMessage],
+    user_text: str,
+    *,
+    rolling_summary: str = "",
+    token_budget: int,
+    window_turns: int,
+    keep_from: Optional[int] = None,
+) -> Tuple[str, List[BaseMessage], int, int]:
+    """
+    Apply the context policy to a host's history for the next turn.
+
+    Returns (system_prompt, messages, window_start, estimated_tokens), history messages
+    before window_start are not sent verbatim.
+
+    - Only the last `window_turns` turns (human + AI message pairs) are sent verbatim, or
+      every message from `keep_from` on if given, fewer if they don't fit into
+      `token_budget` (at least the last turn is kept)
+    - <topic> blocks of finished topics are removed, the current topic stays pinned in the
+      system prompt once its message leaves the window
+    - Older turns are represented by `rolling_summary`, appended to the system prompt
+
+    The history itself is never modified.
+    """
+    history = strip_finished_topics(history, new_topic="<topic>" in user_text)
+    if keep_from is not None:
+        window_start = min(max(0, keep_from), len(history))
+    else:
+        window_start = max(0, len(history) - 2 * max(1, window_turns))
+    # Keep turns aligned, the window must start with a human message
+    window_start += window_start % 2
+
+    def system_for(start: int) -> str:
+        extra = []
+        if rolling_summary:
+            extra.append(render_xml_block("conversation_so_far", rolling_summary))
+        topic = current_topic(history)
+        if topic is not None and current_topic(history[start:]) is None:
+            extra.append(render_topic_block(topic))
+        return "\n\n".join([system_prompt, *extra])
+
+    fixed_tokens = estimate_tokens(user_text)
+    system = system_for(window_start)
+    total = fixed_tokens + estimate_tokens(system) + message_tokens(history[window_start:])
+    while total > token_budget and len(history) - window_start > 2:
+        window_start += 2
+        system = system_for(window_start)
+        total = fixed_tokens + estimate_tokens(system) + message_tokens(history[window_start:])
+
+    return system, list(history[window_start:]), window_start, total
@@ -1,12 +1,27 @@
 from __future__ import annotations
 
 import os
-from typing import List, Dict
+from typing import Callable, Dict, Iterator, List, Optional
 
 from langchain_openai import ChatOpenAI
-from langchain_core.messages import SystemMessage, HumanMessage, AIMessage, BaseMessage
+from langchain_core.messages import SystemMessage, HumanMessage, AIMessage, BaseMessage, BaseMessageChunk
 
+from app import metrics
 from app.config.settings import settings
+from app.disk_cache import DiskCache
+from app.graphs.sentences import SentenceStream
+from app.load_balancer import Endpoint, create_balancer, is_endpoint_failure
+from app.logger import setup_logger
+
+
+logger = setup_logger("llm_utils")
+
+# Topic summaries shared by all jobs, the most expensive LLM call of a job
+summary_cache = DiskCache(
+    "summary",
+    settings.LLM_SUMMARY_CACHE_DIR,
+    settings.LLM_SUMMARY_CACHE_MAX_BYTES,
+) if settings.LLM_SUMMARY_CACHE_ENABLED else None
 
 
 def build_host_system_prompt(host_name: str, cohost_name: str, personality: str) -> str:
@@ -17,34 +32,166 @@ def build_host_system_prompt(host_name: str, cohost_name: str, personality: str)
     return prompt
 
 
-def create_llm(*, temperature: float = 1.0, extra_body: Dict = None) -> ChatOpenAI:
+# Replicas of the LLM server shared by all models, see LLM_API_HOSTS
+llm_balancer = create_balancer("llm", settings.LLM_API_HOSTS, settings.LLM_HEALTH_PATH)
+
+
+class BalancedChatModel:
+    """
+    Chat model spreading its calls over the LLM replicas of llm_balancer.
+
+    Has the invoke/stream interface of ChatOpenAI. A call that fails on one replica is
+    retried once on another (streams only as long as nothing was received yet).
+    """
+
+    def __init__(self, models: Dict[str, ChatOpenAI], temperature: float, key: Optional[str] = None):
+        self._models = models
+        self.temperature = temperature
+        self.key = key
+
+    def routed(self, key: Optional[str]) -> "BalancedChatModel":
+        """Same model with its calls sent to the replica `key` sticks to (see LoadBalancer)."""
+        return BalancedChatModel(self._models, self.temperature, key)
+
+    def invoke(self, messages: List[BaseMessage]) -> BaseMessage:
+        tried: List[Endpoint] = []
+        while True:
+            try:
+                with llm_balancer.request(self.key, exclude=tried) as endpoint:
+                    tried.append(endpoint)
+                    return self._models[endpoint.url].invoke(messages)
+            except Exception as e:
+                if not self._should_retry(e, tried):
+                    raise
+                logger.warning(f"LLM call to {tried[-1].url} failed, retrying on another replica: {str(e)}")
+
+    def stream(self, messages: List[BaseMessage]) -> Iterator[BaseMessageChunk]:
+        tried: List[Endpoint] = []
+        while True:
+            received = False
+            try:
+                with llm_balancer.request(self.key, exclude=tried) as endpoint:
+                    tried.append(endpoint)
+                    for chunk in self._models[endpoint.url].stream(messages):
+                        received = True
+                        yield chunk
+                    return
+            except Exception as e:
+                if received or not self._should_retry(e, tried):
+                    raise
+                logger.warning(f"LLM stream from {tried[-1].url} failed, retrying on another replica: {str(e)}")
+
+    def _should_retry(self, error: Exception, tried: List[Endpoint]) -> bool:
+        return len(tried) < min(2, len(self._models)) and is_endpoint_failure(error)
+
+
+def create_llm(*, temperature: float = 1.0, extra_body: Dict = None) -> BalancedChatModel:
     # Many local OpenAI-compatible servers ignore the API key, but LangChain requires one.
     api_key = os.getenv("OPENAI_API_KEY", "not-needed")
-    base_url = f"{settings.LLM_API_HOST}/v1"
-    return ChatOpenAI(
-        model=settings.LLM_MODEL,
-        temperature=temperature,
-        api_key=api_key,
-        base_url=base_url,
-        timeout=float(settings.LLM_TIMEOUT),
-        max_retries=1,
-        extra_body = extra_body
-    )
-
-
-def invoke_llm(system_prompt: str, history: List[BaseMessage], user_text: str, llm: ChatOpenAI) -> str:
+    models = {
+        url: ChatOpenAI(
+            model=settings.LLM_MODEL,
+            temperature=temperature,
+            api_key=api_key,
+            base_url=f"{url}/v1",
+            timeout=float(settings.LLM_TIMEOUT),
+            # Failing over to another replica replaces the client retry when there is one
+            max_retries=1 if len(llm_balancer.endpoints) == 1 else 0,
+            extra_body = extra_body
+        )
+        for url in llm_balancer.urls
+    }
+    return BalancedChatModel(models, temperature)
+
+
+def _build_messages(system_prompt: str, history: List[BaseMessage], user_text: str) -> List[BaseMessage]:
     messages: List[BaseMessage] = [SystemMessage(content=system_prompt)]
     if history:
         messages.extend(history)
     messages.append(HumanMessage(content=user_text))
+    return messages
+
+
+def _log_usage(ai_msg, message_count: int) -> None:
+    usage = getattr(ai_msg, "usage_metadata", None)
+    if usage:
+        if usage.get("input_tokens") is not None:
+            metrics.LLM_PROMPT_TOKENS.observe(usage["input_tokens"])
+        if usage.get("output_tokens") is not None:
+            metrics.LLM_COMPLETION_TOKENS.observe(usage["output_tokens"])
+        logger.info(
+            f"LLM call used {usage.get('input_tokens')} prompt tokens, "
+            f"{usage.get('output_tokens')} completion tokens ({message_count} messages)"
+        )
+
+
+def invoke_llm(system_prompt: str, history: List[BaseMessage], user_text: str, llm: BalancedChatModel) -> str:
+    messages = _build_messages(system_prompt, history, user_text)
     ai_msg = llm.invoke(messages)
+    _log_usage(ai_msg, len(messages))
     return ai_msg.content.strip() if isinstance(ai_msg, AIMessage) else str(ai_msg)
 
 
-def summarize_topic(text: str, llm: ChatOpenAI) -> str:
+def stream_llm(
+    system_prompt: str,
+    history: List[BaseMessage],
+    user_text: str,
+    llm: BalancedChatModel,
+    on_sentence: Callable[[str], None],
+) -> str:
+    """
+    Stream a reply, handing out each sentence as soon as it is complete.
+
+    XML tagged content is stripped on the fly (see SentenceStream), `on_sentence` is called
+    with every cleaned sentence in order.
+
+    Returns:
+        The cleaned reply, identical to strip_xml_content of the invoke_llm reply
+    """
+    messages = _build_messages(system_prompt, history, user_text)
+    stream = SentenceStream(min_chars=settings.LLM_SENTENCE_MIN_CHARS)
+    full_msg = None
+    for chunk in llm.stream(messages):
+        full_msg = chunk if full_msg is None else full_msg + chunk
+        if isinstance(chunk.content, str):
+            for sentence in stream.feed(chunk.content):
+                on_sentence(sentence)
+    for sentence in stream.close():
+        on_sentence(sentence)
+    _log_usage(full_msg, len(messages))
+    return stream.text
+
+
+def summarize_topic(text: str, llm: BalancedChatModel, *, force: bool = False) -> str:
+    """
+    Summarize a topic, reusing a cached summary of the same text, prompt, model and temperature.
+
+    Args:
+        text: Full topic text
+        llm: Summarizer LLM
+        force: Regenerate the summary even if a cached one exists (the cache is refreshed)
+    """
     if not settings.LLM_SUMMARY_ENABLED:
         return text
     system_prompt = settings.LLM_SUMMARY_SYSTEM_PROMPT
-    return invoke_llm(system_prompt, [], text, llm)
 
-    
+    cache_key = None
+    if summary_cache is not None:
+        cache_key = DiskCache.make_key(text, system_prompt, settings.LLM_MODEL, getattr(llm, "temperature", None))
+        if not (force or settings.LLM_SUMMARY_FORCE_REGENERATE):
+            cached = summary_cache.get_text(cache_key, ".md")
+            if cached is not None:
+                logger.info(f"Summary cache hit ({len(cached)} characters)")
+                metrics.SUMMARY_SECONDS.labels(result="cache").observe(0)
+                return cached
+
+    with metrics.timed(metrics.SUMMARY_SECONDS, result="generated"):
+        summary = invoke_llm(system_prompt, [], text, llm)
+
+    if cache_key is not None and summary:
+        try:
+            summary_cache.put_text(cache_key, summary, ".md")
+        except OSError as e:
+            logger.warning(f"Failed to store topic summary in cache: {str(e)}")
+    return summary
+
@@ -1,14 +1,22 @@
 from __future__ import annotations
-import re
+from concurrent.futures import Future, ThreadPoolExecutor
 
-from typing import Literal, Optional, Tuple
+from typing import Callable, Dict, Literal, Optional, Tuple
 
 from langchain_core.messages import HumanMessage, AIMessage
+from langchain_core.runnables import RunnableConfig
 
+from app import metrics
 from app.config.settings import settings
+from app.graphs.context import build_host_context, render_transcript, strip_finished_topics
 from app.graphs.types import PodcastState, Speaker
-from app.graphs.xml_utils import compose_prompt_with_topic_instruction
-from app.graphs.llm_utils import create_llm, invoke_llm
+from app.graphs.xml_utils import (
+    compose_prefix_stable_prompt,
+    compose_prompt_with_topic_instruction,
+    render_xml_block,
+)
+from app.graphs.llm_utils import create_llm, invoke_llm, stream_llm, summarize_topic
+from app.graphs.sentences import strip_xml_content
 from app.progress import increment_progress
 
 from app.logger import setup_logger
@@ -23,6 +31,16 @@ _chat_llm = create_llm(
         "presence_penalty": 2.0
     })
 
+# Summaries requested ahead of the graph, while later sources are still being extracted
+_summary_executor = ThreadPoolExecutor(
+    max_workers=max(1, settings.LLM_SUMMARY_WORKERS), thread_name_prefix="topic-summary"
+)
+
+
+def submit_topic_summary(text: str, force: bool = False) -> Future:
+    """Start summarizing a topic in the background, prepare_topic picks the result up."""
+    return _summary_executor.submit(summarize_topic, text, _summarizer_llm, force=force)
+
 # --- Internal helpers ---------------------------------------------------------
 
 # Managing the instructions throughout the podcast lifecycle
@@ -35,7 +53,7 @@ def _get_current_instruction(state: PodcastState) -> str:
     is_first_exchange = exchange_index == 0
     is_second_exchange = exchange_index == 1
     is_first_topic = topic_index == 0
-    is_last_topic = topic_index == len(state["topics"]) -1
+    is_last_topic = topic_index == state["topic_count"] -1
     
     # First chat exchange, add the topic and intro
     if is_first_exchange:
@@ -45,6 +63,12 @@ def _get_current_instruction(state: PodcastState) -> str:
                 "Then introduce yourself.\n"
                 "Then stop and offer the co-host to introduce themselves."
             )
+        elif state.get("parallel_topics"):
+            # The transition from the previous topic is written separately (see transition_exchange)
+            return (
+                "Introduce the new podcast topic to your co-host.\n"
+                "The previous topic was already wrapped up, do not refer back to it."
+            )
         else:
             return (
                 "Smoothly transition to the new podcast topic from "
@@ -89,40 +113,123 @@ def _get_current_instruction(state: PodcastState) -> str:
 
 
 def _select_route_for_speaker(state: PodcastState) -> Tuple[Speaker, str, list, str]:
-    """Return (current_speaker, system_prompt, history, history_key)."""
+    """Return (current_speaker, system_prompt, history, history_key), the history must not be modified."""
     current_speaker: Speaker = state.get("current_speaker", "HOST_A")
     if current_speaker == "HOST_A":
-        return current_speaker, state["host_a_system_prompt"], list(state.get("host_a_history", [])), "host_a_history"
-    return current_speaker, state["host_b_system_prompt"], list(state.get("host_b_history", [])), "host_b_history"
+        return current_speaker, state["host_a_system_prompt"], state.get("host_a_history", []), "host_a_history"
+    return current_speaker, state["host_b_system_prompt"], state.get("host_b_history", []), "host_b_history"
+
+
+# State keys of the rolling summary and the number of history messages it covers, per history
+_CONTEXT_SUMMARY_KEYS = {
+    "host_a_history": ("host_a_context_summary", "host_a_context_summarized"),
+    "host_b_history": ("host_b_context_summary", "host_b_context_summarized"),
+}
+
+
+def _bounded_context(
+    state: PodcastState,
+    history_key: str,
+    system_prompt: str,
+    history: list,
+    user_text: str,
+) -> Tuple[str, list, PodcastState]:
+    """
+    Apply the context policy (see build_host_context) to a host's history.
+
+    Turns sliding out of the window are compacted into the host's rolling summary, at most
+    every LLM_CONTEXT_SUMMARY_STEP_TURNS turns; until then they are still sent verbatim
+    as long as they fit into the token budget.
+
+    Returns (system_prompt, messages, state updates).
+    """
+    summary_key, summarized_key = _CONTEXT_SUMMARY_KEYS[history_key]
+    rolling_summary = state.get(summary_key, "")
+    summarized = state.get(summarized_key, 0)
+    budget = settings.LLM_CONTEXT_TOKEN_BUDGET
+    window_turns = settings.LLM_CONTEXT_WINDOW_TURNS
+
+    updates: PodcastState = {}
+    _, _, window_start, _ = build_host_context(
+        system_prompt, history, user_text,
+        rolling_summary=rolling_summary, token_budget=budget, window_turns=window_turns,
+    )
+    if window_start - summarized >= 2 * max(1, settings.LLM_CONTEXT_SUMMARY_STEP_TURNS):
+        transcript = render_transcript(strip_finished_topics(history)[summarized:window_start])
+        summary_request = render_xml_block("new_turns", transcript)
+        if rolling_summary:
+            summary_request = f"{render_xml_block('conversation_so_far', rolling_summary)}\n\n{summary_request}"
+        rolling_summary = invoke_llm(
+            settings.LLM_CONTEXT_SUMMARY_SYSTEM_PROMPT, [], summary_request, _summarizer_llm
+        )
+        summarized = window_start
+        updates = {summary_key: rolling_summary, summarized_key: summarized}
+        logger.info(f"Compacted {summarized} history messages of {history_key} into a rolling summary")
+
+    system_prompt, messages, window_start, estimated_tokens = build_host_context(
+        system_prompt, history, user_text,
+        rolling_summary=rolling_summary, token_budget=budget, window_turns=window_turns,
+        keep_from=summarized,
+    )
+    logger.info(
+        f"Context for {history_key}: {len(messages)}/{len(history)} history messages, "
+        f"~{estimated_tokens} estimated prompt tokens"
+    )
+    return system_prompt, messages, updates
 
 
 def _apply_llm_turn(
     state: PodcastState,
     user_text: str,
+    control_text: str = "",
+    sentence_sink: Optional[Callable[[int, str, str], None]] = None,
 ) -> PodcastState:
     """
     Shared logic for a single turn:
     - Route to correct system prompt/history by current speaker
-    - Invoke LLM
+    - Bound the context sent to the LLM (LLM_CONTEXT_MANAGEMENT_ENABLED)
+    - Invoke LLM, with `control_text` appended to the request but not kept in history.
+      With a `sentence_sink` the reply is streamed and every finished sentence is handed
+      to sentence_sink(line_index, speaker, sentence) right away
     - Update history and dialogue
     - Flip speaker and set last_content
     """
     current_speaker, system_prompt, history, history_key = _select_route_for_speaker(state)
 
-    content = invoke_llm(system_prompt, history, user_text, _chat_llm)
-    logger.debug(f"Speaker: {'HOST_B' if current_speaker == 'HOST_A' else 'HOST_A'} text: {content}")
-
-    # Remove any XML tagged content
-    content = re.sub(r'<.*?>.*?</.*?>', '', content, flags=re.DOTALL).strip()
-
-    # Update history and dialogue
-    history.append(HumanMessage(content=user_text))
-    history.append(AIMessage(content=content))
+    context_updates: PodcastState = {}
+    if settings.LLM_CONTEXT_MANAGEMENT_ENABLED:
+        system_prompt, context, context_updates = _bounded_context(
+            state, history_key, system_prompt, history, user_text
+        )
+    else:
+        context = history
+
+    request_text = f"{user_text}\n\n{control_text}".strip() if control_text else user_text
+    # Keeping a job on one replica reuses its prompt cache for the shared prefix
+    llm = _chat_llm.routed(state.get("job_id")) if settings.LLM_STICKY_ROUTING == "job" else _chat_llm
+    if sentence_sink is not None:
+        line_index = len(state.get("dialogue", []))
+        # XML tagged content is removed while streaming
+        with metrics.timed(metrics.LLM_TURN_SECONDS):
+            content = stream_llm(
+                system_prompt, context, request_text, llm,
+                lambda sentence: sentence_sink(line_index, current_speaker, sentence),
+            )
+        logger.debug(f"Speaker: {current_speaker} text: {content}")
+    else:
+        with metrics.timed(metrics.LLM_TURN_SECONDS):
+            content = invoke_llm(system_prompt, context, request_text, llm)
+        logger.debug(f"Speaker: {'HOST_B' if current_speaker == 'HOST_A' else 'HOST_A'} text: {content}")
 
-    updated: PodcastState = {history_key: history}
+        # Remove any XML tagged content
+        content = strip_xml_content(content)
 
-    dialogue = list(state.get("dialogue", []))
-    dialogue.append({"speaker": current_speaker, "text": content})
+    # Append to history and dialogue (the state reducers concatenate)
+    updated: PodcastState = {
+        history_key: [HumanMessage(content=user_text), AIMessage(content=content)],
+        **context_updates,
+    }
+    dialogue = [{"speaker": current_speaker, "text": content}]
 
     # Advance indices and flip speaker
     next_speaker: Speaker = "HOST_B" if current_speaker == "HOST_A" else "HOST_A"
@@ -144,15 +251,27 @@ def _apply_llm_turn(
 
 # --- Nodes ---------------------------------------------------------------------------------------
 
-def prepare_topic(state: PodcastState) -> PodcastState:
-    from app.graphs.llm_utils import summarize_topic
-    topics = state["topics"]
+def prepare_topic(state: PodcastState, config: RunnableConfig) -> PodcastState:
+    configurable = config.get("configurable") or {}
     i = state.get("topic_index", 0)
-    topic_summary = summarize_topic(topics[i], _summarizer_llm)
+
+    # Summaries started while the sources were extracted (see submit_topic_summary)
+    topic_summary: Optional[str] = None
+    precomputed = configurable.get("topic_summaries") or []
+    if i < len(precomputed) and precomputed[i] is not None:
+        try:
+            topic_summary = precomputed[i].result()
+        except Exception as e:
+            logger.warning(f"Precomputed summary of topic {i + 1} failed, summarizing again: {str(e)}")
+
+    if topic_summary is None:
+        topic_summary = summarize_topic(
+            configurable["topics"][i], _summarizer_llm, force=state.get("regenerate_summaries", False)
+        )
     new_state: PodcastState = {"topic_summary": topic_summary, "exchange_index": 0}
     return new_state
 
-def chat_exchange(state: PodcastState) -> PodcastState:
+def chat_exchange(state: PodcastState, config: RunnableConfig) -> PodcastState:
     topic_index = state["topic_index"]
     exchange_index = state.get("exchange_index", 0)
     num_exchanges = state["exchanges_per_topic"][topic_index]
@@ -169,16 +288,27 @@ def chat_exchange(state: PodcastState) -> PodcastState:
     if exchange_index == 0:
         topic = state['topic_summary']
         
-    chat_content = compose_prompt_with_topic_instruction(
-        content_seed, 
-        topic, 
-        instruction,
-        exchange_countdown)
+    if settings.LLM_PREFIX_STABLE_PROMPTS:
+        # Instruction and countdown go at the tail and are left out of history
+        chat_content, control_text = compose_prefix_stable_prompt(
+            content_seed,
+            topic,
+            instruction,
+            exchange_countdown)
+    else:
+        chat_content = compose_prompt_with_topic_instruction(
+            content_seed, 
+            topic, 
+            instruction,
+            exchange_countdown)
+        control_text = ""
 
     # Exchanges should count towards progress, and advance the exchange index by 1
     return _apply_llm_turn(
         state,
         chat_content,
+        control_text,
+        (config.get("configurable") or {}).get("sentence_sink"),
     )
 
 
@@ -197,6 +327,38 @@ def finish_topic(state: PodcastState) -> PodcastState:
 
 
 def has_more_topics(state: PodcastState) -> Literal["prepare_topic", "end"]:
-    if state["topic_index"] < len(state["topics"]):
+    if state["topic_index"] < state.get("topic_end", state["topic_count"]):
         return "prepare_topic"
     return "end"
+
+
+def transition_exchange(previous: PodcastState, following: PodcastState) -> Dict[str, str]:
+    """
+    Write the line leading from one topic to the next when topics were generated separately
+    (LLM_PARALLEL_TOPICS).
+
+    The host whose turn it is after the previous topic replies to its last line and hands
+    over to the co-host, who opens the next topic with the first line of `following`.
+
+    Args:
+        previous: Final state of the previous topic's run
+        following: Final state of the next topic's run
+
+    Returns:
+        The transition dialogue line
+    """
+    opening = following["dialogue"][0]["text"] if following.get("dialogue") else ""
+    instruction = (
+        "Smoothly transition to the next podcast topic.\n"
+        "Do not abruptly stop the current discussion, finish it gracefully "
+        "and hand over to your co-host, who opens the next topic with:\n"
+        f"{render_xml_block('next_topic_opening', opening)}\n"
+        "Do not answer that opening yet.\n"
+        "Keep it short (less than 60 words) and conversational."
+    )
+    if settings.LLM_PREFIX_STABLE_PROMPTS:
+        chat_content, control_text = compose_prefix_stable_prompt(previous.get("last_content", ""), None, instruction)
+    else:
+        chat_content = compose_prompt_with_topic_instruction(previous.get("last_content", ""), None, instruction)
+        control_text = ""
+    return _apply_llm_turn(previous, chat_content, control_text)["dialogue"][0]
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
 import random
-from typing import List
+from typing import List, Optional
 
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.graph import StateGraph, END
 
 from app.config.settings import settings
@@ -51,21 +52,20 @@ def build_podcast_graph() -> StateGraph:
     return graph
 
 
-def compile_podcast_graph(topics: List[str], job_id: str) -> tuple:
-    """
-    Prepare the compiled graph and its initial state for execution.
-    Returns (compiled_graph, initial_state)
-    """
-    # Determine number of exchanges per topic and total
-    exchanges_per_topic: List[int] = []
-    total_exchanges = 0
-    for _ in range(len(topics)):
-        n = random.randint(settings.TOPIC_EXCHANGE_MIN, settings.TOPIC_EXCHANGE_MAX)
-        exchanges_per_topic.append(n)
-        total_exchanges += n
+def _draw_exchanges_per_topic(topic_count: int) -> List[int]:
+    return [
+        random.randint(settings.TOPIC_EXCHANGE_MIN, settings.TOPIC_EXCHANGE_MAX)
+        for _ in range(topic_count)
+    ]
 
-    progress_increment = 40.0 / total_exchanges if total_exchanges > 0 else 0.0
 
+def _initial_state(
+    topics: List[str],
+    job_id: str,
+    regenerate_summaries: bool,
+    exchanges_per_topic: List[int],
+    progress_increment: float,
+) -> PodcastState:
     host_a_system_prompt = build_host_system_prompt(
         settings.HOST_A_NAME, settings.HOST_B_NAME, settings.HOST_A_PERSONALITY
     )
@@ -73,8 +73,8 @@ def compile_podcast_graph(topics: List[str], job_id: str) -> tuple:
         settings.HOST_B_NAME, settings.HOST_A_NAME, settings.HOST_B_PERSONALITY
     )
 
-    initial_state: PodcastState = {
-        "topics": topics,
+    return {
+        "topic_count": len(topics),
         "topic_index": 0,
         "exchanges_per_topic": exchanges_per_topic,
         "exchange_index": 0,
@@ -82,6 +82,7 @@ def compile_podcast_graph(topics: List[str], job_id: str) -> tuple:
         "host_a_history": [],
         "host_b_history": [],
         "topic_summary": "",
+        "regenerate_summaries": regenerate_summaries,
         "dialogue": [],
         "host_a_system_prompt": host_a_system_prompt,
         "host_b_system_prompt": host_b_system_prompt,
@@ -90,7 +91,94 @@ def compile_podcast_graph(topics: List[str], job_id: str) -> tuple:
         "progress_increment": progress_increment,
     }
 
-    compiled = build_podcast_graph().compile()
+
+def compile_podcast_graph(
+    topics: List[str],
+    job_id: str,
+    regenerate_summaries: bool = False,
+    checkpointer: Optional[BaseCheckpointSaver] = None,
+) -> tuple:
+    """
+    Prepare the compiled graph and its initial state for execution.
+    The topic texts aren't part of the state, every run gets them as configurable["topics"].
+    With a checkpointer the state is saved after every node, under the job ID as thread ID.
+    Returns (compiled_graph, initial_state)
+    """
+    # Determine number of exchanges per topic and total
+    exchanges_per_topic = _draw_exchanges_per_topic(len(topics))
+    total_exchanges = sum(exchanges_per_topic)
+
+    progress_increment = 40.0 / total_exchanges if total_exchanges > 0 else 0.0
+
+    initial_state = _initial_state(topics, job_id, regenerate_summaries, exchanges_per_topic, progress_increment)
+
+    compiled = build_podcast_graph().compile(checkpointer=checkpointer)
     return compiled, initial_state
 
 
+def topic_thread_id(job_id: str, topic_index: int) -> str:
+    """Checkpoint thread of one topic's run in compile_topic_graphs."""
+    return f"{job_id}:topic-{topic_index}"
+
+
+def compile_topic_graphs(
+    topics: List[str],
+    job_id: str,
+    regenerate_summaries: bool = False,
+    checkpointer: Optional[BaseCheckpointSaver] = None,
+    exchanges_per_topic: Optional[List[int]] = None,
+) -> tuple:
+    """
+    Prepare one run of the graph per topic, so the topics can be generated concurrently.
+
+    Every run discusses a single topic starting from empty chat histories, and is checkpointed
+    under its own thread ID (topic_thread_id). Its first speaker is the one the sequential
+    podcast would have reached, counting one transition line between adjacent topics
+    (see transition_exchange), so the merged dialogue keeps alternating between the hosts.
+    `exchanges_per_topic` is drawn like in compile_podcast_graph unless given (e.g. from
+    the checkpoint of a resumed run).
+    Returns (compiled_graph, initial_states in topic order)
+    """
+    if exchanges_per_topic is None:
+        exchanges_per_topic = _draw_exchanges_per_topic(len(topics))
+    total_lines = sum(exchanges_per_topic) + max(0, len(topics) - 1)
+
+    progress_increment = 40.0 / total_lines if total_lines > 0 else 0.0
+
+    base_state = _initial_state(topics, job_id, regenerate_summaries, exchanges_per_topic, progress_increment)
+    initial_states: List[PodcastState] = []
+    for index in range(len(topics)):
+        lines_before = sum(exchanges_per_topic[:index]) + index
+        initial_states.append({
+            **base_state,
+            "topic_index": index,
+            "topic_end": index + 1,
+            "parallel_topics": True,
+            "current_speaker": "HOST_A" if lines_before % 2 == 0 else "HOST_B",
+        })
+
+    compiled = build_podcast_graph().compile(checkpointer=checkpointer)
+    return compiled, initial_states
+
+
+def checkpointed_state(thread_id: str, checkpointer: Optional[BaseCheckpointSaver]) -> Optional[PodcastState]:
+    """Last checkpointed state of a graph thread (a job, or a topic of it), None if it has none."""
+    if checkpointer is None:
+        return None
+    compiled = build_podcast_graph().compile(checkpointer=checkpointer)
+    snapshot = compiled.get_state({"configurable": {"thread_id": thread_id}})
+    return snapshot.values or None
+
+
+def checkpointed_topic_states(
+    job_id: str, topic_count: int, checkpointer: Optional[BaseCheckpointSaver]
+) -> List[Optional[PodcastState]]:
+    """
+    Last checkpointed states of a job's topic runs (see compile_topic_graphs), in topic order.
+
+    Every topic is looked up on its own, topics that weren't started yet are None.
+    """
+    return [
+        checkpointed_state(topic_thread_id(job_id, index), checkpointer)
+        for index in range(topic_count)
+    ]
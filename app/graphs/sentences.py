@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import re
+from typing import List
+
+
+# XML tagged content is removed from host replies (e.g. stray <topic> or <thinking> blocks)
+XML_TAGGED_CONTENT = re.compile(r'<.*?>.*?</.*?>', re.DOTALL)
+
+# End of a sentence: terminal punctuation, optional closing quotes/brackets, then whitespace
+SENTENCE_END = re.compile(r'[.!?…]+["\'”’)\]]*\s+')
+
+
+def strip_xml_content(text: str) -> str:
+    return XML_TAGGED_CONTENT.sub('', text).strip()
+
+
+class SentenceStream:
+    """
+    Incrementally clean a streamed host reply and cut it into sentences.
+
+    XML tagged content is removed as in strip_xml_content: text from a '<' on is held
+    back until the block closes (or the stream ends), so the cleaned text always equals
+    strip_xml_content of the full reply. Sentences shorter than `min_chars` are merged
+    with the next one, to avoid tiny TTS requests.
+    """
+
+    def __init__(self, min_chars: int = 0):
+        self.min_chars = min_chars
+        self._raw = ""
+        self._cleaned: List[str] = []
+        self._unsplit = ""
+        self._sentence = ""
+
+    @property
+    def text(self) -> str:
+        """Cleaned text received so far."""
+        return "".join(self._cleaned).strip()
+
+    def feed(self, chunk: str) -> List[str]:
+        """Add streamed text, returns the sentences completed by it."""
+        self._raw += chunk
+        return self._split(self._clean(final=False), final=False)
+
+    def close(self) -> List[str]:
+        """End of the stream, returns the remaining sentences."""
+        return self._split(self._clean(final=True), final=True)
+
+    def _clean(self, final: bool) -> str:
+        cleaned = []
+        while self._raw:
+            start = self._raw.find("<")
+            if start < 0:
+                cleaned.append(self._raw)
+                self._raw = ""
+                break
+            cleaned.append(self._raw[:start])
+            self._raw = self._raw[start:]
+            match = XML_TAGGED_CONTENT.match(self._raw)
+            if match:
+                self._raw = self._raw[match.end():]
+            elif final:
+                # No block starts here, the '<' is plain text
+                cleaned.append("<")
+                self._raw = self._raw[1:]
+            else:
+                # The block may still close, wait for more text
+                break
+        text = "".join(cleaned)
+        self._cleaned.append(text)
+        return text
+
+    def _split(self, text: str, final: bool) -> List[str]:
+        self._unsplit += text
+        sentences = []
+        while True:
+            match = SENTENCE_END.search(self._unsplit)
+            if not match:
+                break
+            self._sentence += self._unsplit[:match.end()]
+            self._unsplit = self._unsplit[match.end():]
+            if len(self._sentence.strip()) >= self.min_chars:
+                sentences.append(self._sentence.strip())
+                self._sentence = ""
+        if final:
+            self._sentence += self._unsplit
+            self._unsplit = ""
+            if self._sentence.strip():
+                sentences.append(self._sentence.strip())
+            self._sentence = ""
+        return sentences
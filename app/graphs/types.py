@@ -1,28 +1,46 @@
 from __future__ import annotations
 
-from typing import Dict, List, Literal, TypedDict
+import operator
+from typing import Annotated, Dict, List, Literal, TypedDict
 from langchain_core.messages import BaseMessage
 
 
 Speaker = Literal["HOST_A", "HOST_B"]
 
 
+# The append-only lists below are reduced with operator.add, which copies them on every step.
+# Don't extend them in place: LangGraph applies a node's writes a second time to channel copies
+# sharing the lists (to evaluate conditional edges), so every line would be added twice.
 class PodcastState(TypedDict, total=False):
-    topics: List[str]
+    # Topic texts are passed to every run as configurable["topics"], so they're not checkpointed
+    topic_count: int
     topic_index: int
+    # Topics from topic_index up to (excluding) topic_end are discussed, defaults to all of them
+    topic_end: int
+    # Topics are generated separately and joined by transition_exchange (LLM_PARALLEL_TOPICS)
+    parallel_topics: bool
     exchanges_per_topic: List[int]
     exchange_index: int
     current_speaker: Speaker
 
-    # Chat histories for each host (as LC messages)
-    host_a_history: List[BaseMessage]
-    host_b_history: List[BaseMessage]
+    # Chat histories for each host (as LC messages), append-only: nodes return only new messages
+    host_a_history: Annotated[List[BaseMessage], operator.add]
+    host_b_history: Annotated[List[BaseMessage], operator.add]
+
+    # Rolling summaries of older turns and how many history messages they cover
+    # (only used with LLM_CONTEXT_MANAGEMENT_ENABLED)
+    host_a_context_summary: str
+    host_a_context_summarized: int
+    host_b_context_summary: str
+    host_b_context_summarized: int
 
     # Per-topic context
     topic_summary: str
+    # Ignore cached topic summaries
+    regenerate_summaries: bool
 
-    # Output dialogue
-    dialogue: List[Dict[str, str]]
+    # Output dialogue, append-only: nodes return only new lines
+    dialogue: Annotated[List[Dict[str, str]], operator.add]
 
     # System prompts
     host_a_system_prompt: str
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Optional
+from typing import Optional, Tuple
 
 
 def render_xml_block(tag: str, content: str) -> str:
@@ -32,3 +32,30 @@ def compose_prompt_with_topic_instruction(
     return result
 
 
+def compose_prefix_stable_prompt(
+    base_text: str,
+    topic: Optional[str] = None,
+    instruction: Optional[str] = None,
+    exchange_countdown: Optional[int] = None,
+) -> Tuple[str, str]:
+    """
+    Split a turn into the text kept in history and the per-turn control text.
+
+    The history text (topic block, then the co-host's words) never changes once sent, so
+    the conversation forms an append-only prefix that server-side prefix caching can reuse.
+    The control text (instruction and countdown) changes every turn and only goes at the
+    tail of the current request.
+
+    Returns (history_text, control_text).
+    """
+    history_text = base_text.strip()
+    if topic:
+        history_text = f"{render_topic_block(topic)}\n\n{history_text}".strip()
+
+    control_blocks = []
+    if instruction:
+        control_blocks.append(render_instruction_block(instruction))
+    if exchange_countdown is not None:
+        control_blocks.append(render_instruction_block(f'This Topic Countdown: {exchange_countdown}'))
+    return history_text, "\n\n".join(control_blocks)
+
@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import copy
+import json
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from app.logger import setup_logger
+
+
+logger = setup_logger('job_store')
+
+
+# Job fields with their own column in the SQLite store, anything else goes into `data`
+_COLUMNS = ("status", "progress", "created_at", "updated_at", "result_file", "error")
+FINISHED_STATUSES = ("completed", "failed")
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class JobStore(ABC):
+    """
+    Storage backend for job state.
+
+    Jobs are plain dicts (status, progress, created_at, updated_at, result_file, ...).
+    Every method must be safe to call from any thread.
+    """
+
+    @abstractmethod
+    def create(self, job_id: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+        """Store a new job (replacing one with the same ID), returns the stored job."""
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """A copy of the job, None if it doesn't exist."""
+
+    @abstractmethod
+    def update(self, job_id: str, fields: Dict[str, Any]) -> None:
+        """Set fields of a job, does nothing if it doesn't exist."""
+
+    @abstractmethod
+    def delete(self, job_id: str) -> None:
+        """Remove a job, does nothing if it doesn't exist."""
+
+    @abstractmethod
+    def increment_progress(self, job_id: str, increment: float) -> Optional[float]:
+        """Atomically add to a job's progress, returns the new progress (None if the job doesn't exist)."""
+
+    @abstractmethod
+    def list_by_status(self, status: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Jobs with the given status, oldest first."""
+
+    @abstractmethod
+    def cleanup(self, older_than: timedelta) -> int:
+        """Delete finished jobs created more than `older_than` ago, returns the number deleted."""
+
+
+class InMemoryJobStore(JobStore):
+    """Process-local store, state is lost on restart and not shared between workers."""
+
+    def __init__(self):
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def create(self, job_id: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            self._jobs[job_id] = dict(fields, job_id=job_id)
+            return copy.deepcopy(self._jobs[job_id])
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return copy.deepcopy(job) if job is not None else None
+
+    def update(self, job_id: str, fields: Dict[str, Any]) -> None:
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+
+    def delete(self, job_id: str) -> None:
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def increment_progress(self, job_id: str, increment: float) -> Optional[float]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            job["progress"] = job.get("progress", 0) + float(increment)
+            job["updated_at"] = _now()
+            return job["progress"]
+
+    def list_by_status(self, status: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            matching = sorted(
+                (copy.deepcopy(job) for job in self._jobs.values() if job.get("status") == status),
+                key=lambda job: job.get("created_at", ""),
+            )
+        return matching[:limit] if limit is not None else matching
+
+    def cleanup(self, older_than: timedelta) -> int:
+        cutoff = (datetime.now(timezone.utc) - older_than).isoformat()
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job.get("status") in FINISHED_STATUSES and job.get("created_at", "") < cutoff
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+        return len(expired)
+
+
+class SQLiteJobStore(JobStore):
+    """
+    SQLite (WAL mode) store, shared by every process on the host and durable across restarts.
+
+    Each thread gets its own connection. Progress increments are a single UPDATE,
+    so concurrent workers never lose each other's updates.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    progress REAL NOT NULL DEFAULT 0,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL,
+                    result_file TEXT,
+                    error TEXT,
+                    data TEXT NOT NULL DEFAULT '{}'
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_created_at ON jobs (created_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _split(fields: Dict[str, Any]):
+        columns = {key: value for key, value in fields.items() if key in _COLUMNS}
+        extra = {key: value for key, value in fields.items() if key not in _COLUMNS and key != "job_id"}
+        return columns, extra
+
+    @staticmethod
+    def _to_job(row: sqlite3.Row) -> Dict[str, Any]:
+        job = json.loads(row["data"])
+        job.update({key: row[key] for key in _COLUMNS})
+        job["job_id"] = row["job_id"]
+        return job
+
+    def create(self, job_id: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+        columns, extra = self._split(fields)
+        columns.setdefault("progress", 0)
+        columns.setdefault("created_at", _now())
+        columns.setdefault("updated_at", columns["created_at"])
+        names = ["job_id", *columns, "data"]
+        values = [job_id, *columns.values(), json.dumps(extra)]
+        with self._connect() as conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO jobs ({', '.join(names)}) VALUES ({', '.join('?' for _ in names)})",
+                values,
+            )
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connect().execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._to_job(row) if row is not None else None
+
+    def update(self, job_id: str, fields: Dict[str, Any]) -> None:
+        columns, extra = self._split(fields)
+        conn = self._connect()
+        with conn:
+            if extra:
+                # Merge extra fields inside one write transaction
+                conn.execute("BEGIN IMMEDIATE")
+                row = conn.execute("SELECT data FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+                if row is None:
+                    return
+                data = json.loads(row["data"])
+                data.update(extra)
+                columns["data"] = json.dumps(data)
+            if columns:
+                assignments = ", ".join(f"{name} = ?" for name in columns)
+                conn.execute(
+                    f"UPDATE jobs SET {assignments} WHERE job_id = ?",
+                    [*columns.values(), job_id],
+                )
+
+    def delete(self, job_id: str) -> None:
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+
+    def increment_progress(self, job_id: str, increment: float) -> Optional[float]:
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET progress = progress + ?, updated_at = ? WHERE job_id = ?",
+                (float(increment), _now(), job_id),
+            )
+            if cursor.rowcount == 0:
+                return None
+            row = conn.execute("SELECT progress FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return row["progress"]
+
+    def list_by_status(self, status: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        query = "SELECT * FROM jobs WHERE status = ? ORDER BY created_at"
+        params: List[Any] = [status]
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        return [self._to_job(row) for row in self._connect().execute(query, params)]
+
+    def cleanup(self, older_than: timedelta) -> int:
+        cutoff = (datetime.now(timezone.utc) - older_than).isoformat()
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute(
+                f"DELETE FROM jobs WHERE created_at < ? AND status IN ({', '.join('?' for _ in FINISHED_STATUSES)})",
+                (cutoff, *FINISHED_STATUSES),
+            )
+        return cursor.rowcount
+
+
+def create_job_store(backend: str, path: str) -> JobStore:
+    """Build the configured job store ("memory" or "sqlite")."""
+    if backend == "sqlite":
+        logger.info(f"Using SQLite job store at {path}")
+        return SQLiteJobStore(path)
+    if backend != "memory":
+        logger.warning(f"Unknown job store backend '{backend}', using in-memory store")
+    return InMemoryJobStore()
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import shutil
+import struct
+import tempfile
+import threading
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from pydub import AudioSegment
+
+from app.audio_stitcher import AudioStitcher
+from app.logger import setup_logger
+
+
+logger = setup_logger('live')
+
+# Streamed WAV header sizes, the real length is unknown while the podcast is produced
+_STREAMING_DATA_SIZE = 0xFFFFFFFF - 36
+
+# Seconds a listener waits for new audio before checking again whether it's still connected
+_DISCONNECT_CHECK_INTERVAL = 1.0
+
+
+def wav_stream_header(channels: int, sample_width: int, frame_rate: int) -> bytes:
+    """RIFF/WAVE header for PCM data of unknown length."""
+    byte_rate = frame_rate * channels * sample_width
+    return b"".join([
+        b"RIFF", struct.pack("<I", _STREAMING_DATA_SIZE + 36), b"WAVE",
+        b"fmt ", struct.pack("<IHHIIHH", 16, 1, channels, frame_rate, byte_rate, channels * sample_width, sample_width * 8),
+        b"data", struct.pack("<I", _STREAMING_DATA_SIZE),
+    ])
+
+
+class LiveStream:
+    """
+    Audio of a job that is still being produced, for listen-while-generating playback.
+
+    Segments are published as soon as TTS finishes them (in any order) and are appended
+    in dialogue order, normalized against the first segment just like the final podcast.
+    The normalized PCM is kept in a private directory, which is removed once the job
+    finished and the last listener was released. Listeners are registered with
+    add_listener() when their response is created, so the audio can't be removed between
+    handing out the stream and the start of its playback.
+
+    Listeners are async and wait on the event loop, they're woken up (like the watchers
+    of JobEventHub) whenever a segment was appended or the stream finished.
+    """
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.directory = tempfile.mkdtemp(prefix=f"live-{job_id}-")
+        self.params: Optional[Tuple[int, int, int]] = None  # channels, sample width, frame rate
+        self.finished = False
+        self._chunks: List[str] = []
+        self._pending: Dict[int, Optional[str]] = {}
+        self._next_index = 0
+        self._listeners = 0
+        self._waiters: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+        self._lock = threading.Lock()
+        self._publish_lock = threading.Lock()
+        self._stitcher = AudioStitcher()
+        self._reference: Optional[AudioSegment] = None
+
+    def publish(self, index: int, filepath: Optional[str]) -> None:
+        """Add the audio segment of dialogue line `index` (None for a line without audio)."""
+        with self._publish_lock:
+            self._pending[index] = filepath
+            while self._next_index in self._pending:
+                ready = self._pending.pop(self._next_index)
+                self._next_index += 1
+                if ready is not None:
+                    self._append(ready)
+
+    def _append(self, filepath: str) -> None:
+        try:
+            segment = AudioSegment.from_file(filepath, format="wav")
+            if self._reference is None:
+                self._reference = segment
+            segment = self._stitcher.normalize_audio(segment, self._reference)
+            chunk_path = os.path.join(self.directory, f"chunk_{len(self._chunks):04d}.pcm")
+            with open(chunk_path, "wb") as f:
+                f.write(segment.raw_data)
+        except Exception as e:
+            logger.warning(f"Failed to add segment {filepath} to live stream of job {self.job_id}: {str(e)}")
+            return
+        with self._lock:
+            if self.params is None:
+                self.params = (segment.channels, segment.sample_width, segment.frame_rate)
+            self._chunks.append(chunk_path)
+            self._notify()
+
+    def finish(self) -> None:
+        """No more segments will be published."""
+        with self._lock:
+            self.finished = True
+            self._notify()
+        self._maybe_cleanup()
+
+    def _notify(self) -> None:
+        # Called with the lock held
+        for loop, event in self._waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # Loop already closed, the listener is going away
+                pass
+
+    def add_listener(self) -> Callable[[], None]:
+        """
+        Register a listener, the audio is kept (even after the job finished) until it is released.
+
+        Returns:
+            Function releasing the listener, calling it more than once has no effect
+        """
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            with self._lock:
+                if released:
+                    return
+                released = True
+                self._listeners -= 1
+            self._maybe_cleanup()
+
+        with self._lock:
+            self._listeners += 1
+        return release
+
+    async def iter_wav(
+        self,
+        is_disconnected: Callable[[], Awaitable[bool]],
+        release: Callable[[], None],
+        chunk_size: int = 64 * 1024,
+    ) -> AsyncIterator[bytes]:
+        """
+        Yield a streamed WAV of everything published so far, following new segments until the job finishes.
+
+        Args:
+            is_disconnected: Whether the listener went away (e.g. Request.is_disconnected),
+                checked at least every second while waiting for new audio
+            release: Release of the listener from add_listener(), called once the stream ends
+            chunk_size: Maximum size of the yielded pieces of audio
+        """
+        changed = asyncio.Event()
+        waiter = (asyncio.get_running_loop(), changed)
+        with self._lock:
+            self._waiters.add(waiter)
+        try:
+            position = 0
+            header_sent = False
+            while not await is_disconnected():
+                changed.clear()
+                with self._lock:
+                    params = self.params
+                    chunk_paths = self._chunks[position:]
+                    finished = self.finished
+
+                if params is not None and not header_sent:
+                    header_sent = True
+                    yield wav_stream_header(*params)
+                for chunk_path in chunk_paths:
+                    position += 1
+                    data = await asyncio.to_thread(_read_file, chunk_path)
+                    for offset in range(0, len(data), chunk_size):
+                        yield data[offset:offset + chunk_size]
+                if finished:
+                    # Nothing was published after the snapshot above
+                    return
+
+                try:
+                    await asyncio.wait_for(changed.wait(), timeout=_DISCONNECT_CHECK_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            with self._lock:
+                self._waiters.discard(waiter)
+            release()
+
+    def _maybe_cleanup(self) -> None:
+        with self._lock:
+            if not self.finished or self._listeners > 0:
+                return
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+_live_streams: Dict[str, LiveStream] = {}
+_registry_lock = threading.Lock()
+
+
+def start_live_stream(job_id: str) -> LiveStream:
+    stream = LiveStream(job_id)
+    with _registry_lock:
+        _live_streams[job_id] = stream
+    return stream
+
+
+def get_live_stream(job_id: str) -> Optional[LiveStream]:
+    with _registry_lock:
+        return _live_streams.get(job_id)
+
+
+def finish_live_stream(job_id: str) -> None:
+    """End the job's live stream, listeners still connected receive the rest."""
+    with _registry_lock:
+        stream = _live_streams.pop(job_id, None)
+    if stream is not None:
+        stream.finish()
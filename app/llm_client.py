@@ -1,11 +1,24 @@
 import json
 import os
+import threading
 import time
-from typing import List
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
 
 from app.config.settings import settings
 from app.logger import setup_logger
-from app.graphs.podcast_graph import compile_podcast_graph
+from app.graphs.nodes import submit_topic_summary, transition_exchange
+from app.graphs.podcast_graph import (
+    checkpointed_state,
+    checkpointed_topic_states,
+    compile_podcast_graph,
+    compile_topic_graphs,
+    topic_thread_id,
+)
+from app.graphs.types import PodcastState
+from app.pipeline import prefetch
+from app.progress import increment_progress
+from app.recovery import get_checkpointer
 
 
 logger = setup_logger('llm_client')
@@ -17,23 +30,273 @@ class LLMClient:
 
     Public interface preserved:
     - generate_podcast_script(topics_text: List[str], job_id: str) -> List[Dict[str, str]]
+    - stream_podcast_script(topics_text: List[str], job_id: str) -> (int, Iterator[Dict[str, str]])
+
+    Topic summaries can be started early with summarize_topic_async and handed in as
+    `topic_summaries` (one Future per topic, in topic order), the graph then only waits
+    for summaries that aren't done yet.
+
+    When resuming is enabled the graph is checkpointed after every node, and a job that
+    already has a checkpoint continues from it instead of starting over.
+
+    With LLM_PARALLEL_TOPICS every topic is generated by its own graph run, concurrently,
+    and adjacent topics are joined by a transition line once both are done.
     """
 
-    def generate_podcast_script(self, topics_text: List[str], job_id: str):
-        compiled_graph, initial_state = compile_podcast_graph(topics_text, job_id)
+    def summarize_topic_async(self, topic_text: str, regenerate_summaries: bool = False) -> Future:
+        return submit_topic_summary(topic_text, force=regenerate_summaries)
+
+    def checkpointed_state(self, job_id: str, topic_count: int) -> Optional[PodcastState]:
+        """State of an interrupted run of the job (topic index, dialogue so far, ...), None if there is none."""
+        if not settings.LLM_PARALLEL_TOPICS:
+            return checkpointed_state(job_id, get_checkpointer())
+
+        states = checkpointed_topic_states(job_id, topic_count, get_checkpointer())
+        if all(state is None for state in states):
+            return None
+        unfinished = [
+            index for index, state in enumerate(states)
+            if state is None or state["topic_index"] < state["topic_end"]
+        ]
+        # Number of topics and the first topic still to be discussed, like the state of a sequential run
+        return {
+            "topic_count": topic_count,
+            "topic_index": unfinished[0] if unfinished else len(states),
+        }
+
+    def generate_podcast_script(
+        self,
+        topics_text: List[str],
+        job_id: str,
+        regenerate_summaries: bool = False,
+        topic_summaries: Optional[Sequence[Future]] = None,
+    ):
+        if settings.LLM_PARALLEL_TOPICS:
+            _, dialogue_lines, _ = self._generate_topics_concurrently(
+                topics_text, job_id, regenerate_summaries, topic_summaries
+            )
+            return list(dialogue_lines)
+
+        compiled_graph, graph_input, _ = self._start_graph(topics_text, job_id, regenerate_summaries)
 
         # Execute the graph to completion with configurable recursion limit
         final_state = compiled_graph.invoke(
-            initial_state,
-            config={"recursion_limit": settings.LLM_GRAPH_RECURSION_LIMIT},
+            graph_input,
+            config=self._graph_config(job_id, topics_text, topic_summaries),
+            durability=self._durability(),
         )
         dialogue = final_state.get("dialogue", [])
 
+        self._write_debug_dialogue(dialogue)
+
+        return dialogue
+
+    def stream_podcast_script(
+        self,
+        topics_text: List[str],
+        job_id: str,
+        regenerate_summaries: bool = False,
+        topic_summaries: Optional[Sequence[Future]] = None,
+        sentence_sink: Optional[Callable[[int, str, str], None]] = None,
+    ) -> Tuple[int, Iterator[Dict[str, str]]]:
+        """
+        Generate the podcast script, yielding each dialogue line as soon as its exchange is done.
+
+        The graph runs on a background thread and pushes new lines onto a bounded queue
+        (TTS_PIPELINE_QUEUE_SIZE), so the consumer can synthesize line N while line N+1
+        is being generated.
+
+        Args:
+            topics_text: List of topic texts
+            job_id: Job process
+            regenerate_summaries: Ignore cached topic summaries
+            topic_summaries: Summaries started with summarize_topic_async, one per topic
+            sentence_sink: Called as sentence_sink(line_index, speaker, sentence) for every
+                sentence while the line is still being generated (LLM responses are streamed)
+
+        Returns:
+            Tuple of (expected number of dialogue lines, iterator over dialogue lines in order)
+        """
+        if settings.LLM_PARALLEL_TOPICS:
+            if sentence_sink is not None:
+                logger.warning("Sentence streaming is not used with LLM_PARALLEL_TOPICS")
+            expected_lines, dialogue_lines, stop_topics = self._generate_topics_concurrently(
+                topics_text, job_id, regenerate_summaries, topic_summaries
+            )
+            return expected_lines, prefetch(
+                dialogue_lines, settings.TTS_PIPELINE_QUEUE_SIZE, name=f"llm-stream-{job_id}", on_stop=stop_topics
+            )
+
+        compiled_graph, graph_input, state = self._start_graph(topics_text, job_id, regenerate_summaries)
+        expected_lines = sum(state["exchanges_per_topic"])
+
+        def produce() -> Iterator[Dict[str, str]]:
+            # Lines of a resumed run come first, their audio is usually still in the work dir
+            dialogue: List[Dict[str, str]] = list(state.get("dialogue", []))
+            yield from dialogue
+            for update in compiled_graph.stream(
+                graph_input,
+                config=self._graph_config(job_id, topics_text, topic_summaries, sentence_sink),
+                stream_mode="updates",
+                durability=self._durability(),
+            ):
+                for node_update in update.values():
+                    if not node_update or "dialogue" not in node_update:
+                        continue
+                    # Nodes return only the lines they added
+                    dialogue.extend(node_update["dialogue"])
+                    yield from node_update["dialogue"]
+
+            self._write_debug_dialogue(dialogue)
+
+        return expected_lines, prefetch(
+            produce(), settings.TTS_PIPELINE_QUEUE_SIZE, name=f"llm-stream-{job_id}"
+        )
+
+    def _start_graph(
+        self, topics_text: List[str], job_id: str, regenerate_summaries: bool
+    ) -> Tuple[Any, Optional[PodcastState], PodcastState]:
+        """
+        Compile the job's graph, resuming from its checkpoint if it has one.
+
+        Returns:
+            Tuple of (compiled graph, graph input, current state), the input is None
+            when resuming (LangGraph then continues from the checkpoint)
+        """
+        checkpointer = get_checkpointer()
+        compiled_graph, initial_state = compile_podcast_graph(
+            topics_text, job_id, regenerate_summaries, checkpointer
+        )
+        state = checkpointed_state(job_id, checkpointer)
+        if state is None:
+            return compiled_graph, initial_state, initial_state
+
+        done_lines = len(state.get("dialogue", []))
+        logger.info(f"Resuming dialogue of job {job_id} from its checkpoint ({done_lines} lines done)")
+        # Progress of the exchanges done before the interruption
+        increment_progress(job_id, state["progress_increment"] * done_lines)
+        return compiled_graph, None, state
+
+    def _generate_topics_concurrently(
+        self,
+        topics_text: List[str],
+        job_id: str,
+        regenerate_summaries: bool,
+        topic_summaries: Optional[Sequence[Future]],
+    ) -> Tuple[int, Iterator[Dict[str, str]], Callable[[], None]]:
+        """
+        Generate every topic with its own graph run, up to LLM_PARALLEL_TOPIC_WORKERS at once.
+
+        Lines are yielded in podcast order: a topic's lines as soon as it and all topics
+        before it are done, preceded by the transition from the previous topic (written
+        once both topics are done). Topic runs are checkpointed and resumed individually,
+        transitions are written again after an interruption.
+
+        When any topic fails or the iterator is closed, the other topic runs stop after their
+        current node, and the iterator only ends once they did, so nothing is checkpointed
+        after the job ended.
+
+        Returns:
+            Tuple of (expected number of dialogue lines, iterator over dialogue lines in order,
+            function stopping the topic runs early)
+        """
+        checkpointer = get_checkpointer()
+        checkpoints = checkpointed_topic_states(job_id, len(topics_text), checkpointer)
+        resumed = [state for state in checkpoints if state is not None]
+        compiled_graph, initial_states = compile_topic_graphs(
+            topics_text, job_id, regenerate_summaries, checkpointer,
+            # Speakers and progress depend on the exchange counts of all topics
+            resumed[0]["exchanges_per_topic"] if resumed else None,
+        )
+        exchanges_per_topic = initial_states[0]["exchanges_per_topic"] if initial_states else []
+        expected_lines = sum(exchanges_per_topic) + max(0, len(topics_text) - 1)
+
+        if resumed:
+            done_lines = sum(len(state.get("dialogue", [])) for state in resumed)
+            logger.info(f"Resuming {len(resumed)} topics of job {job_id} from their checkpoints ({done_lines} lines done)")
+            increment_progress(job_id, initial_states[0]["progress_increment"] * done_lines)
+
+        stopped = threading.Event()
+
+        def run_topic(index: int) -> Optional[PodcastState]:
+            checkpoint = checkpoints[index]
+            if checkpoint is not None and checkpoint["topic_index"] >= checkpoint["topic_end"]:
+                return checkpoint
+            state = None
+            for state in compiled_graph.stream(
+                None if checkpoint is not None else initial_states[index],
+                config=self._graph_config(topic_thread_id(job_id, index), topics_text, topic_summaries),
+                stream_mode="values",
+                durability=self._durability(),
+            ):
+                if stopped.is_set():
+                    return None
+            return state
+
+        def stop_on_failure(topic_run: Future) -> None:
+            if not topic_run.cancelled() and topic_run.exception() is not None:
+                stopped.set()
+
+        def produce() -> Iterator[Dict[str, str]]:
+            executor = ThreadPoolExecutor(
+                max_workers=max(1, settings.LLM_PARALLEL_TOPIC_WORKERS), thread_name_prefix=f"topics-{job_id}"
+            )
+            dialogue: List[Dict[str, str]] = []
+            try:
+                # Submitted in order, so the first topic is always started (and checkpointed) first
+                topic_runs = [executor.submit(run_topic, index) for index in range(len(topics_text))]
+                for topic_run in topic_runs:
+                    topic_run.add_done_callback(stop_on_failure)
+                previous: Optional[PodcastState] = None
+                for topic_run in topic_runs:
+                    state = topic_run.result()
+                    if state is None:
+                        # Stopped early, by the failure of a later topic or because the iterator was closed
+                        for other_run in topic_runs:
+                            if other_run.done() and not other_run.cancelled() and other_run.exception() is not None:
+                                raise other_run.exception()
+                        return
+                    lines = list(state.get("dialogue", []))
+                    if previous is not None:
+                        lines.insert(0, transition_exchange(previous, state))
+                    dialogue.extend(lines)
+                    yield from lines
+                    previous = state
+            finally:
+                stopped.set()
+                executor.shutdown(wait=True, cancel_futures=True)
+
+            self._write_debug_dialogue(dialogue)
+
+        return expected_lines, produce(), stopped.set
+
+    @staticmethod
+    def _durability() -> Optional[str]:
+        # With a checkpointer, save each checkpoint before the next node runs (nothing to save without one)
+        return "sync" if get_checkpointer() is not None else None
+
+    @staticmethod
+    def _graph_config(
+        thread_id: str,
+        topics_text: List[str],
+        topic_summaries: Optional[Sequence[Future]],
+        sentence_sink: Optional[Callable[[int, str, str], None]] = None,
+    ) -> Dict[str, Any]:
+        # Only the state is checkpointed, the configurable entries below (topic texts included) are per run
+        return {
+            "recursion_limit": settings.LLM_GRAPH_RECURSION_LIMIT,
+            "configurable": {
+                "thread_id": thread_id,
+                "topics": list(topics_text),
+                "topic_summaries": list(topic_summaries or []),
+                "sentence_sink": sentence_sink,
+            },
+        }
+
+    def _write_debug_dialogue(self, dialogue: List[Dict[str, str]]) -> None:
         if settings.DEBUG:
             os.makedirs(settings.DEBUG_DIR, exist_ok=True)
             timestamp = int(time.time())
             file_path = os.path.join(settings.DEBUG_DIR, f"llm-podcast-{timestamp}.json")
             with open(file_path, "w") as f:
                 json.dump(dialogue, f, indent=4)
-
-        return dialogue
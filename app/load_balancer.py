@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import hashlib
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Sequence
+
+import requests
+
+from app import metrics
+from app.config.settings import settings
+from app.logger import setup_logger
+
+
+logger = setup_logger('load_balancer')
+
+
+class NoHealthyEndpointError(Exception):
+    """Raised when every endpoint of a balancer was excluded from a request."""
+
+
+def is_endpoint_failure(error: BaseException) -> bool:
+    """
+    Whether an error says something about the replica (connection error, timeout, 5xx, 429)
+    rather than about the request itself (other 4xx), only the former count towards ejection.
+    """
+    status = getattr(error, "status_code", None)
+    response = getattr(error, "response", None)
+    if status is None and response is not None:
+        status = getattr(response, "status_code", None)
+    if status is None:
+        return True
+    return status >= 500 or status == 429
+
+
+class Endpoint:
+    """One replica of a backend, with its load and health."""
+
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self.outstanding = 0
+        self.failures = 0
+        self.ejected_until = 0.0
+
+    def available(self, now: float) -> bool:
+        return now >= self.ejected_until
+
+
+class LoadBalancer:
+    """
+    Client-side balancer over the replicas of a backend (LLM or TTS servers).
+
+    Requests go to the available endpoint with the least outstanding requests. With a
+    routing key (job ID, voice, ...) the endpoints are ranked by rendezvous hashing and
+    the first one that isn't more than `sticky_slack` requests busier than the least
+    loaded one is used, so a key keeps hitting the same replica (and its caches) until
+    that replica is overloaded or ejected.
+
+    An endpoint is ejected for `eject_seconds` after `eject_failures` failed requests in
+    a row or a failed health check. Health checks (GET `health_path` on every endpoint)
+    run every `health_interval` seconds once the balancer is first used, and bring
+    ejected endpoints back as soon as they answer again. If every endpoint is ejected
+    requests still go out, to the one that comes back first.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        urls: Sequence[str],
+        *,
+        health_path: str = "",
+        health_interval: float = 15.0,
+        health_timeout: float = 5.0,
+        eject_failures: int = 3,
+        eject_seconds: float = 30.0,
+        sticky_slack: int = 2,
+    ):
+        if not urls:
+            raise ValueError(f"Load balancer {name} needs at least one endpoint")
+        self.name = name
+        self.endpoints = [Endpoint(url) for url in urls]
+        self.health_path = health_path
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self.eject_failures = max(1, eject_failures)
+        self.eject_seconds = eject_seconds
+        self.sticky_slack = max(0, sticky_slack)
+        self._lock = threading.Lock()
+        self._round_robin = itertools.count()
+        self._health_thread: Optional[threading.Thread] = None
+
+        for endpoint in self.endpoints:
+            metrics.BACKEND_OUTSTANDING.labels(backend=name, endpoint=endpoint.url).set_function(
+                lambda endpoint=endpoint: endpoint.outstanding
+            )
+            metrics.BACKEND_AVAILABLE.labels(backend=name, endpoint=endpoint.url).set_function(
+                lambda endpoint=endpoint: int(endpoint.available(time.monotonic()))
+            )
+
+    @property
+    def urls(self) -> List[str]:
+        return [endpoint.url for endpoint in self.endpoints]
+
+    def acquire(self, key: Optional[str] = None, exclude: Sequence[Endpoint] = ()) -> Endpoint:
+        """Pick an endpoint for a request and count it as outstanding, release() it when done."""
+        self._ensure_health_checks()
+        with self._lock:
+            now = time.monotonic()
+            candidates = [endpoint for endpoint in self.endpoints if endpoint not in exclude]
+            if not candidates:
+                raise NoHealthyEndpointError(f"No {self.name} endpoint left to try")
+            available = [endpoint for endpoint in candidates if endpoint.available(now)]
+            if not available:
+                available = [min(candidates, key=lambda endpoint: endpoint.ejected_until)]
+
+            least = min(endpoint.outstanding for endpoint in available)
+            if key is not None:
+                ranked = sorted(available, key=lambda endpoint: self._rank(key, endpoint), reverse=True)
+                chosen = next(endpoint for endpoint in ranked if endpoint.outstanding <= least + self.sticky_slack)
+            else:
+                # Rotate between equally loaded endpoints
+                least_loaded = [endpoint for endpoint in available if endpoint.outstanding == least]
+                chosen = least_loaded[next(self._round_robin) % len(least_loaded)]
+            chosen.outstanding += 1
+            return chosen
+
+    def release(self, endpoint: Endpoint, error: Optional[BaseException] = None) -> None:
+        """End a request, `error` is the exception it failed with (if any)."""
+        with self._lock:
+            endpoint.outstanding -= 1
+            if error is None:
+                endpoint.failures = 0
+                return
+            if not is_endpoint_failure(error):
+                return
+            endpoint.failures += 1
+            if endpoint.failures >= self.eject_failures:
+                self._eject(endpoint, f"{endpoint.failures} failed requests in a row: {str(error)}")
+
+    @contextmanager
+    def request(self, key: Optional[str] = None, exclude: Sequence[Endpoint] = ()) -> Iterator[Endpoint]:
+        """Endpoint for the duration of one request, failures are recorded from the raised exception."""
+        endpoint = self.acquire(key, exclude)
+        error: Optional[BaseException] = None
+        try:
+            yield endpoint
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self.release(endpoint, error)
+
+    def probe(self) -> None:
+        """Run one round of health checks."""
+        for endpoint in self.endpoints:
+            try:
+                response = requests.get(f"{endpoint.url}{self.health_path}", timeout=self.health_timeout)
+                healthy = response.status_code < 500
+                reason = f"health check returned {response.status_code}"
+            except requests.RequestException as e:
+                healthy = False
+                reason = f"health check failed: {str(e)}"
+            with self._lock:
+                if healthy:
+                    if not endpoint.available(time.monotonic()):
+                        logger.info(f"{self.name} endpoint {endpoint.url} is back")
+                    endpoint.failures = 0
+                    endpoint.ejected_until = 0.0
+                else:
+                    self._eject(endpoint, reason)
+
+    def _eject(self, endpoint: Endpoint, reason: str) -> None:
+        # Called with the lock held
+        if endpoint.available(time.monotonic()):
+            logger.warning(f"Ejecting {self.name} endpoint {endpoint.url} for {self.eject_seconds:.0f}s ({reason})")
+            metrics.BACKEND_EJECTIONS.labels(backend=self.name, endpoint=endpoint.url).inc()
+        endpoint.ejected_until = time.monotonic() + self.eject_seconds
+        # One more failure after the ejection ends sends it straight back out
+        endpoint.failures = self.eject_failures - 1
+
+    @staticmethod
+    def _rank(key: str, endpoint: Endpoint) -> bytes:
+        return hashlib.sha256(f"{key}|{endpoint.url}".encode("utf-8")).digest()
+
+    def _ensure_health_checks(self) -> None:
+        if not self.health_path or self.health_interval <= 0 or self._health_thread is not None:
+            return
+        with self._lock:
+            if self._health_thread is not None:
+                return
+            self._health_thread = threading.Thread(
+                target=self._health_loop, name=f"{self.name}-health", daemon=True
+            )
+        self._health_thread.start()
+
+    def _health_loop(self) -> None:
+        while True:
+            time.sleep(self.health_interval)
+            try:
+                self.probe()
+            except Exception as e:
+                logger.warning(f"Health checks of {self.name} endpoints failed: {str(e)}")
+
+
+def create_balancer(name: str, urls: Sequence[str], health_path: str) -> LoadBalancer:
+    """Balancer configured from the BACKEND_* settings."""
+    return LoadBalancer(
+        name,
+        urls,
+        health_path=health_path,
+        health_interval=settings.BACKEND_HEALTH_INTERVAL,
+        eject_failures=settings.BACKEND_EJECT_FAILURES,
+        eject_seconds=settings.BACKEND_EJECT_SECONDS,
+        sticky_slack=settings.BACKEND_STICKY_SLACK,
+    )
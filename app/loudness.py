@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+from typing import List, Optional, Sequence
+
+import numpy as np
+from pydub import AudioSegment
+
+
+# Gating parameters from ITU-R BS.1770 (400ms blocks with 75% overlap)
+BLOCK_SECONDS = 0.4
+HOP_SECONDS = 0.1
+ABSOLUTE_GATE = -70.0
+RELATIVE_GATE = -10.0
+# Offset of the BS.1770 loudness formula, keeps values close to LUFS for speech
+LOUDNESS_OFFSET = -0.691
+SILENCE = -float("inf")
+
+_DTYPES = {1: np.int8, 2: np.int16, 4: np.int32}
+
+
+def supports(segment: AudioSegment) -> bool:
+    """Whether the segment's sample width can be handled as a NumPy array."""
+    return segment.sample_width in _DTYPES
+
+
+def to_array(segment: AudioSegment) -> np.ndarray:
+    """Samples of the segment as a float32 array of shape (frames, channels) in [-1, 1]."""
+    dtype = _DTYPES[segment.sample_width]
+    samples = np.frombuffer(segment.raw_data, dtype=dtype).astype(np.float32)
+    samples /= float(np.iinfo(dtype).max + 1)
+    return samples.reshape(-1, segment.channels)
+
+
+def from_array(samples: np.ndarray, template: AudioSegment) -> AudioSegment:
+    """Build a segment from a float array, using the format (width, rate, channels) of `template`."""
+    dtype = _DTYPES[template.sample_width]
+    info = np.iinfo(dtype)
+    scaled = np.clip(samples * float(info.max + 1), info.min, info.max).astype(dtype)
+    return template._spawn(scaled.tobytes())
+
+
+def measure_loudness(samples: np.ndarray, frame_rate: int, gated: bool = True) -> float:
+    """
+    Loudness of a (frames, channels) float array in dB.
+
+    With `gated`, the signal is split into overlapping 400ms blocks, blocks below the
+    absolute gate (-70) and then 10 LU below the mean are ignored, as in BS.1770.
+    This is what keeps pauses and breaths from dragging a line's level down.
+    Without `gated`, the plain RMS level in dBFS is returned.
+    """
+    if samples.size == 0:
+        return SILENCE
+
+    # Per-frame energy summed over channels, prefix sums give every block's energy at once
+    energy = np.square(samples, dtype=np.float64).sum(axis=1)
+    if not gated:
+        mean_square = energy.mean() / samples.shape[1]
+        return 10 * np.log10(mean_square) if mean_square > 0 else SILENCE
+
+    block = max(1, int(round(BLOCK_SECONDS * frame_rate)))
+    hop = max(1, int(round(HOP_SECONDS * frame_rate)))
+    if len(energy) <= block:
+        block_power = np.array([energy.mean()])
+    else:
+        cumulative = np.concatenate(([0.0], np.cumsum(energy)))
+        starts = np.arange(0, len(energy) - block + 1, hop)
+        block_power = (cumulative[starts + block] - cumulative[starts]) / block
+
+    with np.errstate(divide="ignore"):
+        block_loudness = LOUDNESS_OFFSET + 10 * np.log10(block_power)
+
+    gated_power = block_power[block_loudness > ABSOLUTE_GATE]
+    if gated_power.size == 0:
+        return SILENCE
+    relative_gate = LOUDNESS_OFFSET + 10 * np.log10(gated_power.mean()) + RELATIVE_GATE
+    gated_power = block_power[block_loudness > max(ABSOLUTE_GATE, relative_gate)]
+    return float(LOUDNESS_OFFSET + 10 * np.log10(gated_power.mean()))
+
+
+def normalize_arrays(
+    arrays: Sequence[np.ndarray],
+    frame_rate: int,
+    target_loudness: float,
+    gated: bool = True,
+) -> List[np.ndarray]:
+    """
+    Bring a batch of (frames, channels) float arrays to `target_loudness` in a single pass.
+
+    The batch is concatenated once, every segment's loudness is measured, and the
+    per-segment gains are applied with one multiply over the whole buffer. Silent
+    segments are passed through unchanged.
+    """
+    if not arrays:
+        return []
+
+    loudness = np.array([measure_loudness(a, frame_rate, gated) for a in arrays])
+    gains_db = np.where(np.isfinite(loudness), target_loudness - loudness, 0.0)
+    gains = np.power(10.0, gains_db / 20.0).astype(np.float32)
+
+    lengths = [len(a) for a in arrays]
+    combined = np.concatenate(arrays, axis=0)
+    combined *= np.repeat(gains, lengths)[:, np.newaxis]
+
+    return np.split(combined, np.cumsum(lengths)[:-1])
+
+
+def segment_loudness(segment: AudioSegment, gated: bool = True) -> Optional[float]:
+    """Loudness of a pydub segment, or None if its sample width isn't supported."""
+    if not supports(segment):
+        return None
+    return measure_loudness(to_array(segment), segment.frame_rate, gated)
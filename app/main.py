@@ -1,8 +1,11 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
-from app.api import router
+from fastapi.responses import HTMLResponse, Response
+from app.api import resume_interrupted_jobs, router
+from app.metrics import render_metrics
+from app.pdf_processor import start_extraction_pool
 from app.config.settings import settings
 from app.logger import setup_logger
 import logging
@@ -13,10 +16,19 @@ logger = setup_logger('podcast_creator')
 # Configure FastAPI to reduce log noise
 logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Pick up jobs interrupted by a crash or restart where they stopped
+    resume_interrupted_jobs()
+    # Docling models are loaded by the extraction workers while the app is already serving
+    start_extraction_pool()
+    yield
+
 app = FastAPI(
     title="Podcast Creator API",
     description="Convert PDF content into 2-host podcasts using LLM and TTS",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Mount static files
@@ -42,4 +54,9 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import time
+import wave
+from contextlib import contextmanager
+from typing import Iterator, Optional, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+
+# Metrics are per process, each uvicorn worker exposes its own jobs
+
+_SHORT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+_LONG_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 900, 1800, 3600, 7200)
+_TOKEN_BUCKETS = (16, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768, 65536)
+
+EXTRACTION_SECONDS = Histogram(
+    "podcast_extraction_seconds",
+    "Time from starting a source (download or conversion) until its text is extracted",
+    ["source", "result"],
+    buckets=_LONG_BUCKETS,
+)
+SUMMARY_SECONDS = Histogram(
+    "podcast_summary_seconds",
+    "Topic summarization latency",
+    ["result"],
+    buckets=_LONG_BUCKETS,
+)
+LLM_TURN_SECONDS = Histogram(
+    "podcast_llm_turn_seconds",
+    "LLM latency of one host turn (exchange)",
+    buckets=_SHORT_BUCKETS,
+)
+LLM_PROMPT_TOKENS = Histogram(
+    "podcast_llm_prompt_tokens",
+    "Prompt tokens per LLM call, as reported by the server",
+    buckets=_TOKEN_BUCKETS,
+)
+LLM_COMPLETION_TOKENS = Histogram(
+    "podcast_llm_completion_tokens",
+    "Completion tokens per LLM call, as reported by the server",
+    buckets=_TOKEN_BUCKETS,
+)
+TTS_SEGMENT_SECONDS = Histogram(
+    "podcast_tts_segment_seconds",
+    "Time to produce the audio of one dialogue line",
+    ["result"],
+    buckets=_SHORT_BUCKETS,
+)
+TTS_AUDIO_SECONDS = Histogram(
+    "podcast_tts_audio_seconds",
+    "Duration of the audio of one dialogue line",
+    buckets=(1, 2, 5, 10, 15, 20, 30, 45, 60, 90, 120),
+)
+STITCH_SECONDS = Histogram(
+    "podcast_stitch_seconds",
+    "Time to normalize and stitch the segments of a podcast",
+    buckets=_SHORT_BUCKETS,
+)
+ENCODE_SECONDS = Histogram(
+    "podcast_encode_seconds",
+    "Time to encode a podcast into a compressed format",
+    ["format"],
+    buckets=_SHORT_BUCKETS,
+)
+JOB_SECONDS = Histogram(
+    "podcast_job_seconds",
+    "End-to-end processing time of a job (excluding time in the queue)",
+    ["status"],
+    buckets=_LONG_BUCKETS,
+)
+QUEUE_DEPTH = Gauge("podcast_queue_depth", "Jobs waiting in the queue")
+ACTIVE_JOBS = Gauge("podcast_active_jobs", "Jobs being processed")
+BACKEND_OUTSTANDING = Gauge(
+    "podcast_backend_outstanding_requests",
+    "Requests in flight to a backend endpoint",
+    ["backend", "endpoint"],
+)
+BACKEND_AVAILABLE = Gauge(
+    "podcast_backend_available",
+    "Whether a backend endpoint takes requests (0 while ejected)",
+    ["backend", "endpoint"],
+)
+BACKEND_EJECTIONS = Counter(
+    "podcast_backend_ejections",
+    "Times a backend endpoint was ejected after failures",
+    ["backend", "endpoint"],
+)
+
+
+@contextmanager
+def timed(histogram, **labels) -> Iterator[None]:
+    """Observe the duration of the block (also when it raises)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        (histogram.labels(**labels) if labels else histogram).observe(time.perf_counter() - started)
+
+
+def wav_duration(path: str) -> Optional[float]:
+    """Duration of a WAV file from its header, None if it can't be read."""
+    try:
+        with wave.open(path, "rb") as wav_file:
+            return wav_file.getnframes() / float(wav_file.getframerate())
+    except (OSError, EOFError, wave.Error, ZeroDivisionError):
+        return None
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Current metrics in the Prometheus text format, with their content type."""
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -1,12 +1,21 @@
+import hashlib
+import multiprocessing
 import os
+import threading
 import time
 import re
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
 from docling.datamodel.base_models import DocumentStream, InputFormat
 from docling.datamodel.pipeline_options import EasyOcrOptions, PdfPipelineOptions
 from docling.document_converter import DocumentConverter, PdfFormatOption
-from typing import Optional, List
+from functools import lru_cache
+from importlib import metadata
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 from io import BytesIO
+from app import metrics
+from app.arxiv_fetcher import arxiv_fetcher
 from app.config.settings import settings
+from app.disk_cache import DiskCache
 from app.logger import setup_logger
 from app.progress import increment_progress
 
@@ -14,27 +23,260 @@ logger = setup_logger('pdf_processor')
 
 DOCLING_MODELS_PATH = "/root/.cache/docling/models"
 
+# Post-processed markdown of previously extracted sources, shared by all jobs
+extraction_cache = DiskCache(
+    "extraction",
+    settings.EXTRACTION_CACHE_DIR,
+    settings.EXTRACTION_CACHE_MAX_BYTES,
+    max_age=settings.EXTRACTION_CACHE_MAX_AGE_DAYS * 86400,
+) if settings.EXTRACTION_CACHE_ENABLED else None
+
+ARXIV_ID_PATTERN = re.compile(r"arxiv\.org/(?:pdf|abs)/(.+?)(?:\.pdf)?/?$", re.IGNORECASE)
+ARXIV_VERSION_PATTERN = re.compile(r"v\d+$")
+
+def build_pipeline_options() -> PdfPipelineOptions:
+    pipeline_options = PdfPipelineOptions(artifacts_path=DOCLING_MODELS_PATH)
+    if hasattr(pipeline_options, "do_ocr"):
+        pipeline_options.do_ocr = False
+    if hasattr(pipeline_options, "do_table_structure"):
+        pipeline_options.do_table_structure = True
+    if hasattr(pipeline_options, "accelerator_device"):
+        pipeline_options.accelerator_device = "cpu"
+    return pipeline_options
+
+
+@lru_cache(maxsize=1)
+def _extraction_fingerprint() -> str:
+    """Docling version and pipeline options, any change to them invalidates cached extractions."""
+    try:
+        docling_version = metadata.version("docling")
+    except metadata.PackageNotFoundError:
+        docling_version = "unknown"
+    return DiskCache.make_key(docling_version, build_pipeline_options().model_dump_json())
+
+
+def normalize_arxiv_id(arxiv_url: str) -> Optional[str]:
+    """Arxiv ID (with version, if the URL has one) of an Arxiv URL, e.g. "2408.09869v2"."""
+    match = ARXIV_ID_PATTERN.search(arxiv_url.strip())
+    return match.group(1).lower() if match else None
+
+
+def is_versioned_arxiv_url(arxiv_url: str) -> bool:
+    """Whether an Arxiv URL names a version (e.g. "2408.09869v2"), whose PDF never changes."""
+    arxiv_id = normalize_arxiv_id(arxiv_url)
+    return arxiv_id is not None and ARXIV_VERSION_PATTERN.search(arxiv_id) is not None
+
+
+def extraction_cache_key(kind: str, source_id: str) -> str:
+    """
+    Cache key of a source.
+
+    Args:
+        kind: "sha256" for a PDF identified by the hex SHA-256 of its bytes, or "arxiv"
+        source_id: The hex digest, or the Arxiv URL (its normalized ID is used, only
+            versioned URLs are stable enough to be cached by ID)
+    """
+    if kind == "arxiv":
+        source_id = normalize_arxiv_id(source_id) or source_id.strip()
+    source_key = (kind, source_id)
+    # Truncation length is part of the post-processing, so part of the key too
+    return DiskCache.make_key(_extraction_fingerprint(), settings.MAX_CHARACTER_SIZE, source_key)
+
+
 class PDFProcessor:
     def __init__(self):
-        pipeline_options = PdfPipelineOptions(artifacts_path=DOCLING_MODELS_PATH)
-        if hasattr(pipeline_options, "do_ocr"):
-            pipeline_options.do_ocr = False
-        if hasattr(pipeline_options, "do_table_structure"):
-            pipeline_options.do_table_structure = True
-        if hasattr(pipeline_options, "accelerator_device"):
-            pipeline_options.accelerator_device = "cpu"
-        self.converter = DocumentConverter(
-            format_options={
-                InputFormat.PDF: PdfFormatOption(pipeline_options=pipeline_options)
-            }
-        )
-
-    def extract_text_from_pdf(self, pdf_file: BytesIO, *, job_id: Optional[str] = None, progress_increment: float = 0.0) -> str:
+        self._converter: Optional[DocumentConverter] = None
+
+    @property
+    def converter(self) -> DocumentConverter:
+        # Built on first use, jobs extracting through the process pool never need one
+        if self._converter is None:
+            self._converter = DocumentConverter(
+                format_options={
+                    InputFormat.PDF: PdfFormatOption(pipeline_options=build_pipeline_options())
+                }
+            )
+        return self._converter
+
+    def extract_texts(
+        self,
+        files: List[Tuple[str, str]],
+        arxiv_urls: List[str],
+        *,
+        job_id: Optional[str] = None,
+        progress_increment: float = 0.0,
+    ) -> List[str]:
+        """
+        Extract text content from PDF files and Arxiv URLs in parallel.
+
+        See iter_extracted_texts, this waits for every source.
+
+        Args:
+            files: PDF files as (path, hex SHA-256 of the content)
+            arxiv_urls: List of Arxiv URLs
+
+        Returns:
+            Extracted markdown per source: files first, then Arxiv URLs, in the given order
+
+        Raises:
+            Exception: If any source fails to process
+        """
+        results: List[Optional[str]] = [None] * (len(files) + len(arxiv_urls))
+        for index, markdown_text in self.iter_extracted_texts(
+            files, arxiv_urls, job_id=job_id, progress_increment=progress_increment
+        ):
+            results[index] = markdown_text
+        return results
+
+    def iter_extracted_texts(
+        self,
+        files: List[Tuple[str, str]],
+        arxiv_urls: List[str],
+        *,
+        job_id: Optional[str] = None,
+        progress_increment: float = 0.0,
+    ) -> Iterator[Tuple[int, str]]:
+        """
+        Extract text content from PDF files and Arxiv URLs in parallel, yielding each source as soon as it is ready.
+
+        Sources seen before (same PDF bytes or versioned Arxiv ID) are served from the extraction
+        cache, files are looked up by the hash computed when they were uploaded and only
+        read by the conversion itself. Unversioned Arxiv URLs follow the latest version of
+        the paper, they're looked up by the hash of the downloaded PDF. Arxiv PDFs are downloaded concurrently by the shared fetch layer while the
+        uploaded files are already being converted. Conversions run on the shared extraction
+        process pool (PDF_EXTRACTION_WORKERS), where every worker keeps a warm docling
+        converter, so sources of this job and of other jobs are spread across cores. With
+        PDF_EXTRACTION_WORKERS=0 the sources are converted one after another in the calling thread.
+
+        Args:
+            files: PDF files as (path, hex SHA-256 of the content)
+            arxiv_urls: List of Arxiv URLs
+
+        Yields:
+            (source index, extracted markdown) in completion order, sources are indexed
+            files first, then Arxiv URLs, in the given order
+
+        Raises:
+            Exception: If any source fails to process
+        """
+        sources = [("pdf", path) for path, _ in files] + [("arxiv", url) for url in arxiv_urls]
+        # Unversioned Arxiv URLs have no key before their download (their content can change)
+        source_ids = [("sha256", digest) for _, digest in files] + [
+            ("arxiv", url) if is_versioned_arxiv_url(url) else None for url in arxiv_urls
+        ]
+        # When each source was started (cache lookup, download or conversion), for the extraction metric
+        started = [0.0] * len(sources)
+
+        def observe(index: int, result: str) -> None:
+            metrics.EXTRACTION_SECONDS.labels(source=sources[index][0], result=result).observe(
+                time.perf_counter() - started[index]
+            )
+
+        # Serve already extracted sources from the cache
+        cache_keys: List[Optional[str]] = [None] * len(sources)
+        pending: List[int] = []
+        for index in range(len(sources)):
+            started[index] = time.perf_counter()
+            if extraction_cache is not None and source_ids[index] is not None:
+                cache_keys[index] = extraction_cache_key(*source_ids[index])
+                cached = extraction_cache.get_text(cache_keys[index], ".md")
+                if cached is not None:
+                    logger.info(f"Extraction cache hit for source {index + 1}/{len(sources)} ({len(cached)} characters)")
+                    observe(index, "cache")
+                    if job_id and progress_increment:
+                        increment_progress(job_id, progress_increment)
+                    yield index, cached
+                    continue
+            pending.append(index)
+
+        # Extractions of already downloaded PDFs are also cached by content hash, so a
+        # paper uploaded as a file and submitted as an Arxiv URL is only converted once
+        content_keys: List[Optional[str]] = [None] * len(sources)
+
+        def store(index: int, markdown_text: str) -> None:
+            for key in (cache_keys[index], content_keys[index]):
+                if key is None:
+                    continue
+                try:
+                    extraction_cache.put_text(key, markdown_text, ".md")
+                except OSError as e:
+                    logger.warning(f"Failed to store source {index + 1} in extraction cache: {str(e)}")
+
+        # Start all Arxiv downloads right away, they overlap with the extraction of uploaded files
+        downloads: Dict[Future, List[int]] = {}
+        extractions: Dict[Future, int] = {}
+        for index in pending:
+            kind, payload = sources[index]
+            if kind == "arxiv":
+                started[index] = time.perf_counter()
+                downloads.setdefault(arxiv_fetcher.fetch_async(payload), []).append(index)
+        for index in pending:
+            kind, payload = sources[index]
+            if kind == "pdf":
+                started[index] = time.perf_counter()
+                extractions[self._submit_extraction(payload)] = index
+
+        try:
+            while downloads or extractions:
+                done, _ = wait([*downloads, *extractions], return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future in downloads:
+                        pdf_bytes = future.result()
+                        for index in downloads.pop(future):
+                            logger.debug(f"Downloaded source {index + 1}/{len(sources)} for job: {job_id}")
+                            if extraction_cache is not None:
+                                content_keys[index] = extraction_cache_key("sha256", hashlib.sha256(pdf_bytes).hexdigest())
+                                cached = extraction_cache.get_text(content_keys[index], ".md")
+                                if cached is not None:
+                                    logger.info(f"Extraction cache hit for source {index + 1}/{len(sources)} ({len(cached)} characters)")
+                                    store(index, cached)
+                                    observe(index, "cache")
+                                    if job_id and progress_increment:
+                                        increment_progress(job_id, progress_increment)
+                                    yield index, cached
+                                    continue
+                            extractions[self._submit_extraction(pdf_bytes)] = index
+                    else:
+                        index = extractions.pop(future)
+                        markdown_text = future.result()
+                        store(index, markdown_text)
+                        observe(index, "extracted")
+                        logger.debug(f"Extracted source {index + 1}/{len(sources)} for job: {job_id}")
+                        if job_id and progress_increment:
+                            increment_progress(job_id, progress_increment)
+                        yield index, markdown_text
+        except BaseException:
+            # Downloads may be shared with other jobs, only drop our own conversions
+            for future in extractions:
+                future.cancel()
+            raise
+
+    def _submit_extraction(self, pdf: Union[str, bytes]) -> Future:
+        """
+        Convert a PDF (file path or content) on the extraction pool, or right away in this
+        thread if the pool is disabled. Files are read by the worker, only their path is sent.
+        """
+        if settings.PDF_EXTRACTION_WORKERS > 0:
+            return get_extraction_pool().submit(_extract_in_worker, "pdf", pdf)
+        future: Future = Future()
+        try:
+            future.set_result(self._extract_source("pdf", pdf))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def _extract_source(self, kind: str, payload, *, job_id: Optional[str] = None, progress_increment: float = 0.0) -> str:
+        if kind == "pdf":
+            pdf_file = payload if isinstance(payload, str) else BytesIO(payload)
+            return self.extract_text_from_pdf(pdf_file, job_id=job_id, progress_increment=progress_increment)
+        return self.extract_text_from_arxiv(payload, job_id=job_id, progress_increment=progress_increment)
+
+    def extract_text_from_pdf(self, pdf_file: Union[str, BytesIO], *, job_id: Optional[str] = None, progress_increment: float = 0.0) -> str:
         """
         Extract text content from a PDF file using docling.
 
         Args:
-            pdf_file: BytesIO object containing PDF data
+            pdf_file: Path of the PDF file, or BytesIO object containing PDF data
 
         Returns:
             Extracted text content as markdown string
@@ -44,7 +286,7 @@ class PDFProcessor:
         """
         try:
             # Convert PDF to markdown using docling
-            source = DocumentStream(name="source.pdf", stream=pdf_file)
+            source = pdf_file if isinstance(pdf_file, str) else DocumentStream(name="source.pdf", stream=pdf_file)
             result = self.converter.convert(source)
             markdown_text = result.document.export_to_markdown()
             
@@ -109,7 +351,62 @@ class PDFProcessor:
         except Exception as e:
             logger.error(f"Failed to extract text from Arxiv URL: {str(e)}")
             raise Exception(f"Failed to extract text from Arxiv URL: {str(e)}")
-        
+
+
+# --- Extraction process pool ----------------------------------------------------
+
+_worker_processor: Optional[PDFProcessor] = None
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _init_extraction_worker() -> None:
+    """
+    Build the worker's docling converter once, at start-up.
+
+    Docling loads the layout, table and OCR models of a pipeline on its first conversion,
+    the PDF pipeline is initialized here so the first job handled by the worker doesn't pay for it.
+    """
+    global _worker_processor
+    _worker_processor = PDFProcessor()
+    try:
+        _worker_processor.converter.initialize_pipeline(InputFormat.PDF)
+    except Exception as e:
+        # Not fatal (a failing initializer breaks the whole pool), the first conversion loads the models
+        logger.warning(f"Failed to preload the PDF pipeline of an extraction worker: {str(e)}")
+
+
+def _extract_in_worker(kind: str, payload) -> str:
+    return _worker_processor._extract_source(kind, payload)
+
+
+def get_extraction_pool() -> ProcessPoolExecutor:
+    """Process pool shared by all jobs for docling conversions."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Spawn instead of fork, the API process has many threads running
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.PDF_EXTRACTION_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_extraction_worker,
+            )
+        return _pool
+
+
+def start_extraction_pool() -> None:
+    """
+    Start the extraction workers in the background, so they're warm when the first job arrives.
+
+    Nothing to do with PDF_EXTRACTION_WORKERS=0.
+    """
+    if settings.PDF_EXTRACTION_WORKERS > 0:
+        # Spawned workers are started on demand, one no-op task per worker starts them all
+        pool = get_extraction_pool()
+        for _ in range(settings.PDF_EXTRACTION_WORKERS):
+            pool.submit(int)
+
+
 def remove_references(text):
     # Regex to find the exact line containing '## References' (with optional trailing spaces)
     pattern = r'^#+\s*references\s*$'
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import queue
+import threading
+from typing import Callable, Iterable, Iterator, Optional, TypeVar
+
+from app.logger import setup_logger
+
+
+logger = setup_logger('pipeline')
+
+T = TypeVar("T")
+
+_ITEM = "item"
+_ERROR = "error"
+_DONE = "done"
+
+
+def prefetch(
+    iterable: Iterable[T],
+    maxsize: int,
+    name: str = "pipeline-producer",
+    on_stop: Optional[Callable[[], None]] = None,
+) -> Iterator[T]:
+    """
+    Drain an iterable on a background thread through a bounded queue.
+
+    The producer runs ahead of the consumer by at most `maxsize` items, and blocks
+    (back-pressure) once the queue is full. Exceptions raised by the producer are
+    re-raised in the consumer. If the consumer stops early (error or close), the
+    producer is told to stop at its next hand-off, and the consumer only returns once
+    the producer stopped and closed `iterable` (so its cleanup ran).
+
+    Args:
+        iterable: Source of items, consumed on the producer thread
+        maxsize: Maximum number of items buffered between producer and consumer
+        name: Name of the producer thread (for logs)
+        on_stop: Called when the consumer stops early, to interrupt a producer that is
+            waiting for work of its own before the next hand-off
+
+    Returns:
+        Iterator yielding the items of `iterable` in order
+    """
+    buffer: queue.Queue = queue.Queue(maxsize=max(1, maxsize))
+    stop = threading.Event()
+
+    def put(kind: str, payload=None) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put((kind, payload), timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        iterator = iter(iterable)
+        try:
+            for item in iterator:
+                if not put(_ITEM, item):
+                    logger.debug(f"{name} stopped by consumer")
+                    close = getattr(iterator, "close", None)
+                    if close is not None:
+                        close()
+                    return
+        except BaseException as e:
+            put(_ERROR, e)
+            return
+        put(_DONE)
+
+    def consume() -> Iterator[T]:
+        producer = threading.Thread(target=produce, name=name, daemon=True)
+        producer.start()
+        finished = False
+        try:
+            while True:
+                kind, payload = buffer.get()
+                if kind == _DONE:
+                    finished = True
+                    return
+                if kind == _ERROR:
+                    finished = True
+                    raise payload
+                yield payload
+        finally:
+            stop.set()
+            if not finished and on_stop is not None:
+                on_stop()
+            producer.join()
+
+    return consume()
@@ -1,25 +1,76 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
 
+from app.config.settings import settings
+from app.events import job_events
+from app.job_store import create_job_store
 from app.logger import setup_logger
 
 
 logger = setup_logger('progress')
 
 
-# In-memory storage for job tracking (in production, use a database)
-jobs: dict[str, dict] = {}
+# Job tracking, in memory or in SQLite depending on JOB_STORE_BACKEND
+job_store = create_job_store(settings.JOB_STORE_BACKEND, settings.JOB_STORE_PATH)
+
+_last_cleanup = 0.0
+_cleanup_lock = threading.Lock()
+
+
+def create_job(job_id: str, **fields: Any) -> Dict[str, Any]:
+    """Register a new job and return its stored state."""
+    now = datetime.now(timezone.utc).isoformat()
+    fields.setdefault("progress", 0)
+    fields.setdefault("created_at", now)
+    fields.setdefault("updated_at", now)
+    fields.setdefault("result_file", None)
+    job = job_store.create(job_id, fields)
+    cleanup_jobs()
+    return job
+
+
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    return job_store.get(job_id)
+
+
+def update_job(job_id: str, **fields: Any) -> None:
+    """Update job fields and timestamp."""
+    fields["updated_at"] = datetime.now(timezone.utc).isoformat()
+    job_store.update(job_id, fields)
+    job_events.notify(job_id)
+
+
+def list_jobs(status: str) -> List[Dict[str, Any]]:
+    """Jobs with the given status, oldest first."""
+    return job_store.list_by_status(status)
+
+
+def delete_job(job_id: str) -> None:
+    job_store.delete(job_id)
 
 
 def increment_progress(job_id: str, increment: float) -> None:
     """Increment job progress and update timestamp."""
-    if job_id not in jobs:
+    progress = job_store.increment_progress(job_id, increment)
+    if progress is None:
         return
-    jobs[job_id]["progress"] = jobs[job_id].get("progress", 0) + float(increment)
-    jobs[job_id]["updated_at"] = datetime.now(timezone.utc).isoformat()
+    job_events.notify(job_id)
     logger.info(
-        f"Progress incremented for job {job_id}: {jobs[job_id]['progress']}"
+        f"Progress incremented for job {job_id}: {progress}"
     )
 
 
+def cleanup_jobs(force: bool = False) -> None:
+    """Drop finished jobs past JOB_RETENTION_HOURS, at most once every few minutes."""
+    global _last_cleanup
+    with _cleanup_lock:
+        if not force and time.monotonic() - _last_cleanup < 300:
+            return
+        _last_cleanup = time.monotonic()
+    removed = job_store.cleanup(timedelta(hours=settings.JOB_RETENTION_HOURS))
+    if removed:
+        logger.info(f"Removed {removed} expired jobs")
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import fcntl
+import json
+import os
+import shutil
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from app.config.settings import settings
+from app.logger import setup_logger
+
+
+logger = setup_logger('recovery')
+
+# Without a durable job store interrupted jobs are unknown after a restart, so there is nothing to resume
+resume_enabled = settings.JOB_RESUME_ENABLED and settings.JOB_STORE_BACKEND == "sqlite"
+
+_MANIFEST_FILE = "job.json"
+_TOPICS_FILE = "topics.json"
+_LOCK_FILE = ".lock"
+
+_checkpointer: Optional[SqliteSaver] = None
+_checkpointer_lock = threading.Lock()
+
+
+def job_work_dir(job_id: str) -> str:
+    return os.path.join(settings.JOB_WORK_DIR, job_id)
+
+
+def job_segments_dir(job_id: str) -> str:
+    """Directory of the job's audio segments, kept until the job finished."""
+    directory = os.path.join(job_work_dir(job_id), "segments")
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def job_input_path(job_id: str, index: int) -> str:
+    """Where the job's `index`-th uploaded PDF is stored until the job finished."""
+    directory = os.path.join(job_work_dir(job_id), "inputs")
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, f"source_{index:03d}.pdf")
+
+
+def save_job_inputs(job_id: str, files: List[Tuple[str, str]], arxiv_urls: List[str], options: Dict[str, Any]) -> None:
+    """
+    Persist what's needed to run the job again: uploaded PDFs, Arxiv URLs and job options.
+
+    The PDFs are already in the work dir (see job_input_path), the manifest records them
+    with their hashes. It is written atomically, a work dir without one holds no usable inputs.
+
+    Args:
+        job_id: Job the inputs belong to
+        files: Uploaded PDFs as (path, hex SHA-256 of the content)
+        arxiv_urls: Arxiv URLs of the job
+        options: Keyword arguments of process_podcast_job
+    """
+    manifest = {
+        "files": [os.path.basename(path) for path, _ in files],
+        "sha256": [digest for _, digest in files],
+        "arxiv_urls": arxiv_urls,
+        "options": options,
+    }
+    manifest_path = os.path.join(job_work_dir(job_id), _MANIFEST_FILE)
+    with open(f"{manifest_path}.part", "w") as f:
+        json.dump(manifest, f)
+    os.replace(f"{manifest_path}.part", manifest_path)
+
+
+def load_job_inputs(job_id: str) -> Optional[Tuple[List[Tuple[str, str]], List[str], Dict[str, Any]]]:
+    """Inputs saved by save_job_inputs as (files, Arxiv URLs, options), None if there are none."""
+    directory = job_work_dir(job_id)
+    try:
+        with open(os.path.join(directory, _MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+        paths = [os.path.join(directory, "inputs", name) for name in manifest["files"]]
+        digests = manifest["sha256"]
+        missing = [path for path in paths if not os.path.isfile(path)]
+        if missing:
+            raise FileNotFoundError(f"Missing inputs: {', '.join(missing)}")
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"No usable inputs saved for job {job_id}: {str(e)}")
+        return None
+    return list(zip(paths, digests)), manifest["arxiv_urls"], manifest["options"]
+
+
+def save_job_topics(job_id: str, texts: List[str]) -> None:
+    """
+    Keep the extracted texts of a job, so a resumed job skips the extraction.
+
+    They're stored once instead of in every checkpoint of the dialogue graph.
+    """
+    path = os.path.join(job_work_dir(job_id), _TOPICS_FILE)
+    with open(f"{path}.part", "w") as f:
+        json.dump(texts, f)
+    os.replace(f"{path}.part", path)
+
+
+def load_job_topics(job_id: str) -> Optional[List[str]]:
+    """Texts saved by save_job_topics, None if there are none."""
+    try:
+        with open(os.path.join(job_work_dir(job_id), _TOPICS_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"No extracted texts saved for job {job_id}: {str(e)}")
+        return None
+
+
+def remove_job_work_dir(job_id: str) -> None:
+    shutil.rmtree(job_work_dir(job_id), ignore_errors=True)
+
+
+@contextmanager
+def claim_job(job_id: str) -> Iterator[bool]:
+    """
+    Try to become the only process working on a job, yields whether it succeeded.
+
+    The claim is an flock on a file in the job's work dir, held until the block exits.
+    The kernel releases it when the process dies, so a job claimed by a crashed process
+    can be claimed again right away.
+    """
+    directory = job_work_dir(job_id)
+    os.makedirs(directory, exist_ok=True)
+    fd = os.open(os.path.join(directory, _LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+        else:
+            yield True
+    finally:
+        os.close(fd)
+
+
+def is_job_claimed(job_id: str) -> bool:
+    """Whether some process (this one included) is working on the job right now."""
+    if not os.path.isdir(job_work_dir(job_id)):
+        return False
+    with claim_job(job_id) as claimed:
+        return not claimed
+
+
+def cleanup_work_dirs(is_stale: Callable[[str], bool]) -> int:
+    """Remove work dirs of jobs nobody works on and `is_stale(job_id)` is true for, returns the number removed."""
+    try:
+        job_ids = os.listdir(settings.JOB_WORK_DIR)
+    except FileNotFoundError:
+        return 0
+    removed = 0
+    for job_id in job_ids:
+        if not os.path.isdir(job_work_dir(job_id)) or is_job_claimed(job_id) or not is_stale(job_id):
+            continue
+        remove_job_work_dir(job_id)
+        delete_checkpoint(job_id)
+        removed += 1
+    if removed:
+        logger.info(f"Removed {removed} stale job work dirs")
+    return removed
+
+
+class LatestCheckpointSaver(SqliteSaver):
+    """
+    SqliteSaver keeping only the latest checkpoint of every thread.
+
+    Resuming only needs the latest one, older checkpoints (and the pending writes recorded
+    against them) are deleted as soon as a newer one is saved, so a job's checkpoints don't
+    pile up over its hundreds of steps.
+    """
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        next_config = super().put(config, checkpoint, metadata, new_versions)
+        key = (
+            next_config["configurable"]["thread_id"],
+            next_config["configurable"]["checkpoint_ns"],
+            next_config["configurable"]["checkpoint_id"],
+        )
+        with self.cursor() as cur:
+            cur.execute(
+                "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id != ?", key
+            )
+            cur.execute(
+                "DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id != ?", key
+            )
+        return next_config
+
+
+def get_checkpointer() -> Optional[SqliteSaver]:
+    """Checkpointer shared by the dialogue graphs of all jobs, None when resuming is disabled."""
+    global _checkpointer
+    if not resume_enabled:
+        return None
+    with _checkpointer_lock:
+        if _checkpointer is None:
+            directory = os.path.dirname(os.path.abspath(settings.JOB_CHECKPOINT_PATH))
+            os.makedirs(directory, exist_ok=True)
+            # One connection for all threads, SqliteSaver serializes access to it
+            conn = sqlite3.connect(settings.JOB_CHECKPOINT_PATH, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            _checkpointer = LatestCheckpointSaver(conn)
+            logger.info(f"Checkpointing dialogue graphs to {settings.JOB_CHECKPOINT_PATH}")
+        return _checkpointer
+
+
+def delete_checkpoint(job_id: str) -> None:
+    """Delete the checkpoints of a job's graph, including those of its topic runs (LLM_PARALLEL_TOPICS)."""
+    checkpointer = get_checkpointer()
+    if checkpointer is None:
+        return
+    try:
+        # Also creates the tables if nothing was checkpointed yet
+        checkpointer.delete_thread(job_id)
+        with checkpointer.lock:
+            topic_threads = [row[0] for row in checkpointer.conn.execute(
+                "SELECT DISTINCT thread_id FROM checkpoints WHERE thread_id LIKE ?", (f"{job_id}:%",)
+            )]
+        for thread_id in topic_threads:
+            checkpointer.delete_thread(thread_id)
+    except sqlite3.Error as e:
+        logger.warning(f"Failed to delete checkpoints of job {job_id}: {str(e)}")
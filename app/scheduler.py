@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import heapq
+import math
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from app import metrics
+from app.config.settings import settings
+from app.logger import setup_logger
+
+
+logger = setup_logger('scheduler')
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Job queue is full, retry in {retry_after} seconds")
+        self.retry_after = retry_after
+
+
+class JobScheduler:
+    """
+    Fixed pool of worker threads consuming a bounded FIFO queue of jobs.
+
+    `max_queued` bounds the jobs waiting for a worker: a job is always accepted while
+    a worker is free, so with `max_queued=0` jobs only run when a worker is free and
+    none wait. Job durations are tracked (exponential moving average) to estimate when queued
+    jobs will start.
+    """
+
+    def __init__(self, workers: int, max_queued: int, default_duration: float):
+        self.workers = max(1, workers)
+        self.max_queued = max(0, max_queued)
+        self._queue: Deque[Tuple[str, Callable, tuple, dict]] = deque()
+        self._running: Dict[str, float] = {}
+        self._condition = threading.Condition()
+        self._average_duration = float(default_duration)
+        self._threads = []
+
+    def submit(self, job_id: str, target: Callable, *args: Any, **kwargs: Any) -> int:
+        """
+        Enqueue a job.
+
+        Returns:
+            1-based position of the job in the queue
+
+        Raises:
+            QueueFullError: If no worker is free and `max_queued` jobs are already waiting
+        """
+        with self._condition:
+            # Queued jobs that free workers are about to pick up aren't waiting
+            free_workers = self.workers - len(self._running)
+            if len(self._queue) >= self.max_queued + free_workers:
+                raise QueueFullError(self._retry_after())
+            self._queue.append((job_id, target, args, kwargs))
+            self._ensure_workers()
+            self._condition.notify()
+            return len(self._queue)
+
+    def position(self, job_id: str) -> Optional[int]:
+        """1-based queue position of a job, None if it isn't queued."""
+        with self._condition:
+            for index, (queued_id, *_) in enumerate(self._queue):
+                if queued_id == job_id:
+                    return index + 1
+        return None
+
+    def estimated_start(self, job_id: str) -> Optional[datetime]:
+        """Estimated start time of a queued job, None if it isn't queued."""
+        with self._condition:
+            position = next(
+                (index + 1 for index, (queued_id, *_) in enumerate(self._queue) if queued_id == job_id),
+                None,
+            )
+            if position is None:
+                return None
+            wait = self._estimated_wait(position)
+        return datetime.now(timezone.utc) + timedelta(seconds=wait)
+
+    def queue_depth(self) -> int:
+        with self._condition:
+            return len(self._queue)
+
+    def active_jobs(self) -> int:
+        with self._condition:
+            return len(self._running)
+
+    def _estimated_wait(self, position: int) -> float:
+        # Simulate workers picking jobs: each worker frees up when its current job is
+        # expected to end, and every queued job ahead takes an average duration
+        now = time.monotonic()
+        available = [max(0.0, self._average_duration - (now - started)) for started in self._running.values()]
+        available += [0.0] * (self.workers - len(available))
+        heapq.heapify(available)
+        start = 0.0
+        for _ in range(position):
+            start = heapq.heappop(available)
+            heapq.heappush(available, start + self._average_duration)
+        return start
+
+    def _retry_after(self) -> int:
+        # Roughly when the head of the queue starts, freeing a slot
+        return max(1, math.ceil(self._estimated_wait(1)))
+
+    def _ensure_workers(self) -> None:
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(
+                target=self._work, name=f"job-worker-{len(self._threads)}", daemon=True
+            )
+            self._threads.append(thread)
+            thread.start()
+
+    def _work(self) -> None:
+        while True:
+            with self._condition:
+                while not self._queue:
+                    self._condition.wait()
+                job_id, target, args, kwargs = self._queue.popleft()
+                self._running[job_id] = time.monotonic()
+
+            logger.info(f"Job {job_id} started ({self.queue_depth()} still queued)")
+            try:
+                target(*args, **kwargs)
+            except Exception as e:
+                logger.error(f"Unhandled error in job {job_id}: {str(e)}", exc_info=True)
+            finally:
+                with self._condition:
+                    duration = time.monotonic() - self._running.pop(job_id)
+                    self._average_duration = 0.8 * self._average_duration + 0.2 * duration
+                logger.info(f"Job {job_id} finished in {duration:.1f}s")
+
+
+scheduler = JobScheduler(
+    workers=settings.JOB_WORKERS,
+    max_queued=settings.JOB_QUEUE_SIZE,
+    default_duration=settings.JOB_ESTIMATED_DURATION,
+)
+
+# Read at scrape time, nothing to update on the hot path
+metrics.QUEUE_DEPTH.set_function(scheduler.queue_depth)
+metrics.ACTIVE_JOBS.set_function(scheduler.active_jobs)
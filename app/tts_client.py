@@ -1,15 +1,93 @@
 import requests
+import io
 import os
-from typing import List
+import re
+import threading
+import time
+import wave
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, List, Optional
+from pydub import AudioSegment
+from requests.adapters import HTTPAdapter
+from app import metrics
 from app.config.settings import settings
+from app.disk_cache import DiskCache
+from app.load_balancer import Endpoint, create_balancer, is_endpoint_failure
 from app.logger import setup_logger
 from app.progress import increment_progress
 
 logger = setup_logger('tts_client')
 
+# Synthesized audio shared by all jobs (and processes pointing at the same directory)
+tts_cache = DiskCache(
+    "tts",
+    settings.TTS_CACHE_DIR,
+    settings.TTS_CACHE_MAX_BYTES,
+) if settings.TTS_CACHE_ENABLED else None
+
+
+# Replicas of the TTS server shared by all jobs, see TTS_API_HOSTS
+tts_balancer = create_balancer("tts", settings.TTS_API_HOSTS, settings.TTS_HEALTH_PATH)
+
+
+def tts_cache_key(voice: str, text: str, response_format: str) -> str:
+    """Cache key of a synthesized line, whitespace differences in the text don't matter."""
+    normalized_text = re.sub(r"\s+", " ", text).strip()
+    return DiskCache.make_key(settings.TTS_MODEL, voice, normalized_text, response_format)
+
+
+def voice_for(speaker: str) -> str:
+    return settings.HOST_A_VOICE if speaker == "HOST_A" else settings.HOST_B_VOICE
+
+
+class SentenceStreamSynthesizer:
+    """
+    Synthesizes dialogue lines sentence by sentence while the LLM is still writing them.
+
+    Used as the sentence sink of LLMClient.stream_podcast_script: every sentence is sent
+    to TTS as soon as it arrives. When the finished line reaches generate_audio_segment,
+    its audio is assembled from the sentence audio (in order) instead of synthesizing
+    the whole line again.
+    """
+
+    def __init__(self, tts_client: "TTSClient", job_id: str):
+        self.tts_client = tts_client
+        self._executor = ThreadPoolExecutor(
+            max_workers=tts_client.concurrency, thread_name_prefix=f"tts-sentences-{job_id}"
+        )
+        self._sentences: Dict[int, List[Future]] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, line_index: int, speaker: str, sentence: str) -> None:
+        with self._lock:
+            parts = self._sentences.setdefault(line_index, [])
+            parts.append(self._executor.submit(
+                self.tts_client.synthesize, voice_for(speaker), sentence, f"{line_index}.{len(parts)}"
+            ))
+
+    def take(self, line_index: int) -> List[Future]:
+        """Sentence audio of a line, in order (empty if the line wasn't streamed)."""
+        with self._lock:
+            return self._sentences.pop(line_index, [])
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            self._sentences.clear()
+
+
 class TTSClient:
-    def __init__(self):
-        self.endpoint = f"{settings.TTS_API_HOST}{settings.TTS_API_PATH}"
+    def __init__(self, job_id: Optional[str] = None):
+        self.job_id = job_id
+        self.concurrency = max(1, settings.TTS_CONCURRENCY)
+        self.sentence_stream: Optional[SentenceStreamSynthesizer] = None
+
+        # Keep-alive session with enough pooled connections for every in-flight request
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(tts_balancer.endpoints), pool_maxsize=self.concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
         if settings.TTS_WAKEUP_ENDPOINT:
             try:
                 requests.get(
@@ -18,15 +96,39 @@ class TTSClient:
                 )
             except Exception:
                 pass
+        if settings.TTS_HEALTH_PATH:
+            # Wakes up every replica and ejects the ones that are down before the first request
+            tts_balancer.probe()
+
+    def start_sentence_stream(self, job_id: str) -> SentenceStreamSynthesizer:
+        """Synthesize lines sentence by sentence from now on, returns the sentence sink for the LLM."""
+        self.sentence_stream = SentenceStreamSynthesizer(self, job_id)
+        return self.sentence_stream
 
-    def generate_audio_segments(self, dialogue: List[dict], job_id: str, temp_dir: str) -> List[str]:
+    def close(self) -> None:
+        if self.sentence_stream is not None:
+            self.sentence_stream.close()
+            self.sentence_stream = None
+
+    def generate_audio_segments(
+        self,
+        dialogue: Iterable[dict],
+        job_id: str,
+        temp_dir: str,
+        total: Optional[int] = None,
+        on_segment: Optional[Callable[[int, Optional[str]], None]] = None,
+    ) -> List[str]:
         """
         Generate audio segments for each dialogue line using TTS.
 
         Args:
-            dialogue: List of dialogue segments with speaker and text
+            dialogue: Dialogue segments with speaker and text. May be a lazy iterator
+                (e.g. lines streamed from the LLM) in which case `total` should be given
             job: Job process
             temp_dir: Temporary directory path for storing audio segments
+            total: Expected number of dialogue lines, used for progress (defaults to len(dialogue))
+            on_segment: Called as on_segment(index, filepath) as soon as a line's audio is
+                ready (filepath is None for lines without audio), possibly out of order
 
         Returns:
             List of file paths to generated audio segments
@@ -35,60 +137,261 @@ class TTSClient:
             Exception: If TTS request fails
         """
 
-        audio_files = []
-        progress_increment = 40 / len(dialogue) if dialogue else 0
+        if total is None:
+            total = len(dialogue)
+        progress_increment = 40 / total if total else 0
 
-        for i, segment in enumerate(dialogue):
-            speaker = segment["speaker"]
-            text = segment["text"]
+        if self.concurrency > 1:
+            return self._generate_audio_segments_concurrently(
+                dialogue, job_id, temp_dir, progress_increment, on_segment
+            )
 
-            if not text.strip():
+        audio_files = []
+        for i, segment in enumerate(dialogue):
+            filepath = self.generate_audio_segment(i, segment, temp_dir)
+            if on_segment is not None:
+                on_segment(i, filepath)
+            if filepath is None:
                 continue
 
-            # Select parameters based on speaker
-            voice = settings.HOST_A_VOICE if speaker == "HOST_A" else settings.HOST_B_VOICE
-            
-            # Prepare the payload for TTS API
-            # Combination between OpenAI payload and TTS payload
-            payload = {
-                "model": settings.TTS_MODEL,  # Use configured model
-                "input": text,
-                "voice": voice,
-                "response_format": "wav",
-            }
+            audio_files.append(filepath)
+            if job_id and progress_increment:
+                increment_progress(job_id, progress_increment)
+
+        return audio_files
+
+    def _generate_audio_segments_concurrently(
+        self,
+        dialogue: Iterable[dict],
+        job_id: str,
+        temp_dir: str,
+        progress_increment: float,
+        on_segment: Optional[Callable[[int, Optional[str]], None]] = None,
+    ) -> List[str]:
+        """
+        Generate audio segments with up to TTS_CONCURRENCY requests in flight.
+
+        Lines are pulled from `dialogue` lazily, only when a request slot is free.
+        Progress advances as segments complete, and the result is returned in dialogue
+        order. The first failure cancels everything still queued, waits for the requests
+        already in flight (so none writes a segment after the job cleaned up its work dir)
+        and is re-raised.
+        """
+        results: Dict[int, Optional[str]] = {}
+        pending: Dict[Future, int] = {}
+        executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix=f"tts-{job_id}")
+
+        def synthesize(index: int, segment: dict) -> Optional[str]:
+            filepath = self.generate_audio_segment(index, segment, temp_dir)
+            # Reported from the TTS thread, so it isn't held back while the next line is generated
+            if on_segment is not None:
+                on_segment(index, filepath)
+            if filepath is not None and job_id and progress_increment:
+                increment_progress(job_id, progress_increment)
+            return filepath
+
+        def collect(done) -> None:
+            for future in done:
+                index = pending.pop(future)
+                # Raises the segment's error, which cancels the rest in the finally below
+                results[index] = future.result()
+
+        try:
+            for i, segment in enumerate(dialogue):
+                # Pulling a streamed line waited for the LLM, fail fast on segments that failed meanwhile
+                collect([future for future in pending if future.done()])
+                while len(pending) >= self.concurrency:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+                pending[executor.submit(synthesize, i, segment)] = i
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        return [results[i] for i in sorted(results) if results[i] is not None]
+
+    def generate_audio_segment(self, index: int, segment: dict, temp_dir: str) -> Optional[str]:
+        """
+        Generate the audio for a single dialogue line.
+
+        The segment file is named after the line's position and text and written atomically,
+        so a resumed job reuses audio already in `temp_dir` for every line it didn't change.
 
+        Args:
+            index: Position of the line in the dialogue (used for the segment filename)
+            segment: Dialogue segment with speaker and text
+            temp_dir: Directory of the job's audio segments
+
+        Returns:
+            File path of the generated audio segment, or None if the line is empty
+
+        Raises:
+            Exception: If TTS request fails
+        """
+        speaker = segment["speaker"]
+        text = segment["text"]
+
+        if not text.strip():
+            return None
+
+        started = time.perf_counter()
+
+        def observe(result: str) -> None:
+            metrics.TTS_SEGMENT_SECONDS.labels(result=result).observe(time.perf_counter() - started)
+            duration = metrics.wav_duration(filepath)
+            if duration is not None:
+                metrics.TTS_AUDIO_SECONDS.observe(duration)
+
+        # Select parameters based on speaker
+        voice = voice_for(speaker)
+
+        filename = f"segment_{index+1:03d}.wav"
+        cache_key = tts_cache_key(voice, text, "wav")
+        filepath = os.path.join(temp_dir, f"segment_{index+1:03d}_{cache_key[:16]}.wav")
+        partial_path = f"{filepath}.part"
+
+        # Lines streamed sentence by sentence are assembled from their sentence audio
+        sentence_parts = self.sentence_stream.take(index) if self.sentence_stream is not None else []
+
+        if os.path.exists(filepath):
+            logger.debug(f"Reusing audio of segment {index} from an earlier run of the job")
+            return filepath
+
+        if sentence_parts:
             try:
-                # Send request to TTS endpoint
-                response = requests.post(
-                    self.endpoint,
-                    json=payload,
-                    timeout=settings.TTS_TIMEOUT
-                )
+                self._concatenate_wavs([part.result() for part in sentence_parts], partial_path)
+            except Exception as e:
+                raise Exception(f"Error generating audio for segment {index}: {str(e)}")
+            os.replace(partial_path, filepath)
+            observe("sentences")
+            self._write_debug_copy(filename, filepath)
+            return filepath
 
-                response.raise_for_status()
+        if tts_cache is not None and tts_cache.materialize(cache_key, partial_path, ".wav"):
+            os.replace(partial_path, filepath)
+            logger.debug(f"TTS cache hit for segment {index}")
+            observe("cache")
+            return filepath
 
-                # Save the audio file
-                filename = f"segment_{i+1:03d}.wav"
-                filepath = os.path.join(temp_dir, filename)
+        content = self._request_speech(voice, text, index)
 
-                # Save the audio data
-                with open(filepath, "wb") as f:
-                    f.write(response.content)
+        # Save the audio data
+        with open(partial_path, "wb") as f:
+            f.write(content)
+        os.replace(partial_path, filepath)
 
-                # Write debug to file in tmp
-                if settings.DEBUG:
-                    os.makedirs(settings.DEBUG_DIR, exist_ok=True)
-                    file_path = os.path.join(settings.DEBUG_DIR, filename)
-                    with open(file_path, "wb") as f:
-                        f.write(response.content)
+        if tts_cache is not None:
+            try:
+                tts_cache.put_bytes(cache_key, content, ".wav")
+            except OSError as e:
+                logger.warning(f"Failed to store segment {index} in TTS cache: {str(e)}")
+
+        observe("tts")
+        self._write_debug_copy(filename, filepath)
+        return filepath
+
+    def synthesize(self, voice: str, text: str, label: str) -> bytes:
+        """
+        Synthesize a piece of text (e.g. a single sentence) with the given voice.
+
+        Args:
+            voice: TTS voice
+            text: Text to synthesize
+            label: Name of the piece in logs and errors
+
+        Returns:
+            WAV audio, served from the TTS cache when available
+
+        Raises:
+            Exception: If TTS request fails
+        """
+        cache_key = None
+        if tts_cache is not None:
+            cache_key = tts_cache_key(voice, text, "wav")
+            cached = tts_cache.get_bytes(cache_key, ".wav")
+            if cached is not None:
+                logger.debug(f"TTS cache hit for segment {label}")
+                return cached
+
+        content = self._request_speech(voice, text, label)
+        if cache_key is not None:
+            try:
+                tts_cache.put_bytes(cache_key, content, ".wav")
+            except OSError as e:
+                logger.warning(f"Failed to store segment {label} in TTS cache: {str(e)}")
+        return content
 
-                audio_files.append(filepath)
-                if job_id and progress_increment:
-                    increment_progress(job_id, progress_increment)
+    def _request_speech(self, voice: str, text: str, label) -> bytes:
+        # Prepare the payload for TTS API
+        # Combination between OpenAI payload and TTS payload
+        payload = {
+            "model": settings.TTS_MODEL,  # Use configured model
+            "input": text,
+            "voice": voice,
+            "response_format": "wav",
+        }
+
+        tried: List[Endpoint] = []
+        while True:
+            try:
+                with tts_balancer.request(self._routing_key(voice), exclude=tried) as endpoint:
+                    tried.append(endpoint)
+                    # Send request to TTS endpoint
+                    response = self.session.post(
+                        f"{endpoint.url}{settings.TTS_API_PATH}",
+                        json=payload,
+                        timeout=settings.TTS_TIMEOUT
+                    )
+                    response.raise_for_status()
+                    return response.content
 
             except requests.exceptions.RequestException as e:
-                raise Exception(f"TTS API request failed for segment {i}: {str(e)}")
+                # Retry once on another replica
+                if len(tried) < min(2, len(tts_balancer.endpoints)) and is_endpoint_failure(e):
+                    logger.warning(f"TTS request to {tried[-1].url} failed for segment {label}, retrying on another replica: {str(e)}")
+                    continue
+                raise Exception(f"TTS API request failed for segment {label}: {str(e)}")
             except Exception as e:
-                raise Exception(f"Error generating audio for segment {i}: {str(e)}")
+                raise Exception(f"Error generating audio for segment {label}: {str(e)}")
+
+    def _routing_key(self, voice: str) -> Optional[str]:
+        if settings.TTS_STICKY_ROUTING == "voice":
+            return voice
+        if settings.TTS_STICKY_ROUTING == "job":
+            return self.job_id
+        return None
+
+    @staticmethod
+    def _concatenate_wavs(parts: List[bytes], filepath: str) -> None:
+        """Write WAV parts back to back into one file."""
+        try:
+            with wave.open(filepath, "wb") as output:
+                params = None
+                for part in parts:
+                    with wave.open(io.BytesIO(part), "rb") as wav_part:
+                        part_params = (wav_part.getnchannels(), wav_part.getsampwidth(), wav_part.getframerate())
+                        if params is None:
+                            params = part_params
+                            output.setnchannels(params[0])
+                            output.setsampwidth(params[1])
+                            output.setframerate(params[2])
+                        elif part_params != params:
+                            raise wave.Error(f"Mismatched WAV parameters {part_params} != {params}")
+                        output.writeframes(wav_part.readframes(wav_part.getnframes()))
+        except (wave.Error, EOFError):
+            # Let ffmpeg sort out unusual WAV headers and mismatched formats
+            combined = AudioSegment.empty()
+            for part in parts:
+                combined += AudioSegment.from_file(io.BytesIO(part), format="wav")
+            combined.export(filepath, format="wav")
 
-        return audio_files
\ No newline at end of file
+    @staticmethod
+    def _write_debug_copy(filename: str, filepath: str) -> None:
+        # Write debug to file in tmp
+        if settings.DEBUG:
+            os.makedirs(settings.DEBUG_DIR, exist_ok=True)
+            with open(filepath, "rb") as source, open(os.path.join(settings.DEBUG_DIR, filename), "wb") as f:
+                f.write(source.read())
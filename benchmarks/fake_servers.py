@@ -0,0 +1,311 @@
+"""
+Local stand-ins for the OpenAI-compatible LLM and TTS servers used by the benchmarks.
+
+Both servers are deterministic: a chat reply only depends on the request, and speech
+audio only depends on the input text, so two benchmark runs send and receive the same
+bytes. Latency is simulated from the request size, not measured from real hardware:
+
+- Chat: ttft + prompt_tokens / prefill_rate before the first token, then one token every
+  1 / token_rate seconds (streamed as server-sent events when the client asks for it).
+- Speech: base latency + audio_seconds / realtime_factor, returning a mono 16-bit WAV
+  whose length follows the number of words (words_per_minute).
+"""
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import random
+import threading
+import time
+import wave
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+# Vocabulary of the generated replies, sentences end with varied punctuation so that
+# sentence streaming gets realistic cut points
+_WORDS = (
+    "model data training results paper method attention layer network benchmark latency "
+    "memory scale tokens inference accuracy dataset baseline experiment approach signal "
+    "really interesting point actually think means because however which that this we "
+    "they would could should also more less than the a of in on for with to and is are"
+).split()
+_SENTENCE_ENDS = (".", ".", ".", "?", "!")
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+def generate_reply(seed: bytes, tokens: int) -> List[str]:
+    """Deterministic reply of `tokens` words (one word per token), as streamed pieces."""
+    rng = random.Random(hashlib.sha256(seed).digest())
+    pieces = []
+    sentence_length = 0
+    for i in range(tokens):
+        word = rng.choice(_WORDS)
+        if sentence_length == 0:
+            word = word.capitalize()
+        sentence_length += 1
+        if sentence_length >= rng.randint(8, 16) or i == tokens - 1:
+            word += rng.choice(_SENTENCE_ENDS)
+            sentence_length = 0
+        pieces.append(word if i == 0 else " " + word)
+    return pieces
+
+
+class FakeServerStats:
+    """Request counters of a fake server, read by the benchmark after each scenario."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+
+    def add(self, **values: float) -> None:
+        with self._lock:
+            for name, value in values.items():
+                self._counters[name] = self._counters.get(name, 0) + value
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._counters)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _send(self, status: int, content_type: str, body: bytes) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, payload: Dict[str, Any], status: int = 200) -> None:
+        self._send(status, "application/json", json.dumps(payload).encode())
+
+    def do_GET(self):
+        if self.path in ("/health", "/v1/models"):
+            self._send_json({"status": "ok", "data": []})
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+
+class FakeChatHandler(_Handler):
+    """POST /v1/chat/completions, streaming and non-streaming."""
+
+    server: "FakeServer"
+
+    def do_POST(self):
+        if not self.path.endswith("/chat/completions"):
+            self._send_json({"error": "not found"}, status=404)
+            return
+        body = self._read_json()
+        config = self.server.config
+        messages = body.get("messages", [])
+        prompt_text = "".join(str(message.get("content", "")) for message in messages)
+        prompt_tokens = estimate_tokens(prompt_text)
+
+        # Topic summaries are much longer than host turns, they are told apart by the
+        # default LLM_SUMMARY_SYSTEM_PROMPT (host prompts mention summaries too)
+        system_text = str(messages[0].get("content", "")) if messages else ""
+        is_summary = "summarization assistant" in system_text.lower()
+        completion_tokens = config["summary_tokens"] if is_summary else config["reply_tokens"]
+        pieces = generate_reply(json.dumps(messages, sort_keys=True).encode(), completion_tokens)
+
+        self.server.stats.add(
+            requests=1,
+            summary_requests=int(is_summary),
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+        )
+
+        time.sleep(config["ttft"] + prompt_tokens / config["prefill_rate"])
+        token_delay = 1.0 / config["token_rate"]
+        created = int(time.time())
+        model = body.get("model", "fake")
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+        if not body.get("stream"):
+            time.sleep(token_delay * completion_tokens)
+            self._send_json({
+                "id": "chatcmpl-fake",
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(pieces)},
+                    "finish_reason": "stop",
+                }],
+                "usage": usage,
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def event(choices: List[Dict[str, Any]], **extra: Any) -> None:
+            payload = {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": choices,
+                **extra,
+            }
+            self._write_chunk(f"data: {json.dumps(payload)}\n\n".encode())
+
+        event([{"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}])
+        for piece in pieces:
+            time.sleep(token_delay)
+            event([{"index": 0, "delta": {"content": piece}, "finish_reason": None}])
+        event([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+        if (body.get("stream_options") or {}).get("include_usage"):
+            event([], usage=usage)
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+
+class FakeSpeechHandler(_Handler):
+    """POST /v1/audio/speech, answers with a WAV tone as long as the text would take to read."""
+
+    server: "FakeServer"
+
+    def do_POST(self):
+        if not self.path.endswith("/audio/speech"):
+            self._send_json({"error": "not found"}, status=404)
+            return
+        body = self._read_json()
+        config = self.server.config
+        text = str(body.get("input", ""))
+        words = max(1, len(text.split()))
+        audio_seconds = words * 60.0 / config["words_per_minute"]
+
+        self.server.stats.add(requests=1, audio_seconds=audio_seconds)
+        time.sleep(config["latency"] + audio_seconds / config["realtime_factor"])
+        self._send(200, "audio/wav", self._wav(audio_seconds, body.get("voice", "")))
+
+    def _wav(self, seconds: float, voice: str) -> bytes:
+        sample_rate = self.server.config["sample_rate"]
+        # Each voice gets its own pitch, loudness differs a little so normalization has work to do
+        digest = hashlib.sha256(voice.encode()).digest()
+        frequency = 110 + digest[0]
+        amplitude = 3000 + digest[1] * 20
+        t = np.arange(int(seconds * sample_rate)) / sample_rate
+        samples = (amplitude * np.sin(2 * np.pi * frequency * t)).astype("<i2")
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(sample_rate)
+            wav_file.writeframes(samples.tobytes())
+        return buffer.getvalue()
+
+
+class FakeServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, handler, config: Dict[str, Any], host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), handler)
+        self.config = config
+        self.stats = FakeServerStats()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeServer":
+        self._thread = threading.Thread(target=self.serve_forever, name=self.RequestHandlerClass.__name__, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+def start_fake_llm(
+    *,
+    ttft: float = 0.05,
+    prefill_rate: float = 4000.0,
+    token_rate: float = 150.0,
+    reply_tokens: int = 48,
+    summary_tokens: int = 400,
+    port: int = 0,
+) -> FakeServer:
+    """Start the fake chat completions server in a background thread."""
+    return FakeServer(FakeChatHandler, {
+        "ttft": ttft,
+        "prefill_rate": prefill_rate,
+        "token_rate": token_rate,
+        "reply_tokens": reply_tokens,
+        "summary_tokens": summary_tokens,
+    }, port=port).start()
+
+
+def start_fake_tts(
+    *,
+    latency: float = 0.05,
+    realtime_factor: float = 20.0,
+    words_per_minute: float = 160.0,
+    sample_rate: int = 24000,
+    port: int = 0,
+) -> FakeServer:
+    """Start the fake speech server in a background thread."""
+    return FakeServer(FakeSpeechHandler, {
+        "latency": latency,
+        "realtime_factor": realtime_factor,
+        "words_per_minute": words_per_minute,
+        "sample_rate": sample_rate,
+    }, port=port).start()
+
+
+def serve_forever(servers: Tuple[FakeServer, ...]) -> None:
+    for server in servers:
+        print(f"{server.RequestHandlerClass.__name__} listening on {server.url}", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for server in servers:
+            server.stop()
+
+
+if __name__ == "__main__":
+    # Run the stand-ins on their own, e.g. to point a development server at them:
+    #   python -m benchmarks.fake_servers 8101 8102
+    #   LLM_API_HOST=http://127.0.0.1:8101 TTS_API_HOST=http://127.0.0.1:8102 uvicorn app.main:app
+    import sys
+
+    llm_port = int(sys.argv[1]) if len(sys.argv) > 1 else 8101
+    tts_port = int(sys.argv[2]) if len(sys.argv) > 2 else 8102
+    serve_forever((start_fake_llm(port=llm_port), start_fake_tts(port=tts_port)))
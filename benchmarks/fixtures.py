@@ -0,0 +1,114 @@
+"""
+Fixture PDFs for the benchmarks.
+
+The papers are generated rather than checked in: plain text-layer PDFs (no fonts or
+images to embed) with deterministic, paper-shaped content, so every checkout and every
+run extracts exactly the same text. Each seed gives a different paper, which keeps the
+extraction and summary caches from serving one scenario's job with another's results.
+"""
+from __future__ import annotations
+
+import os
+import random
+import textwrap
+from typing import List, Tuple
+
+from benchmarks.fake_servers import _WORDS
+
+
+_SECTIONS = ("Abstract", "Introduction", "Related Work", "Method", "Experiments", "Results", "Discussion", "Conclusion")
+_LINES_PER_PAGE = 52
+_CHARS_PER_LINE = 92
+
+
+def paper_text(seed: int, paragraphs_per_section: int = 3) -> Tuple[str, List[Tuple[str, List[str]]]]:
+    """Title and (heading, paragraphs) sections of a deterministic fake paper."""
+    rng = random.Random(seed)
+    title = " ".join(word.capitalize() for word in rng.sample(_WORDS, 6))
+    sections = []
+    for heading in _SECTIONS:
+        paragraphs = []
+        for _ in range(paragraphs_per_section):
+            sentences = []
+            for _ in range(rng.randint(4, 8)):
+                words = [rng.choice(_WORDS) for _ in range(rng.randint(10, 22))]
+                sentences.append(" ".join(words).capitalize() + ".")
+            paragraphs.append(" ".join(sentences))
+        sections.append((heading, paragraphs))
+    return title, sections
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(seed: int, paragraphs_per_section: int = 3) -> bytes:
+    """A fake paper as PDF bytes (Helvetica text, US letter pages)."""
+    title, sections = paper_text(seed, paragraphs_per_section)
+
+    # (font size, text) per line, headings are larger and separated by blank lines
+    lines: List[Tuple[int, str]] = [(18, title), (10, "")]
+    for number, (heading, paragraphs) in enumerate(sections, start=1):
+        lines += [(10, ""), (13, f"{number}. {heading}"), (10, "")]
+        for paragraph in paragraphs:
+            lines += [(10, line) for line in textwrap.wrap(paragraph, _CHARS_PER_LINE)]
+            lines.append((10, ""))
+    pages = [lines[i:i + _LINES_PER_PAGE] for i in range(0, len(lines), _LINES_PER_PAGE)]
+
+    objects: List[bytes] = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    catalog = add(b"")  # filled in once the page tree exists
+    page_tree = add(b"")
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    page_ids = []
+    for page in pages:
+        stream = ["BT", "50 742 Td", "14 TL"]
+        for size, text in page:
+            stream.append(f"/F1 {size} Tf ({_escape(text)}) Tj T*")
+        stream.append("ET")
+        content = "\n".join(stream).encode("latin-1")
+        content_id = add(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content))
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (page_tree, font, content_id)
+        ))
+    objects[catalog - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % page_tree
+    objects[page_tree - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % page_id for page_id in page_ids), len(page_ids)
+    )
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog, xref)
+    return bytes(output)
+
+
+def write_fixtures(directory: str, count: int, first_seed: int = 1) -> List[str]:
+    """Write `count` fixture papers to `directory`, returns their paths."""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for seed in range(first_seed, first_seed + count):
+        path = os.path.join(directory, f"paper_{seed:03d}.pdf")
+        with open(path, "wb") as f:
+            f.write(make_pdf(seed))
+        paths.append(path)
+    return paths
+
+
+if __name__ == "__main__":
+    # python -m benchmarks.fixtures <directory> [count]
+    import sys
+
+    target = sys.argv[1] if len(sys.argv) > 1 else "benchmarks/fixtures"
+    for written in write_fixtures(target, int(sys.argv[2]) if len(sys.argv) > 2 else 3):
+        print(written)
@@ -0,0 +1,422 @@
+"""
+Offline end-to-end benchmark of the podcast pipeline.
+
+Every scenario starts a fresh API server (uvicorn, as deployed) with cold caches in a
+temporary directory, pointed at the local fake LLM and TTS servers, submits its jobs
+through the HTTP API and waits for them to finish. Per-stage timings come from the
+server's own /metrics histograms, so the benchmark measures exactly what production
+reports. The result is printed (and optionally written) as JSON:
+
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --scenario concurrent --jobs 8 --env JOB_WORKERS=4
+
+The fake servers' latencies are fixed and their output is deterministic, so two runs of
+the same options on the same machine are comparable between commits.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+from prometheus_client.parser import text_string_to_metric_families
+
+from benchmarks.fake_servers import FakeServer, start_fake_llm, start_fake_tts
+from benchmarks.fixtures import make_pdf
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Jobs of each scenario, as the fixture seeds of the papers of every job. Seeds are never
+# shared between scenarios or jobs, so no job is served from another job's cache entries.
+SCENARIOS = {
+    "single": lambda jobs: [[1]],
+    "multi": lambda jobs: [[2, 3, 4]],
+    "concurrent": lambda jobs: [[10 + i] for i in range(jobs)],
+}
+WARMUP_SEED = 99
+
+POLL_INTERVAL = 0.1
+RSS_SAMPLE_INTERVAL = 0.25
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _percentile(values: List[float], percent: float) -> Optional[float]:
+    """Nearest-rank percentile."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def _git(*args: str) -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", *args], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class ProcessTreeSampler:
+    """Samples the summed RSS of a process and its descendants (Linux /proc) in the background."""
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+        self._page_size = os.sysconf("SC_PAGE_SIZE")
+
+    def __enter__(self) -> "ProcessTreeSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(RSS_SAMPLE_INTERVAL):
+            self.peak_bytes = max(self.peak_bytes, self.current_bytes())
+
+    def _tree(self) -> List[int]:
+        children: Dict[int, List[int]] = {}
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    # The command name may contain spaces, fields after it are fixed
+                    parent = int(f.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            children.setdefault(parent, []).append(int(entry))
+        tree, stack = [], [self.pid]
+        while stack:
+            pid = stack.pop()
+            tree.append(pid)
+            stack.extend(children.get(pid, []))
+        return tree
+
+    def current_bytes(self) -> int:
+        total = 0
+        for pid in self._tree():
+            try:
+                with open(f"/proc/{pid}/statm") as f:
+                    total += int(f.read().split()[1]) * self._page_size
+            except (OSError, IndexError, ValueError):
+                continue
+        return total
+
+    def server_peak_bytes(self) -> Optional[int]:
+        """Peak RSS of the server process itself, as tracked by the kernel."""
+        try:
+            with open(f"/proc/{self.pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            pass
+        return None
+
+
+class ApiServer:
+    """The podcast API in a uvicorn subprocess, with all state in `work_dir`."""
+
+    def __init__(self, work_dir: str, llm: FakeServer, tts: FakeServer, exchanges: int, overrides: Dict[str, str]):
+        self.port = _free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.log_path = os.path.join(work_dir, "server.log")
+        env = dict(os.environ)
+        env.pop("TTS_WAKEUP_ENDPOINT", None)
+        env.update({
+            "PYTHONPATH": REPO_ROOT,
+            "LOGLEVEL": "WARNING",
+            "DEBUG": "False",
+            "DEBUG_DIR": os.path.join(work_dir, "debug"),
+            "LLM_API_HOST": llm.url,
+            "TTS_API_HOST": tts.url,
+            "OPENAI_API_KEY": "not-needed",
+            "TOPIC_EXCHANGE_MIN": str(exchanges),
+            "TOPIC_EXCHANGE_MAX": str(exchanges),
+            "AUDIO_STORAGE_PATH": os.path.join(work_dir, "audio"),
+            "JOB_STORE_PATH": os.path.join(work_dir, "jobs.db"),
+            "JOB_WORK_DIR": os.path.join(work_dir, "work"),
+            "JOB_CHECKPOINT_PATH": os.path.join(work_dir, "checkpoints.db"),
+            "TTS_CACHE_DIR": os.path.join(work_dir, "cache", "tts"),
+            "EXTRACTION_CACHE_DIR": os.path.join(work_dir, "cache", "extraction"),
+            "ARXIV_CACHE_DIR": os.path.join(work_dir, "cache", "arxiv"),
+            "LLM_SUMMARY_CACHE_DIR": os.path.join(work_dir, "cache", "summary"),
+        })
+        env.update(overrides)
+        self._log = open(self.log_path, "wb")
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+             "--port", str(self.port), "--log-level", "warning"],
+            cwd=REPO_ROOT, env=env, stdout=self._log, stderr=subprocess.STDOUT,
+        )
+
+    def wait_ready(self, timeout: float) -> None:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"API server exited with code {self.process.returncode}, see {self.log_path}")
+            try:
+                if requests.get(f"{self.url}/health", timeout=1).ok:
+                    return
+            except requests.RequestException:
+                pass
+            time.sleep(0.2)
+        raise RuntimeError(f"API server did not start within {timeout}s, see {self.log_path}")
+
+    def stop(self) -> None:
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self._log.close()
+
+    def submit(self, seeds: List[int]) -> str:
+        files = [("files", (f"paper_{seed:03d}.pdf", make_pdf(seed), "application/pdf")) for seed in seeds]
+        response = requests.post(f"{self.url}/api/v1/podcasts", files=files, timeout=60)
+        response.raise_for_status()
+        return response.json()["job_id"]
+
+    def status(self, job_id: str) -> Dict[str, Any]:
+        response = requests.get(f"{self.url}/api/v1/podcasts/status/{job_id}", timeout=10)
+        response.raise_for_status()
+        return response.json()
+
+    def metrics(self) -> str:
+        response = requests.get(f"{self.url}/metrics", timeout=10)
+        response.raise_for_status()
+        return response.text
+
+
+def run_jobs(server: ApiServer, jobs: List[List[int]], timeout: float) -> List[Dict[str, Any]]:
+    """Submit all jobs at once and wait until each one completed or failed."""
+    submitted = {}
+    for seeds in jobs:
+        submitted_at = time.perf_counter()
+        submitted[server.submit(seeds)] = (submitted_at, len(seeds))
+
+    results = []
+    deadline = time.perf_counter() + timeout
+    while submitted:
+        if time.perf_counter() > deadline:
+            raise RuntimeError(f"{len(submitted)} jobs still running after {timeout}s")
+        time.sleep(POLL_INTERVAL)
+        for job_id in list(submitted):
+            status = server.status(job_id)
+            if status["status"] not in ("completed", "failed"):
+                continue
+            submitted_at, sources = submitted.pop(job_id)
+            results.append({
+                "job_id": job_id,
+                "sources": sources,
+                "status": status["status"],
+                "latency_seconds": time.perf_counter() - submitted_at,
+                "error": status.get("error"),
+            })
+    return results
+
+
+def histogram_totals(metrics_text: str) -> Dict[Tuple[str, str], Tuple[float, float]]:
+    """(count, sum) of every podcast_* histogram series, keyed by (metric, labels)."""
+    totals: Dict[Tuple[str, str], List[float]] = {}
+    for family in text_string_to_metric_families(metrics_text):
+        if family.type != "histogram" or not family.name.startswith("podcast_"):
+            continue
+        for sample in family.samples:
+            if sample.name.endswith("_count"):
+                field = 0
+            elif sample.name.endswith("_sum"):
+                field = 1
+            else:
+                continue
+            labels = ",".join(f"{k}={v}" for k, v in sorted(sample.labels.items()))
+            totals.setdefault((family.name, labels or "all"), [0.0, 0.0])[field] = sample.value
+    return {key: (count, total) for key, (count, total) in totals.items()}
+
+
+def stage_report(before: str, after: str) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Per-stage count, total and mean observed between two /metrics scrapes."""
+    baseline = histogram_totals(before)
+    stages: Dict[str, Dict[str, Dict[str, float]]] = {}
+    for (name, labels), (count, total) in sorted(histogram_totals(after).items()):
+        base_count, base_total = baseline.get((name, labels), (0.0, 0.0))
+        count, total = count - base_count, total - base_total
+        if count <= 0:
+            continue
+        stage = name[len("podcast_"):]
+        stages.setdefault(stage, {})[labels] = {
+            "count": int(count),
+            "total": round(total, 4),
+            "mean": round(total / count, 4),
+        }
+    return stages
+
+
+def run_scenario(name: str, jobs: List[List[int]], args: argparse.Namespace,
+                 llm: FakeServer, tts: FakeServer, overrides: Dict[str, str]) -> Dict[str, Any]:
+    work_dir = tempfile.mkdtemp(prefix=f"podcast-bench-{name}-")
+    server = ApiServer(work_dir, llm, tts, args.exchanges, overrides)
+    failed = True
+    try:
+        server.wait_ready(args.startup_timeout)
+        with ProcessTreeSampler(server.process.pid) as sampler:
+            if args.warmup:
+                # Loads the extraction models and warms connection pools outside the measurement
+                warmup = run_jobs(server, [[WARMUP_SEED]], args.timeout)
+                if warmup[0]["status"] != "completed":
+                    raise RuntimeError(f"Warmup job failed: {warmup[0]['error']}")
+            llm.stats.reset()
+            tts.stats.reset()
+            metrics_before = server.metrics()
+
+            started = time.perf_counter()
+            results = run_jobs(server, jobs, args.timeout)
+            wall_seconds = time.perf_counter() - started
+
+            metrics_after = server.metrics()
+            server_peak = sampler.server_peak_bytes()
+        peak = max(sampler.peak_bytes, server_peak or 0)
+
+        latencies = [result["latency_seconds"] for result in results if result["status"] == "completed"]
+        completed = len(latencies)
+        failed = completed != len(results)
+        return {
+            "jobs": len(results),
+            "completed": completed,
+            "failed": len(results) - completed,
+            "errors": [result["error"] for result in results if result["status"] != "completed"],
+            "sources": sum(len(seeds) for seeds in jobs),
+            "wall_seconds": round(wall_seconds, 3),
+            "throughput_jobs_per_hour": round(completed / wall_seconds * 3600, 2) if wall_seconds else None,
+            "job_latency_seconds": {
+                "p50": _percentile(latencies, 50),
+                "p95": _percentile(latencies, 95),
+                "max": max(latencies) if latencies else None,
+                "mean": sum(latencies) / completed if completed else None,
+            },
+            "peak_rss_mb": round(peak / 2 ** 20, 1),
+            "server_peak_rss_mb": round(server_peak / 2 ** 20, 1) if server_peak else None,
+            "stages": stage_report(metrics_before, metrics_after),
+            "llm_server": llm.stats.snapshot(),
+            "tts_server": tts.stats.snapshot(),
+        }
+    finally:
+        server.stop()
+        if failed and not args.keep:
+            print(f"Scenario {name}: kept {work_dir} for inspection", file=sys.stderr)
+        elif not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="Scenario to run, may be repeated (default: all)")
+    parser.add_argument("--jobs", type=int, default=4, help="Jobs of the concurrent scenario")
+    parser.add_argument("--exchanges", type=int, default=8, help="Exchanges per topic (TOPIC_EXCHANGE_MIN/MAX)")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="Setting of the API server, may be repeated")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    parser.add_argument("--no-warmup", dest="warmup", action="store_false",
+                        help="Measure the first job of every scenario too (includes model loading)")
+    parser.add_argument("--keep", action="store_true", help="Keep the scenario work directories")
+    parser.add_argument("--timeout", type=float, default=1800, help="Seconds to wait for the jobs of a scenario")
+    parser.add_argument("--startup-timeout", type=float, default=120, help="Seconds to wait for the API server")
+
+    llm = parser.add_argument_group("fake LLM")
+    llm.add_argument("--llm-ttft", type=float, default=0.05, help="Seconds before the first token")
+    llm.add_argument("--llm-prefill-rate", type=float, default=4000, help="Prompt tokens per second")
+    llm.add_argument("--llm-token-rate", type=float, default=150, help="Generated tokens per second")
+    llm.add_argument("--llm-reply-tokens", type=int, default=48, help="Tokens of a host turn")
+    llm.add_argument("--llm-summary-tokens", type=int, default=400, help="Tokens of a topic summary")
+
+    tts = parser.add_argument_group("fake TTS")
+    tts.add_argument("--tts-latency", type=float, default=0.05, help="Seconds per request on top of synthesis")
+    tts.add_argument("--tts-realtime-factor", type=float, default=20, help="Audio seconds synthesized per second")
+    tts.add_argument("--tts-words-per-minute", type=float, default=160, help="Speaking rate of the generated audio")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    overrides = {}
+    for item in args.env:
+        key, separator, value = item.partition("=")
+        if not separator:
+            raise SystemExit(f"--env expects KEY=VALUE, got {item!r}")
+        overrides[key] = value
+
+    llm = start_fake_llm(
+        ttft=args.llm_ttft,
+        prefill_rate=args.llm_prefill_rate,
+        token_rate=args.llm_token_rate,
+        reply_tokens=args.llm_reply_tokens,
+        summary_tokens=args.llm_summary_tokens,
+    )
+    tts = start_fake_tts(
+        latency=args.tts_latency,
+        realtime_factor=args.tts_realtime_factor,
+        words_per_minute=args.tts_words_per_minute,
+    )
+
+    commit = _git("rev-parse", "HEAD")
+    report: Dict[str, Any] = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": commit,
+            "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")) if commit else None,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "warmup": args.warmup,
+            "exchanges": args.exchanges,
+            "env": overrides,
+            "llm": llm.config,
+            "tts": tts.config,
+        },
+        "scenarios": {},
+    }
+    try:
+        for name in args.scenario or list(SCENARIOS):
+            print(f"Running scenario {name}...", file=sys.stderr, flush=True)
+            report["scenarios"][name] = run_scenario(name, SCENARIOS[name](args.jobs), args, llm, tts, overrides)
+    finally:
+        llm.stop()
+        tts.stop()
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    return 0 if all(scenario["failed"] == 0 for scenario in report["scenarios"].values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
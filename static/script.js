@@ -14,6 +14,15 @@ document.addEventListener('DOMContentLoaded', function () {
   const podcastListContainer = document.getElementById('podcastListContainer');
   const podcastList = document.getElementById('podcastList');
   const arxivUrlsContainer = document.getElementById('arxivUrlsContainer');
+  const outputFormatSelect = document.getElementById('outputFormat');
+
+  // Content types of the podcast formats the API can produce
+  const AUDIO_TYPES = {
+    wav: 'audio/wav',
+    mp3: 'audio/mpeg',
+    opus: 'audio/ogg',
+    m4a: 'audio/mp4'
+  };
 
   // Keep track of selected files
   let selectedFiles = [];
@@ -181,6 +190,11 @@ document.addEventListener('DOMContentLoaded', function () {
       formData.append('arxiv_urls', url);
     });
 
+    // Append output format (empty uses the server default)
+    if (outputFormatSelect.value) {
+      formData.append('output_format', outputFormatSelect.value);
+    }
+
     try {
       // Upload file and start processing
       const response = await fetch('/api/v1/podcasts', {
@@ -209,6 +223,48 @@ document.addEventListener('DOMContentLoaded', function () {
   });
 
   async function monitorProgress(jobId) {
+    // Push updates over Server-Sent Events, polling is the fallback
+    if (window.EventSource) {
+      const finished = await watchProgress(jobId);
+      if (finished) {
+        return;
+      }
+    }
+    await pollProgress(jobId);
+  }
+
+  // Returns true once the job finished, false if the event stream is unavailable
+  function watchProgress(jobId) {
+    return new Promise(resolve => {
+      const source = new EventSource(`/api/v1/podcasts/status/${jobId}/events`);
+      let done = false;
+
+      source.addEventListener('status', async function (event) {
+        const result = JSON.parse(event.data);
+        if (isFinished(result)) {
+          // Close before handling it, the server ends the stream right after the last
+          // event and onerror must not fall back to polling (handling it twice)
+          done = true;
+          source.close();
+        }
+        await handleStatus(result);
+        if (done) {
+          resolve(true);
+        }
+      });
+
+      source.onerror = function () {
+        if (done) {
+          return;
+        }
+        console.warn('Status event stream unavailable, falling back to polling');
+        source.close();
+        resolve(false);
+      };
+    });
+  }
+
+  async function pollProgress(jobId) {
     const POLL_INTERVAL = 5000; // 5 second between polls
 
     while (true) {
@@ -220,36 +276,53 @@ document.addEventListener('DOMContentLoaded', function () {
           throw new Error(result.detail || 'Failed to get job status');
         }
 
-        // Update UI with detailed status information
-        updateProgressUI(result);
-
-        if (result.status === 'completed') {
-          // Show download link
-          downloadLink.href = `/api/v1/podcasts/download/${result.result_file}`;
-          resultContainer.style.display = 'block';
-          progressContainer.style.display = 'none';
-          submitBtn.disabled = false;
-          submitBtn.textContent = 'Create Podcast';
-          await fetchPodcastList();
+        if (await handleStatus(result)) {
           break;
-        } else if (result.status === 'failed') {
-          throw new Error(result.error || 'Processing failed');
         }
         await new Promise(resolve => setTimeout(resolve, POLL_INTERVAL));
 
       } catch (error) {
-        console.error('Error monitoring progress:', error);
-        statusMessage.textContent = `Error: ${error.message}`;
-        statusMessage.className = 'error';
-        statusMessage.style.display = 'block';
-        progressContainer.style.display = 'none';
-        submitBtn.disabled = false;
-        submitBtn.textContent = 'Create Podcast';
+        showMonitorError(error);
         break;
       }
     }
   }
 
+  function isFinished(result) {
+    return result.status === 'completed' || result.status === 'failed';
+  }
+
+  // Update the UI for a job status, returns true once the job completed or failed
+  async function handleStatus(result) {
+    // Update UI with detailed status information
+    updateProgressUI(result);
+
+    if (result.status === 'completed') {
+      // Show download link
+      downloadLink.href = `/api/v1/podcasts/download/${result.result_file}`;
+      resultContainer.style.display = 'block';
+      progressContainer.style.display = 'none';
+      submitBtn.disabled = false;
+      submitBtn.textContent = 'Create Podcast';
+      await fetchPodcastList();
+      return true;
+    } else if (result.status === 'failed') {
+      showMonitorError(new Error(result.error || 'Processing failed'));
+      return true;
+    }
+    return false;
+  }
+
+  function showMonitorError(error) {
+    console.error('Error monitoring progress:', error);
+    statusMessage.textContent = `Error: ${error.message}`;
+    statusMessage.className = 'error';
+    statusMessage.style.display = 'block';
+    progressContainer.style.display = 'none';
+    submitBtn.disabled = false;
+    submitBtn.textContent = 'Create Podcast';
+  }
+
   function updateProgressUI(result) {
     // Update progress bar
     let progress = result.progress || 0;
@@ -265,7 +338,9 @@ document.addEventListener('DOMContentLoaded', function () {
     let statusMessageText = '';
     switch (result.status) {
       case 'queued':
-        statusMessageText = 'Job queued for processing...';
+        statusMessageText = result.queue_position
+          ? `Job queued for processing (position ${result.queue_position})...`
+          : 'Job queued for processing...';
         break;
       case 'processing':
         statusMessageText = `Processing: ${result.current_step || 'Starting'}...`;
@@ -405,7 +480,8 @@ document.addEventListener('DOMContentLoaded', function () {
     // Create source element
     const source = document.createElement('source');
     source.src = `/api/v1/podcasts/download/${filename}`;
-    source.type = 'audio/mpeg';
+    const extension = decodeURIComponent(filename).split('.').pop().toLowerCase();
+    source.type = AUDIO_TYPES[extension] || 'audio/mpeg';
 
     // Append source to audio
     audio.appendChild(source);
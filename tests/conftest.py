@@ -0,0 +1,16 @@
+import pytest
+
+from app import recovery
+from app.config.settings import settings
+
+
+@pytest.fixture
+def work_dir(tmp_path, monkeypatch):
+    """Job work dirs and checkpoints in a temporary directory, with resuming enabled."""
+    monkeypatch.setattr(settings, "JOB_WORK_DIR", str(tmp_path / "work"))
+    monkeypatch.setattr(settings, "JOB_CHECKPOINT_PATH", str(tmp_path / "checkpoints.db"))
+    monkeypatch.setattr(recovery, "resume_enabled", True)
+    monkeypatch.setattr(recovery, "_checkpointer", None)
+    yield tmp_path / "work"
+    if recovery._checkpointer is not None:
+        recovery._checkpointer.conn.close()
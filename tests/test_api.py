@@ -0,0 +1,58 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("docling")
+
+from app import api, recovery
+from app.config.settings import settings
+from app.graphs import nodes
+from app.progress import create_job, get_job
+from app.tts_client import TTSClient
+
+
+@pytest.mark.parametrize("parallel_topics", [False, True])
+def test_failed_tts_stops_the_dialogue_before_cleanup(monkeypatch, work_dir, parallel_topics):
+    monkeypatch.setattr(api, "resume_enabled", True)
+    monkeypatch.setattr(settings, "TTS_PIPELINE_ENABLED", True)
+    monkeypatch.setattr(settings, "TTS_PIPELINE_QUEUE_SIZE", 2)
+    monkeypatch.setattr(settings, "LLM_SENTENCE_STREAMING_ENABLED", False)
+    monkeypatch.setattr(settings, "LLM_SUMMARY_ENABLED", False)
+    monkeypatch.setattr(settings, "LLM_CONTEXT_MANAGEMENT_ENABLED", False)
+    monkeypatch.setattr(settings, "LLM_PARALLEL_TOPICS", parallel_topics)
+    monkeypatch.setattr(settings, "LLM_PARALLEL_TOPIC_WORKERS", 1)
+    monkeypatch.setattr(settings, "TOPIC_EXCHANGE_MIN", 20)
+    monkeypatch.setattr(settings, "TOPIC_EXCHANGE_MAX", 20)
+    llm_calls = []
+
+    def fake_invoke_llm(system_prompt, history, user_text, llm):
+        llm_calls.append(user_text)
+        time.sleep(0.01)
+        return f"Reply number {len(llm_calls)}."
+
+    def fake_generate_audio_segment(self, index, segment, temp_dir):
+        if index == 3:
+            raise ConnectionError("TTS server went away")
+        return None
+
+    monkeypatch.setattr(nodes, "invoke_llm", fake_invoke_llm)
+    monkeypatch.setattr(TTSClient, "generate_audio_segment", fake_generate_audio_segment)
+    monkeypatch.setattr(
+        api.PDFProcessor, "iter_extracted_texts",
+        lambda self, files, arxiv_urls, **kwargs: enumerate(["First topic", "Second topic", "Third topic"]),
+    )
+    job_id = f"tts-fails-{parallel_topics}"
+    create_job(job_id, status="queued")
+
+    files = [(f"source_{index}.pdf", f"digest-{index}") for index in range(3)]
+    api.process_podcast_job(job_id, files, [])
+    calls_when_done = len(llm_calls)
+    time.sleep(0.2)
+
+    assert get_job(job_id)["status"] == "failed"
+    # Generation stopped when TTS failed, long before all 3 * 20 lines, and stays stopped
+    assert len(llm_calls) == calls_when_done < 40
+    assert not [thread for thread in threading.enumerate() if thread.name.startswith(("llm-stream-", "topics-"))]
+    with recovery.get_checkpointer().cursor() as cur:
+        assert cur.execute("SELECT COUNT(*) FROM checkpoints").fetchone()[0] == 0
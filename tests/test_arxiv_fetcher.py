@@ -0,0 +1,101 @@
+import threading
+import time
+from concurrent.futures import wait
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.arxiv_fetcher import ArxivFetcher, DownloadTooLargeError
+from app.disk_cache import DiskCache
+
+
+PDF_BYTES = b"%PDF-1.4\n" + b"0" * 4096 + b"\n%%EOF\n"
+
+
+class ArxivStandIn(BaseHTTPRequestHandler):
+    """Minimal local stand-in for arxiv.org/pdf, with ETag support and a slow response."""
+
+    requests_seen = []
+    delay = 0.0
+    body = PDF_BYTES
+
+    def do_GET(self):
+        type(self).requests_seen.append((self.path, self.headers.get("If-None-Match")))
+        time.sleep(type(self).delay)
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Length", str(len(type(self).body)))
+        self.end_headers()
+        self.wfile.write(type(self).body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    ArxivStandIn.requests_seen = []
+    ArxivStandIn.delay = 0.0
+    ArxivStandIn.body = PDF_BYTES
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), ArxivStandIn)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def make_fetcher(tmp_path, max_bytes=1024 * 1024):
+    cache = DiskCache("arxiv-test", str(tmp_path / "cache"), 10 * 1024 * 1024)
+    return ArxivFetcher(workers=4, timeout=5, max_bytes=max_bytes, blob_cache=cache)
+
+
+def test_identical_inflight_downloads_are_coalesced(server, tmp_path):
+    ArxivStandIn.delay = 0.3
+    fetcher = make_fetcher(tmp_path)
+    futures = [fetcher.fetch_async(f"{server}/pdf/2408.09869") for _ in range(5)]
+    wait(futures)
+
+    assert all(future.result() == PDF_BYTES for future in futures)
+    assert len(ArxivStandIn.requests_seen) == 1
+
+
+def test_different_urls_download_in_parallel(server, tmp_path):
+    ArxivStandIn.delay = 0.3
+    fetcher = make_fetcher(tmp_path)
+    started = time.monotonic()
+    futures = [fetcher.fetch_async(f"{server}/pdf/2408.0986{i}") for i in range(4)]
+    wait(futures)
+
+    assert time.monotonic() - started < 1.0
+    assert len(ArxivStandIn.requests_seen) == 4
+
+
+def test_cached_pdf_is_revalidated(server, tmp_path):
+    fetcher = make_fetcher(tmp_path)
+    url = f"{server}/pdf/2408.09869"
+
+    assert fetcher.fetch(url) == PDF_BYTES
+    assert fetcher.fetch(url) == PDF_BYTES
+    assert ArxivStandIn.requests_seen == [("/pdf/2408.09869", None), ("/pdf/2408.09869", '"v1"')]
+
+
+def test_versioned_pdf_is_served_from_cache(server, tmp_path):
+    fetcher = make_fetcher(tmp_path)
+    url = f"{server}/pdf/2408.09869v2"
+
+    fetcher.fetch(url)
+    fetcher.fetch(url)
+    assert len(ArxivStandIn.requests_seen) == 1
+
+
+def test_size_limit_is_enforced(server, tmp_path):
+    fetcher = make_fetcher(tmp_path, max_bytes=1024)
+
+    with pytest.raises(DownloadTooLargeError):
+        fetcher.fetch(f"{server}/pdf/2408.09869")
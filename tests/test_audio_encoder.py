@@ -0,0 +1,26 @@
+import pytest
+from pydub import AudioSegment
+from pydub.generators import Sine
+
+from app.audio_encoder import encode_podcast, is_valid_bitrate
+
+
+@pytest.mark.parametrize("bitrate", ["8k", "96k", "128k", "320k"])
+def test_valid_bitrates(bitrate):
+    assert is_valid_bitrate(bitrate)
+
+
+@pytest.mark.parametrize("bitrate", ["", "128", "128K", "0k", "4k", "321k", "1e3k", "128k -y", "-128k", "128k\n", "\u0661\u0662\u0668k"])
+def test_invalid_bitrates(bitrate):
+    assert not is_valid_bitrate(bitrate)
+
+
+def test_failed_encoding_removes_the_wav(tmp_path, monkeypatch):
+    monkeypatch.setattr(AudioSegment, "converter", str(tmp_path / "missing-ffmpeg"))
+    wav_path = tmp_path / "podcast.wav"
+    Sine(440).to_audio_segment(duration=100).export(str(wav_path), format="wav")
+
+    with pytest.raises(Exception, match="Failed to encode podcast to mp3"):
+        encode_podcast(str(wav_path), "mp3", keep_wav=True)
+
+    assert list(tmp_path.iterdir()) == []
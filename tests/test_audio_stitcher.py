@@ -0,0 +1,17 @@
+from pydub.generators import Sine
+
+from app import loudness
+from app.audio_stitcher import AudioStitcher
+
+
+def test_failed_loudness_normalization_keeps_the_reference_format(monkeypatch):
+    def broken_normalize_arrays(*args, **kwargs):
+        raise ValueError("broken")
+
+    monkeypatch.setattr(loudness, "normalize_arrays", broken_normalize_arrays)
+    reference = Sine(440, sample_rate=24000).to_audio_segment(duration=200).set_channels(1).set_sample_width(2)
+    other = Sine(440, sample_rate=44100).to_audio_segment(duration=200).set_channels(2).set_sample_width(4)
+
+    normalized = AudioStitcher().normalize_batch([other], reference)[0]
+
+    assert (normalized.frame_rate, normalized.channels, normalized.sample_width) == (24000, 1, 2)
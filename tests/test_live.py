@@ -0,0 +1,47 @@
+import asyncio
+import os
+
+from pydub.generators import Sine
+
+from app.live import LiveStream
+
+
+def publish_segment(stream, tmp_path, index):
+    path = str(tmp_path / f"segment_{index}.wav")
+    Sine(440, sample_rate=24000).to_audio_segment(duration=100).set_channels(1).set_sample_width(2).export(path, format="wav")
+    stream.publish(index, path)
+
+
+async def never_disconnected():
+    return False
+
+
+def test_listener_added_before_the_job_finished_gets_the_audio(tmp_path):
+    stream = LiveStream("job-1")
+    publish_segment(stream, tmp_path, 0)
+    release = stream.add_listener()
+
+    # The job finishes before the response starts iterating the stream
+    stream.finish()
+    assert os.path.isdir(stream.directory)
+
+    async def listen():
+        return b"".join([data async for data in stream.iter_wav(never_disconnected, release)])
+
+    audio = asyncio.run(listen())
+
+    # 44 bytes of header and 100 ms of 16 bit mono audio at 24 kHz
+    assert len(audio) == 44 + 4800
+    assert not os.path.exists(stream.directory)
+
+
+def test_listener_released_without_listening_removes_the_audio(tmp_path):
+    stream = LiveStream("job-1")
+    publish_segment(stream, tmp_path, 0)
+    release = stream.add_listener()
+    stream.finish()
+
+    release()
+    release()
+
+    assert not os.path.exists(stream.directory)
@@ -0,0 +1,67 @@
+import pytest
+import requests
+
+from app.load_balancer import LoadBalancer
+
+
+URLS = ["http://replica-a", "http://replica-b", "http://replica-c"]
+
+
+def make_balancer(**kwargs):
+    return LoadBalancer("test", URLS, **kwargs)
+
+
+def test_least_outstanding_endpoint_is_chosen():
+    balancer = make_balancer()
+    first = balancer.acquire()
+    second = balancer.acquire()
+    third = balancer.acquire()
+
+    assert {first.url, second.url, third.url} == set(URLS)
+    balancer.release(second)
+    assert balancer.acquire() is second
+
+
+def test_sticky_key_stays_until_its_endpoint_is_too_busy():
+    balancer = make_balancer(sticky_slack=1)
+    home = balancer.acquire("job-1")
+    balancer.release(home)
+
+    assert balancer.acquire("job-1") is home
+    assert balancer.acquire("job-1") is home
+    assert balancer.acquire("job-1") is not home
+
+
+def test_failing_endpoint_is_ejected_and_skipped():
+    balancer = make_balancer(eject_failures=2, eject_seconds=60)
+    failing = balancer.endpoints[0]
+    for _ in range(2):
+        failing.outstanding += 1
+        balancer.release(failing, requests.ConnectionError("refused"))
+
+    chosen = [balancer.acquire() for _ in range(4)]
+    assert failing not in chosen
+
+
+def test_client_errors_dont_count_as_failures():
+    balancer = make_balancer(eject_failures=1)
+    response = requests.Response()
+    response.status_code = 400
+    endpoint = balancer.acquire()
+
+    with pytest.raises(requests.HTTPError):
+        with balancer.request(exclude=[e for e in balancer.endpoints if e is not endpoint]):
+            raise requests.HTTPError("bad request", response=response)
+
+    assert endpoint.failures == 0
+    assert endpoint.outstanding == 1
+
+
+def test_all_ejected_routes_to_first_recovering_endpoint():
+    balancer = make_balancer(eject_failures=1, eject_seconds=60)
+    for endpoint in balancer.endpoints:
+        endpoint.outstanding += 1
+        balancer.release(endpoint, requests.Timeout("timed out"))
+    balancer.endpoints[1].ejected_until -= 30
+
+    assert balancer.acquire() is balancer.endpoints[1]
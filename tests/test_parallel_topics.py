@@ -0,0 +1,124 @@
+import threading
+import time
+from contextlib import closing
+
+import pytest
+
+from app import recovery
+from app.config.settings import settings
+from app.graphs import nodes
+from app.graphs.podcast_graph import topic_thread_id
+from app.llm_client import LLMClient
+
+
+@pytest.fixture
+def requests_seen(monkeypatch):
+    requests = []
+
+    def fake_invoke_llm(system_prompt, history, user_text, llm):
+        requests.append(user_text)
+        return f"Reply number {len(requests)}."
+
+    monkeypatch.setattr(nodes, "invoke_llm", fake_invoke_llm)
+    monkeypatch.setattr(settings, "LLM_SUMMARY_ENABLED", False)
+    monkeypatch.setattr(settings, "LLM_CONTEXT_MANAGEMENT_ENABLED", False)
+    monkeypatch.setattr(settings, "LLM_PARALLEL_TOPICS", True)
+    return requests
+
+
+@pytest.mark.parametrize("exchanges", [4, 5])
+def test_hosts_keep_alternating_across_transitions(monkeypatch, requests_seen, exchanges):
+    monkeypatch.setattr(settings, "TOPIC_EXCHANGE_MIN", exchanges)
+    monkeypatch.setattr(settings, "TOPIC_EXCHANGE_MAX", exchanges)
+
+    dialogue = LLMClient().generate_podcast_script(["First topic", "Second topic", "Third topic"], "")
+
+    assert len(dialogue) == 3 * exchanges + 2
+    speakers = [line["speaker"] for line in dialogue]
+    assert all(a != b for a, b in zip(speakers, speakers[1:]))
+
+
+def test_transition_sees_both_topics(monkeypatch, requests_seen):
+    monkeypatch.setattr(settings, "TOPIC_EXCHANGE_MIN", 3)
+    monkeypatch.setattr(settings, "TOPIC_EXCHANGE_MAX", 3)
+
+    dialogue = LLMClient().generate_podcast_script(["First topic", "Second topic"], "")
+
+    transition = dialogue[3]["text"]
+    transition_request = next(text for text in requests_seen if "next_topic_opening" in text)
+    assert dialogue[2]["text"] in transition_request
+    assert dialogue[4]["text"] in transition_request
+    assert transition not in [line["text"] for line in dialogue[:3] + dialogue[4:]]
+
+
+def test_topics_resume_independently_of_the_first(monkeypatch, requests_seen, work_dir):
+    monkeypatch.setattr(settings, "TOPIC_EXCHANGE_MIN", 4)
+    monkeypatch.setattr(settings, "TOPIC_EXCHANGE_MAX", 4)
+    topics = ["First topic", "Second topic"]
+    first_run = LLMClient().generate_podcast_script(topics, "job-1")
+    # Interrupted before the first topic was checkpointed, while the second one was done
+    recovery.get_checkpointer().delete_thread(topic_thread_id("job-1", 0))
+    requests_seen.clear()
+    monkeypatch.setattr(settings, "TOPIC_EXCHANGE_MIN", 3)
+    monkeypatch.setattr(settings, "TOPIC_EXCHANGE_MAX", 3)
+
+    second_run = LLMClient().generate_podcast_script(topics, "job-1")
+
+    # Exchange counts come from the resumed topic, only the first topic and the transition are generated
+    assert len(second_run) == 9
+    assert len(requests_seen) == 5
+    assert second_run[5:] == first_run[5:]
+
+
+def test_failed_topic_stops_the_others(monkeypatch, work_dir):
+    monkeypatch.setattr(settings, "LLM_SUMMARY_ENABLED", False)
+    monkeypatch.setattr(settings, "LLM_CONTEXT_MANAGEMENT_ENABLED", False)
+    monkeypatch.setattr(settings, "LLM_PARALLEL_TOPICS", True)
+    monkeypatch.setattr(settings, "LLM_PARALLEL_TOPIC_WORKERS", 2)
+    monkeypatch.setattr(settings, "TOPIC_EXCHANGE_MIN", 20)
+    monkeypatch.setattr(settings, "TOPIC_EXCHANGE_MAX", 20)
+    calls = []
+
+    def fake_invoke_llm(system_prompt, history, user_text, llm):
+        calls.append(user_text)
+        call_number = len(calls)
+        time.sleep(0.01)
+        if call_number == 5:
+            raise ConnectionError("LLM server went away")
+        return f"Reply number {call_number}."
+
+    monkeypatch.setattr(nodes, "invoke_llm", fake_invoke_llm)
+
+    with pytest.raises(ConnectionError):
+        LLMClient().generate_podcast_script(["First topic", "Second topic"], "job-1")
+    calls_at_failure = len(calls)
+    time.sleep(0.1)
+
+    assert len(calls) == calls_at_failure < 10
+
+
+def test_consumer_failure_stops_topic_runs_before_close_returns(monkeypatch, requests_seen, work_dir):
+    monkeypatch.setattr(settings, "TOPIC_EXCHANGE_MIN", 10)
+    monkeypatch.setattr(settings, "TOPIC_EXCHANGE_MAX", 10)
+    monkeypatch.setattr(settings, "LLM_PARALLEL_TOPIC_WORKERS", 1)
+    slow_invoke_llm = nodes.invoke_llm
+
+    def fake_invoke_llm(*args):
+        time.sleep(0.01)
+        return slow_invoke_llm(*args)
+
+    monkeypatch.setattr(nodes, "invoke_llm", fake_invoke_llm)
+    _, lines = LLMClient().stream_podcast_script(["First topic", "Second topic", "Third topic"], "job-1")
+
+    with pytest.raises(ConnectionError):
+        with closing(lines):
+            for index, line in enumerate(lines):
+                # After the first topic's last line, while the stream waits for the second topic
+                if index == 9:
+                    raise ConnectionError("TTS server went away")
+    calls_when_closed = len(requests_seen)
+    time.sleep(0.1)
+
+    assert not [thread for thread in threading.enumerate() if thread.name.startswith("topics-job-1")]
+    # The first topic's 10 lines, and at most a line or two of the second one
+    assert len(requests_seen) == calls_when_closed < 15
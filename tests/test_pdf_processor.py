@@ -0,0 +1,57 @@
+from concurrent.futures import Future
+
+import pytest
+
+pytest.importorskip("docling")
+
+from app import pdf_processor
+from app.disk_cache import DiskCache
+from app.pdf_processor import PDFProcessor
+
+
+def done(result):
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+@pytest.fixture
+def processor(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        pdf_processor, "extraction_cache", DiskCache("extraction", str(tmp_path), max_bytes=10 * 1024 * 1024)
+    )
+    processor = PDFProcessor()
+    conversions = []
+
+    def fake_submit_extraction(pdf):
+        conversions.append(pdf)
+        return done(f"Text of {pdf.decode()}")
+
+    monkeypatch.setattr(processor, "_submit_extraction", fake_submit_extraction)
+    processor.conversions = conversions
+    return processor
+
+
+def extract(processor, monkeypatch, url, pdf_bytes):
+    monkeypatch.setattr(pdf_processor.arxiv_fetcher, "fetch_async", lambda fetched_url: done(pdf_bytes))
+    return dict(processor.iter_extracted_texts([], [url]))[0]
+
+
+def test_unversioned_arxiv_url_follows_new_versions(processor, monkeypatch):
+    url = "https://arxiv.org/abs/2408.09869"
+
+    assert extract(processor, monkeypatch, url, b"version 1") == "Text of version 1"
+    assert extract(processor, monkeypatch, url, b"version 2") == "Text of version 2"
+    # Unchanged PDFs are still served from the cache
+    assert extract(processor, monkeypatch, url, b"version 2") == "Text of version 2"
+    assert processor.conversions == [b"version 1", b"version 2"]
+
+
+def test_versioned_arxiv_url_is_cached_by_id(processor, monkeypatch):
+    assert extract(processor, monkeypatch, "https://arxiv.org/abs/2408.09869v1", b"version 1") == "Text of version 1"
+
+    def not_downloaded(url):
+        raise AssertionError(f"{url} was downloaded again")
+
+    monkeypatch.setattr(pdf_processor.arxiv_fetcher, "fetch_async", not_downloaded)
+    assert dict(processor.iter_extracted_texts([], ["https://arxiv.org/pdf/2408.09869v1.pdf"]))[0] == "Text of version 1"
@@ -0,0 +1,78 @@
+import pytest
+
+from app.config.settings import settings
+from app.graphs import nodes
+from app.graphs.podcast_graph import compile_podcast_graph
+
+
+def flatten(system_prompt, history, user_text):
+    """Request as the server sees it, one role-tagged message after another."""
+    parts = [f"<system>{system_prompt}</system>"]
+    parts += [f"<{message.type}>{message.content}</{message.type}>" for message in history]
+    parts.append(f"<human>{user_text}</human>")
+    return "".join(parts)
+
+
+def common_prefix_length(a, b):
+    length = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        length += 1
+    return length
+
+
+@pytest.fixture
+def requests_by_host(monkeypatch):
+    requests = {}
+
+    def fake_invoke_llm(system_prompt, history, user_text, llm):
+        requests.setdefault(system_prompt, []).append(flatten(system_prompt, history, user_text))
+        return f"Reply number {sum(len(sent) for sent in requests.values())}."
+
+    monkeypatch.setattr(nodes, "invoke_llm", fake_invoke_llm)
+    monkeypatch.setattr(settings, "LLM_SUMMARY_ENABLED", False)
+    monkeypatch.setattr(settings, "LLM_CONTEXT_MANAGEMENT_ENABLED", False)
+    monkeypatch.setattr(settings, "TOPIC_EXCHANGE_MIN", 8)
+    monkeypatch.setattr(settings, "TOPIC_EXCHANGE_MAX", 8)
+    return requests
+
+
+def run_graph(topics):
+    compiled_graph, initial_state = compile_podcast_graph(topics, "")
+    return compiled_graph.invoke(initial_state, config={"recursion_limit": 200, "configurable": {"topics": topics}})
+
+
+def test_consecutive_turns_share_prefix(monkeypatch, requests_by_host):
+    monkeypatch.setattr(settings, "LLM_PREFIX_STABLE_PROMPTS", True)
+    run_graph(["First paper.", "Second paper."])
+
+    assert len(requests_by_host) == 2
+    for requests in requests_by_host.values():
+        for previous, current in zip(requests, requests[1:]):
+            shared = common_prefix_length(previous, current)
+            # Only the control text at the tail of the previous request differs
+            assert previous[shared:].startswith("\n\n<instruction>")
+            assert previous[shared:].endswith("</human>")
+            assert "<instruction>\n" not in current[:shared]
+
+
+def test_control_text_is_kept_out_of_history(monkeypatch, requests_by_host):
+    monkeypatch.setattr(settings, "LLM_PREFIX_STABLE_PROMPTS", True)
+    final_state = run_graph(["First paper."])
+
+    for key in ("host_a_history", "host_b_history"):
+        assert all("<instruction>" not in message.content for message in final_state[key])
+
+
+def test_stable_layout_sends_less_history(monkeypatch, requests_by_host):
+    monkeypatch.setattr(settings, "LLM_PREFIX_STABLE_PROMPTS", False)
+    run_graph(["First paper."])
+    default_size = sum(len(request) for requests in requests_by_host.values() for request in requests)
+
+    requests_by_host.clear()
+    monkeypatch.setattr(settings, "LLM_PREFIX_STABLE_PROMPTS", True)
+    run_graph(["First paper."])
+    stable_size = sum(len(request) for requests in requests_by_host.values() for request in requests)
+
+    assert stable_size < default_size
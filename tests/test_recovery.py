@@ -0,0 +1,104 @@
+import os
+
+import pytest
+
+from app import recovery
+from app.config.settings import settings
+from app.graphs import nodes
+from app.llm_client import LLMClient
+from app.progress import create_job, get_job
+
+
+def save_inputs(job_id, contents, **options):
+    files = []
+    for index, content in enumerate(contents):
+        path = recovery.job_input_path(job_id, index)
+        with open(path, "wb") as f:
+            f.write(content)
+        files.append((path, f"digest-{index}"))
+    recovery.save_job_inputs(job_id, files, ["https://arxiv.org/abs/1234.5678"], options)
+    return files
+
+
+def test_claimed_job_cant_be_claimed_again(work_dir):
+    assert not recovery.is_job_claimed("job-1")
+
+    with recovery.claim_job("job-1") as claimed:
+        assert claimed
+        assert recovery.is_job_claimed("job-1")
+        with recovery.claim_job("job-1") as claimed_again:
+            assert not claimed_again
+
+    assert not recovery.is_job_claimed("job-1")
+
+
+def test_job_inputs_round_trip(work_dir):
+    files = save_inputs("job-1", [b"%PDF first", b"%PDF second"], output_format="mp3")
+
+    assert recovery.load_job_inputs("job-1") == (
+        files, ["https://arxiv.org/abs/1234.5678"], {"output_format": "mp3"}
+    )
+
+
+def test_job_inputs_missing_a_file_are_unusable(work_dir):
+    files = save_inputs("job-1", [b"%PDF first", b"%PDF second"])
+    os.remove(files[1][0])
+
+    assert recovery.load_job_inputs("job-1") is None
+    assert recovery.load_job_inputs("unknown-job") is None
+
+
+def test_interrupted_dialogue_resumes_from_checkpoint(work_dir, monkeypatch):
+    monkeypatch.setattr(settings, "LLM_SUMMARY_ENABLED", False)
+    monkeypatch.setattr(settings, "LLM_CONTEXT_MANAGEMENT_ENABLED", False)
+    monkeypatch.setattr(settings, "LLM_PARALLEL_TOPICS", False)
+    monkeypatch.setattr(settings, "TOPIC_EXCHANGE_MIN", 4)
+    monkeypatch.setattr(settings, "TOPIC_EXCHANGE_MAX", 4)
+    requests = []
+    down_after = 5
+
+    def fake_invoke_llm(system_prompt, history, user_text, llm):
+        if len(requests) == down_after:
+            raise ConnectionError("LLM server went away")
+        requests.append(user_text)
+        return f"Reply number {len(requests)}."
+
+    monkeypatch.setattr(nodes, "invoke_llm", fake_invoke_llm)
+    topics = ["First topic", "Second topic"]
+
+    with pytest.raises(ConnectionError):
+        LLMClient().generate_podcast_script(topics, "job-1")
+    assert len(LLMClient().checkpointed_state("job-1", len(topics))["dialogue"]) == 5
+
+    # The LLM server is back, only the missing lines are generated
+    down_after = None
+    dialogue = LLMClient().generate_podcast_script(topics, "job-1")
+
+    assert [line["text"] for line in dialogue] == [f"Reply number {n}." for n in range(1, 9)]
+    assert len(requests) == 8
+
+
+def test_resume_interrupted_jobs(work_dir, monkeypatch):
+    pytest.importorskip("docling")
+    from app import api
+
+    monkeypatch.setattr(api, "resume_enabled", True)
+    submitted = []
+    monkeypatch.setattr(
+        api.scheduler, "submit", lambda job_id, target, *args, **kwargs: submitted.append((job_id, args, kwargs))
+    )
+
+    create_job("with-inputs", status="processing")
+    files = save_inputs("with-inputs", [b"%PDF first"], output_format="mp3")
+    create_job("without-inputs", status="processing")
+    create_job("finished", status="completed")
+    os.makedirs(recovery.job_work_dir("finished"))
+
+    api.resume_interrupted_jobs()
+
+    assert submitted == [
+        ("with-inputs", ("with-inputs", files, ["https://arxiv.org/abs/1234.5678"]), {"output_format": "mp3"})
+    ]
+    assert get_job("with-inputs")["status"] == "queued"
+    assert get_job("without-inputs")["status"] == "failed"
+    assert not os.path.exists(recovery.job_work_dir("finished"))
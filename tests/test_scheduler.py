@@ -0,0 +1,28 @@
+import threading
+
+import pytest
+
+from app.scheduler import JobScheduler, QueueFullError
+
+
+def test_jobs_are_accepted_while_a_worker_is_free():
+    scheduler = JobScheduler(workers=2, max_queued=0, default_duration=60)
+    release = threading.Event()
+
+    scheduler.submit("job-1", release.wait)
+    scheduler.submit("job-2", release.wait)
+    with pytest.raises(QueueFullError):
+        scheduler.submit("job-3", release.wait)
+    release.set()
+
+
+def test_jobs_wait_up_to_the_queue_size():
+    scheduler = JobScheduler(workers=1, max_queued=1, default_duration=60)
+    release = threading.Event()
+
+    scheduler.submit("job-1", release.wait)
+    assert scheduler.submit("job-2", release.wait) >= 1
+    with pytest.raises(QueueFullError) as error:
+        scheduler.submit("job-3", release.wait)
+    assert error.value.retry_after >= 1
+    release.set()
@@ -0,0 +1,55 @@
+import threading
+import time
+
+import pytest
+
+from app.config.settings import settings
+from app.tts_client import TTSClient
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(settings, "TTS_CONCURRENCY", 2)
+    return TTSClient()
+
+
+def line(text):
+    return {"speaker": "HOST_A", "text": text}
+
+
+def test_segments_are_reported_while_the_next_line_is_generated(monkeypatch, client, tmp_path):
+    monkeypatch.setattr(client, "generate_audio_segment", lambda index, segment, temp_dir: f"segment_{index}.wav")
+    reported = threading.Event()
+
+    def dialogue():
+        yield line("First")
+        # The LLM is still generating the second line
+        assert reported.wait(timeout=5)
+        yield line("Second")
+
+    files = client.generate_audio_segments(
+        dialogue(), "job-1", str(tmp_path), total=2, on_segment=lambda index, filepath: reported.set()
+    )
+
+    assert files == ["segment_0.wav", "segment_1.wav"]
+
+
+def test_failed_segment_stops_pulling_lines(monkeypatch, client, tmp_path):
+    def generate_audio_segment(index, segment, temp_dir):
+        if index == 0:
+            raise ConnectionError("TTS server went away")
+        return f"segment_{index}.wav"
+
+    monkeypatch.setattr(client, "generate_audio_segment", generate_audio_segment)
+    pulled = []
+
+    def dialogue():
+        for index in range(10):
+            pulled.append(index)
+            time.sleep(0.05)
+            yield line(f"Line {index}")
+
+    with pytest.raises(ConnectionError):
+        client.generate_audio_segments(dialogue(), "job-1", str(tmp_path), total=10)
+
+    assert pulled == [0, 1]